@@ -0,0 +1,130 @@
+"""Adaptive request tuning helpers."""
+
+from __future__ import annotations
+
+import collections
+import math
+import threading
+
+# Weight of the newest observation in the moving averages
+_SMOOTHING = 0.3
+
+
+class PageSizeController:
+    """Pick a page size from observed response latency, size and throttling.
+
+    The page size grows additively while responses are fast and small, shrinks
+    proportionally when they get slow or large, and is halved whenever the
+    endpoint throttles us or times out.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        initial: int,
+        maximum: int,
+        *,
+        minimum: int = 10,
+        target_seconds: float = 5.0,
+        max_response_bytes: int = 8 * 1024 * 1024,
+        cooldown: int = 5,
+    ) -> None:
+        """Initialise the controller.
+
+        Args:
+            initial: Page size to start with.
+            maximum: Largest page size the endpoint accepts.
+            minimum: Smallest page size to fall back to.
+            target_seconds: Desired response latency.
+            max_response_bytes: Desired upper bound on response size.
+            cooldown: Successful responses to wait for after a penalty before
+                growing the page size again.
+        """
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.target_seconds = target_seconds
+        self.max_response_bytes = max_response_bytes
+        self.cooldown = cooldown
+        self._page_size = max(self.minimum, min(initial, maximum))
+        self._seconds: float | None = None
+        self._bytes_per_record: float | None = None
+        self._holdoff = 0
+
+    @property
+    def page_size(self) -> int:
+        """Return the page size to use for the next request."""
+        return self._page_size
+
+    def observe(self, seconds: float, size: int, records: int) -> None:
+        """Record a successful response.
+
+        Args:
+            seconds: Response latency in seconds.
+            size: Response body size in bytes.
+            records: Number of records the response was asked for.
+        """
+        records = max(records, 1)
+        self._seconds = _average(self._seconds, seconds)
+        self._bytes_per_record = _average(self._bytes_per_record, size / records)
+
+        if self._holdoff:
+            self._holdoff -= 1
+            return
+
+        byte_limit = int(self.max_response_bytes / max(self._bytes_per_record, 1))
+        if self._seconds > self.target_seconds:
+            proposed = int(self._page_size * self.target_seconds / self._seconds)
+        elif self._seconds < self.target_seconds / 2:
+            proposed = self._page_size + max(self.maximum // 10, 1)
+        else:
+            proposed = self._page_size
+        self._page_size = max(self.minimum, min(proposed, byte_limit, self.maximum))
+
+    def penalise(self) -> None:
+        """Record a throttled or timed-out request."""
+        self._page_size = max(self.minimum, self._page_size // 2)
+        self._holdoff = self.cooldown
+
+
+class LatencyTracker:
+    """Percentiles of an endpoint's recent response latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        """Initialise the tracker.
+
+        Args:
+            window: Number of most recent latencies kept.
+            min_samples: Latencies needed before percentiles are reported.
+        """
+        self.min_samples = min_samples
+        self._seconds: collections.deque[float] = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record a response latency.
+
+        Args:
+            seconds: Response latency in seconds.
+        """
+        with self._lock:
+            self._seconds.append(seconds)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return a percentile of the recent latencies.
+
+        Args:
+            fraction: The percentile, between 0 and 1.
+
+        Returns:
+            Latency in seconds, or None until enough latencies were recorded.
+        """
+        with self._lock:
+            if len(self._seconds) < self.min_samples:
+                return None
+            ordered = sorted(self._seconds)
+        return ordered[min(math.ceil(fraction * len(ordered)), len(ordered)) - 1]
+
+
+def _average(current: float | None, value: float) -> float:
+    if current is None:
+        return value
+    return current + _SMOOTHING * (value - current)
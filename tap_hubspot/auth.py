@@ -1,16 +1,256 @@
 """HubSpot Authentication."""
 
-from singer_sdk.authenticators import OAuthAuthenticator, SingletonMeta
+from __future__ import annotations
 
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import sys
+import threading
+import typing as t
+from pathlib import Path
 
-class HubSpotOAuthAuthenticator(OAuthAuthenticator, metaclass=SingletonMeta):
-    """Authenticator class for HubSpot."""
+import requests
+from singer_sdk.authenticators import OAuthAuthenticator
+from singer_sdk.helpers._util import utc_now
+
+if sys.platform != "win32":
+    import fcntl
+
+if t.TYPE_CHECKING:
+    from singer_sdk.streams.rest import _HTTPStream
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path) -> t.Iterator[None]:
+    """Hold an exclusive lock on `path` across processes, where supported."""
+    if sys.platform == "win32":
+        yield
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+class HubSpotOAuthAuthenticator(OAuthAuthenticator):
+    """Authenticator class for HubSpot.
+
+    One instance is shared by all streams using the same credentials; use
+    `for_credentials` rather than instantiating the class directly.
+
+    Access tokens are refreshed in the background shortly before they expire.
+    If `token_cache_path` is configured, tokens are also persisted between runs
+    and shared between processes using the same cache file.
+    """
+
+    # Refresh access tokens this many seconds before they expire
+    refresh_margin = 300
+
+    _instances: t.ClassVar[dict[str, HubSpotOAuthAuthenticator]] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        stream: _HTTPStream,
+        *args: t.Any,
+        credentials: t.Mapping[str, t.Any] | None = None,
+        session: requests.Session | None = None,
+        **kwargs: t.Any,
+    ) -> None:
+        """Create a new authenticator.
+
+        Args:
+            stream: The stream instance to use with this authenticator.
+            args: Positional arguments for `OAuthAuthenticator`.
+            credentials: OAuth app credentials and refresh token. Defaults to the
+                tap config.
+            session: Session to request access tokens with, e.g. one capturing
+                them. Defaults to a new session.
+            kwargs: Keyword arguments for `OAuthAuthenticator`.
+        """
+        super().__init__(stream, *args, **kwargs)
+        self.credentials = credentials if credentials is not None else self.config
+        # Only used under the refresh lock, so never by two threads at once
+        self._session = session or requests.Session()
+        self._refresh_lock = threading.Lock()
+        self._refresh_timer: threading.Timer | None = None
+        with self._cache_lock():
+            self._load_cached_token()
+        self._schedule_refresh()
+
+    @classmethod
+    def for_credentials(
+        cls,
+        stream: _HTTPStream,
+        credentials: t.Mapping[str, t.Any],
+        **kwargs: t.Any,
+    ) -> HubSpotOAuthAuthenticator:
+        """Return the shared authenticator for a set of credentials.
+
+        Args:
+            stream: The stream requesting the authenticator.
+            credentials: OAuth app credentials and refresh token.
+            kwargs: Keyword arguments used if a new authenticator is created.
+
+        Returns:
+            An authenticator instance.
+        """
+        key = _digest(credentials["refresh_token"])
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(stream, credentials=credentials, **kwargs)
+            return cls._instances[key]
 
     @property
     def oauth_request_body(self):  # noqa: ANN201, D102
         return {
             "grant_type": "refresh_token",
-            "client_id": self.config["client_id"],
-            "client_secret": self.config["client_secret"],
-            "refresh_token": self.config["refresh_token"],
+            "client_id": self.credentials["client_id"],
+            "client_secret": self.credentials["client_secret"],
+            "refresh_token": self.credentials["refresh_token"],
         }
+
+    @property
+    def token_cache_path(self) -> Path | None:
+        """Return the path of the access token cache file, if configured."""
+        path = self.config.get("token_cache_path")
+        return Path(path).expanduser() if path else None
+
+    def is_token_valid(self) -> bool:
+        """Check if the token is valid and not about to expire.
+
+        Returns:
+            True if the token is valid for at least `refresh_margin` seconds.
+        """
+        if self.last_refreshed is None:
+            return False
+        if not self.expires_in:
+            return True
+        age = (utc_now() - self.last_refreshed).total_seconds()
+        return self.expires_in - self.refresh_margin > age
+
+    def update_access_token(self) -> None:
+        """Refresh the access token, unless another worker already has."""
+        with self._refresh_lock, self._cache_lock():
+            if self.is_token_valid():
+                return
+            self._load_cached_token()
+            if self.is_token_valid():
+                return
+
+            self._request_access_token()
+            self._save_cached_token()
+            self._schedule_refresh()
+
+    def _request_access_token(self) -> None:
+        """Request a new access token, as `OAuthAuthenticator` does, with the session.
+
+        Raises:
+            RuntimeError: When OAuth login fails.
+        """
+        request_time = utc_now()
+        response = self._session.post(
+            self.auth_endpoint,
+            headers=self._oauth_headers,
+            data=self.oauth_request_payload,
+            timeout=60,
+        )
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as ex:
+            msg = f"Failed OAuth login, response was '{response.json()}'. {ex}"
+            raise RuntimeError(msg) from ex
+
+        self.logger.info("OAuth authorization attempt was successful.")
+        token_json = response.json()
+        self.access_token = token_json["access_token"]
+        expiration = token_json.get("expires_in", self._default_expiration)
+        self.expires_in = int(expiration) if expiration else None
+        self.last_refreshed = request_time
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self.last_refreshed is None or not self.expires_in:
+            return
+
+        age = (utc_now() - self.last_refreshed).total_seconds()
+        delay = max(self.expires_in - self.refresh_margin - age, 0) + 1
+        self._refresh_timer = threading.Timer(delay, self._refresh_in_background)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.update_access_token()
+        except Exception:  # noqa: BLE001
+            # Requests will retry the refresh themselves once the token expires
+            self.logger.warning("Background access token refresh failed.")
+
+    # Token cache
+
+    @property
+    def _refresh_token_digest(self) -> str:
+        return _digest(self.credentials["refresh_token"])
+
+    def _cache_lock(self) -> t.ContextManager[None]:
+        if path := self.token_cache_path:
+            return _file_lock(path.with_name(f"{path.name}.lock"))
+        return contextlib.nullcontext()
+
+    def _read_token_cache(self) -> dict[str, dict]:
+        path = self.token_cache_path
+        if path is None or not path.exists():
+            return {}
+
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.logger.warning("Ignoring unreadable token cache '%s'.", path)
+            return {}
+
+    def _load_cached_token(self) -> None:
+        # Tokens are cached per refresh token, e.g. one per portal
+        cached = self._read_token_cache().get(self._refresh_token_digest)
+        if cached is None:
+            return
+
+        # A token older than the one we have is of no use
+        last_refreshed = datetime.datetime.fromisoformat(cached["last_refreshed"])
+        if self.last_refreshed is not None and last_refreshed <= self.last_refreshed:
+            return
+
+        self.access_token = cached["access_token"]
+        self.expires_in = cached.get("expires_in")
+        self.last_refreshed = last_refreshed
+
+    def _save_cached_token(self) -> None:
+        path = self.token_cache_path
+        if path is None or self.last_refreshed is None:
+            return
+
+        cache = self._read_token_cache()
+        cache[self._refresh_token_digest] = {
+            "access_token": self.access_token,
+            "expires_in": self.expires_in,
+            "last_refreshed": self.last_refreshed.isoformat(),
+        }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(cache, tmp_file)
+        tmp_path.replace(path)
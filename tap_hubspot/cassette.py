@@ -0,0 +1,402 @@
+"""Capture of anonymised API traffic to cassettes, and its replay."""
+
+from __future__ import annotations
+
+import atexit
+import collections
+import contextlib
+import datetime
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+import typing as t
+import weakref
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger("tap-hubspot")
+
+# Query parameters that carry credentials, left out of cassettes
+_SECRET_PARAMS = frozenset(("access_token", "hapikey", "token"))
+
+# Response headers kept in cassettes, as the tap acts on them
+_KEPT_HEADERS = ("Content-Type", "Retry-After")
+_KEPT_HEADER_PREFIX = "x-hubspot-ratelimit-"
+
+# Strings kept as they are: dates, so bookmarks behave as they did when captured,
+# and booleans
+_KEPT_VALUE = re.compile(
+    r"^(?:|true|false"
+    r"|\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?"
+    r"(?:Z|[+-]\d{2}:?\d{2})?)?)$",
+)
+
+# Numbers, whose digits are hashed unless kept, e.g. phone numbers and postcodes
+_NUMBER = re.compile(r"^-?\d+(?:\.\d+)?$")
+
+# Fields kept as they are, as records are paged and read in batches by them
+_KEPT_FIELDS = frozenset(("after", "hs_object_id", "id"))
+
+# Fields kept as they are in definitions, as they name properties and types
+# rather than hold values
+_KEPT_DEFINITION_FIELDS = frozenset(("fieldType", "name", "objectType", "type"))
+
+# Paths of the endpoints responding with definitions of properties and objects
+_DEFINITION_PATHS = ("/properties/", "/schemas")
+
+
+class CassetteMissError(LookupError):
+    """Raised when a replayed request was not captured."""
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """Return the key a request is captured and replayed under.
+
+    Credentials are left out of the URL, and the body is only kept as a digest.
+
+    Args:
+        request: The request sent.
+
+    Returns:
+        The method, URL and body digest of the request.
+    """
+    url = urlsplit(request.url or "")
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(url.query, keep_blank_values=True)
+            if name.lower() not in _SECRET_PARAMS
+        ),
+    )
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    digest = hashlib.sha256(body).hexdigest()[:16] if body else ""
+    return f"{request.method} {url.netloc}{url.path}?{query} {digest}"
+
+
+class Anonymiser:
+    """Replaces string values of JSON documents with keyed hashes of equal length.
+
+    Keys, names of properties and values the tap relies on to page and bookmark
+    are kept. Equal values hash alike within a cassette, while the random key
+    keeps them from being looked up.
+    """
+
+    def __init__(self, key: bytes | None = None) -> None:
+        """Create an anonymiser.
+
+        Args:
+            key: Key of the hashes. Defaults to a random one.
+        """
+        self._key = key or secrets.token_bytes(32)
+
+    def hash(self, value: str) -> str:
+        """Return a hash of `value` of the same length.
+
+        Digits of numbers are hashed to digits, so they still parse as numbers.
+
+        Args:
+            value: The string to hash.
+
+        Returns:
+            Hexadecimal digits, or the number with its digits hashed.
+        """
+        digest = hmac.new(self._key, value.encode(), hashlib.sha256).hexdigest()
+        if _NUMBER.match(value):
+            digits = iter(str(int(digest, 16)) * (len(value) // 64 + 1))
+            return re.sub(r"\d", lambda _: next(digits), value)
+        return (digest * (len(value) // len(digest) + 1))[: len(value)]
+
+    def __call__(
+        self,
+        value: t.Any,  # noqa: ANN401
+        path: tuple[str, ...] = (),
+        *,
+        definitions: bool = False,
+    ) -> t.Any:  # noqa: ANN401
+        """Return an anonymised copy of a decoded JSON document.
+
+        Args:
+            value: The document.
+            path: Keys leading to the document.
+            definitions: Whether the document defines properties or objects,
+                whose names and types are kept.
+
+        Returns:
+            The anonymised document.
+        """
+        if isinstance(value, dict):
+            return {
+                key: self(item, (*path, key), definitions=definitions)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self(item, path, definitions=definitions) for item in value]
+        field = path[-1] if path else None
+        if (
+            not isinstance(value, str)
+            or "paging" in path
+            or field in _KEPT_FIELDS
+            or (definitions and field in _KEPT_DEFINITION_FIELDS)
+            or _KEPT_VALUE.match(value)
+        ):
+            return value
+        return self.hash(value)
+
+
+class Cassette:
+    """Request and response pairs, in a gzipped file of JSON lines."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Open a cassette.
+
+        Args:
+            path: The cassette file.
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file: t.TextIO | None = None
+        self._anonymise = Anonymiser()
+        self._entries: dict[str, collections.deque[dict]] | None = None
+
+    def record(self, response: requests.Response, content: bytes) -> None:
+        """Append an anonymised response to its request.
+
+        Args:
+            response: The response received.
+            content: The JSON body of the response.
+        """
+        body = json.loads(content) if content else None
+        definitions = any(
+            path in response.request.path_url for path in _DEFINITION_PATHS
+        )
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name in _KEPT_HEADERS or name.lower().startswith(_KEPT_HEADER_PREFIX)
+        }
+        entry = {
+            "request": request_key(response.request),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": headers,
+            "elapsed": response.elapsed.total_seconds(),
+            "body": self._anonymise(body, definitions=definitions),
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = gzip.open(self.path, "wt", encoding="utf-8")  # noqa: SIM115
+                atexit.register(self.close)
+            self._file.write(line)
+
+    def close(self) -> None:
+        """Finish writing the cassette."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def play(self, request: requests.PreparedRequest) -> dict:
+        """Return the next captured response to a request.
+
+        Responses to the same request are played in the order they were captured.
+
+        Args:
+            request: The request sent.
+
+        Returns:
+            The captured response.
+
+        Raises:
+            CassetteMissError: If no more responses to the request were captured.
+        """
+        key = request_key(request)
+        with self._lock:
+            if self._entries is None:
+                self._entries = collections.defaultdict(collections.deque)
+                with gzip.open(self.path, "rt", encoding="utf-8") as file:
+                    for line in file:
+                        entry = json.loads(line)
+                        self._entries[entry["request"]].append(entry)
+            entries = self._entries.get(key)
+            if not entries:
+                msg = f"No captured response to {key} in {self.path}"
+                raise CassetteMissError(msg)
+            return entries.popleft()
+
+
+# Whether responses received on this thread are captured once they are used
+_deferred = threading.local()
+# Cassettes and bodies of such responses, until they are used
+_pending: weakref.WeakKeyDictionary[requests.Response, tuple[Cassette, bytes]] = (
+    weakref.WeakKeyDictionary()
+)
+_pending_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def deferred_capture() -> t.Iterator[None]:
+    """Capture responses received in this block only once `capture` is called.
+
+    For requests whose response may go unused, e.g. hedged duplicates.
+
+    Yields:
+        Nothing.
+    """
+    _deferred.active = True
+    try:
+        yield
+    finally:
+        _deferred.active = False
+
+
+def capture(response: requests.Response) -> None:
+    """Capture a response whose capture was deferred, if it was.
+
+    Args:
+        response: The response used.
+    """
+    with _pending_lock:
+        pending = _pending.pop(response, None)
+    if pending is not None:
+        cassette, content = pending
+        cassette.record(response, content)
+
+
+_cassettes: dict[Path, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str | Path) -> Cassette:
+    """Return the process-wide cassette at `path`, opening it if needed.
+
+    Args:
+        path: The cassette file.
+
+    Returns:
+        The cassette, shared by all streams and threads.
+    """
+    path = Path(path).expanduser().resolve()
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+class CaptureAdapter(HTTPAdapter):
+    """Transport sending requests as usual, and capturing their responses.
+
+    Within `deferred_capture`, responses are only captured once passed to
+    `capture`, so that responses nobody used are left out.
+    """
+
+    def __init__(self, cassette: Cassette) -> None:
+        """Create the transport.
+
+        Args:
+            cassette: The cassette to capture responses to.
+        """
+        super().__init__()
+        self.cassette = cassette
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        *args: t.Any,
+        **kwargs: t.Any,
+    ) -> requests.Response:
+        """Send a request and capture its response.
+
+        Args:
+            request: The request to send.
+            args: Positional arguments of `HTTPAdapter.send`.
+            kwargs: Keyword arguments of `HTTPAdapter.send`.
+
+        Returns:
+            The response, whose body can still be streamed.
+        """
+        response = super().send(request, *args, **kwargs)
+        if "json" not in response.headers.get("Content-Type", ""):
+            # Such as export files, which cannot be anonymised
+            logger.warning(
+                "Response to %s is not JSON, and was not captured",
+                request.path_url,
+            )
+            return response
+
+        content = response.raw.read(decode_content=True)
+        response.raw.release_conn()
+        if getattr(_deferred, "active", False):
+            with _pending_lock:
+                _pending[response] = (self.cassette, content)
+        else:
+            self.cassette.record(response, content)
+        # The body was read to capture it, so it is read again from memory
+        response.raw = io.BytesIO(content)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport serving captured responses instead of sending requests."""
+
+    def __init__(self, cassette: Cassette, latency_factor: float = 0) -> None:
+        """Create the transport.
+
+        Args:
+            cassette: The cassette to replay.
+            latency_factor: Multiple of the captured latency of each response to
+                wait for before serving it.
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.latency_factor = latency_factor
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        *args: t.Any,  # noqa: ARG002
+        **kwargs: t.Any,  # noqa: ARG002
+    ) -> requests.Response:
+        """Serve the captured response to a request.
+
+        Args:
+            request: The request sent.
+            args: Positional arguments of `HTTPAdapter.send`, ignored.
+            kwargs: Keyword arguments of `HTTPAdapter.send`, ignored.
+
+        Returns:
+            The captured response.
+        """
+        entry = self.cassette.play(request)
+        elapsed = entry["elapsed"] * self.latency_factor
+        if elapsed:
+            time.sleep(elapsed)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry["reason"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        content = b"" if entry["body"] is None else json.dumps(entry["body"]).encode()
+        response.raw = io.BytesIO(content)
+        response.encoding = "utf-8"
+        response.url = request.url or ""
+        response.request = request
+        response.elapsed = datetime.timedelta(seconds=elapsed)
+        return response
+
+    def close(self) -> None:
+        """Release nothing, as no connections are opened."""
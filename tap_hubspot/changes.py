@@ -0,0 +1,85 @@
+"""Reading changed object IDs from captured HubSpot webhook events."""
+
+from __future__ import annotations
+
+import json
+import typing as t
+from pathlib import Path
+
+if t.TYPE_CHECKING:
+    import datetime
+
+# Object types named by the subscription type of CRM webhook events, e.g.
+# `contact.propertyChange`; generic webhook events carry `objectTypeId` instead
+SUBSCRIPTION_OBJECT_TYPES = {
+    "contact": "0-1",
+    "company": "0-2",
+    "deal": "0-3",
+    "ticket": "0-5",
+    "product": "0-7",
+    "line_item": "0-8",
+}
+
+
+def change_feed_files(path: str | Path) -> list[Path]:
+    """Return the files of a change feed.
+
+    Args:
+        path: A JSONL file, or a directory of them.
+
+    Returns:
+        The feed files, in name order.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob("*.jsonl"))
+    return [path] if path.exists() else []
+
+
+def _event_object_type(event: dict) -> str | None:
+    if object_type_id := event.get("objectTypeId"):
+        return str(object_type_id)
+    subscription_type = str(event.get("subscriptionType") or "")
+    return SUBSCRIPTION_OBJECT_TYPES.get(subscription_type.partition(".")[0])
+
+
+def read_changed_ids(
+    path: str | Path,
+    object_type_id: str,
+    *,
+    portal_id: str | None = None,
+    since: datetime.datetime | None = None,
+) -> list[str]:
+    """Read the unique IDs of changed objects of one type from a change feed.
+
+    Lines that are not valid JSON, e.g. one still being written, are ignored.
+
+    Args:
+        path: A JSONL file of webhook events, or a directory of them.
+        object_type_id: CRM object type ID of the objects, e.g. `0-1`.
+        portal_id: Only read events from this portal.
+        since: Only read events that occurred at or after this time.
+
+    Returns:
+        Object IDs, in the order they first appear.
+    """
+    since_ms = int(since.timestamp() * 1000) if since else None
+    ids: dict[str, None] = {}
+    for file in change_feed_files(path):
+        with file.open(encoding="utf-8") as lines:
+            for line in lines:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(event, dict) or "objectId" not in event:
+                    continue
+                if _event_object_type(event) != object_type_id:
+                    continue
+                if portal_id and str(event.get("portalId")) != portal_id:
+                    continue
+                occurred_at: t.Any = event.get("occurredAt")
+                if since_ms and occurred_at and int(occurred_at) < since_ms:
+                    continue
+                ids[str(event["objectId"])] = None
+    return list(ids)
@@ -2,23 +2,68 @@
 
 from __future__ import annotations
 
+import collections
+import copy
 import datetime
+import hashlib
+import itertools
+import json
+import math
 import sys
+import threading
+import time
 import typing as t
-from functools import cached_property
+from functools import cached_property, partial
 from http import HTTPStatus
+from pathlib import Path
 
 import requests
 from singer_sdk import typing as th
 from singer_sdk.authenticators import BearerTokenAuthenticator
+from singer_sdk.exceptions import ConfigValidationError, FatalAPIError
+from singer_sdk.helpers._typing import TypeConformanceLevel
+from singer_sdk.mapper import SameRecordTransform
 from singer_sdk.streams import RESTStream
 from singer_sdk.streams.core import REPLICATION_INCREMENTAL
 
+from tap_hubspot.adaptive import LatencyTracker, PageSizeController
 from tap_hubspot.auth import HubSpotOAuthAuthenticator
+from tap_hubspot.cassette import (
+    CaptureAdapter,
+    ReplayAdapter,
+    capture,
+    deferred_capture,
+    get_cassette,
+)
+from tap_hubspot.changes import read_changed_ids
+from tap_hubspot.concurrency import Prefetcher, Race, get_worker_pool
+from tap_hubspot.digest import DigestStore, record_digest
+from tap_hubspot.encoding import EncodingSpec, RecordEncoder, get_process_pool
+from tap_hubspot.export import DOWNLOAD_TIMEOUT, EXPORT_PATH, CrmExport, normalise_value
+from tap_hubspot.parsing import (
+    StreamingPage,
+    history_rows,
+    ijson_installed,
+    records_prefix,
+)
+from tap_hubspot.planning import VolumeEstimate
+from tap_hubspot.projection import Projection
+from tap_hubspot.properties import PropertyTable
+from tap_hubspot.ratelimit import PriorityRateLimiter, get_rate_limiter
+from tap_hubspot.retry import (
+    PARTITION_ERRORS,
+    failure_kind,
+    get_circuit_breaker,
+    retry_waits,
+)
+from tap_hubspot.shards import Shard, object_id_range
+from tap_hubspot.spool import Spool
 
 if t.TYPE_CHECKING:
+    from backoff.types import Details
     from singer_sdk.helpers.types import Context
     from singer_sdk.pagination import BaseAPIPaginator
+    from singer_sdk.singerlib import RecordMessage
 
 if sys.version_info < (3, 11):
     from backports.datetime_fromisoformat import MonkeyPatch
@@ -27,10 +72,134 @@ if sys.version_info < (3, 11):
 
 _Auth = t.Callable[[requests.PreparedRequest], requests.PreparedRequest]
 
+# Requests sessions, one per thread
+_sessions = threading.local()
+
+
+# Requests time out after this multiple of their endpoint's 99th percentile
+# latency, if `adaptive_timeouts` is enabled, but never sooner than this
+TIMEOUT_P99_FACTOR = 4
+MIN_TIMEOUT = 15
+
+# Hubspot wont return more than this many results for a single search
+SEARCH_RESULTS_LIMIT = 10000
+
+
+# Partition context keys of object ID ranges
+OBJECT_ID_GTE = "hs_object_id_gte"
+OBJECT_ID_LT = "hs_object_id_lt"
+OBJECT_ID_RANGE_KEYS = (OBJECT_ID_GTE, OBJECT_ID_LT)
+
+# Stream state key of the object ID range partitions an initial sync was split into
+OBJECT_ID_PARTITIONS = "object_id_partitions"
+
+# Stream state key of the partitions a sync deferred, synced first by the next one
+DEFERRED_PARTITIONS = "deferred_partitions"
+
+# Partitions fetched ahead of the one being read, across streams, per worker
+PREFETCHED_PARTITIONS_PER_WORKER = 2
+
+# Hubspot wont read more than this many objects by ID in a single request
+BATCH_READ_LIMIT = 100
+
+# Hubspot wont read the property history of more objects in a single request
+HISTORY_BATCH_READ_LIMIT = 50
+
+# Number of streamed records whose digests are looked up at once, as they are held
+# in memory until then
+DIGEST_LOOKUP_BATCH_SIZE = 50
+
+# Top-level fields of CRM object records, besides their `properties`
+OBJECT_RECORD_FIELDS = frozenset(("id", "createdAt", "updatedAt", "archived"))
+
+
+def _partition_key(context: Context | None) -> tuple:
+    return tuple(sorted((context or {}).items()))
+
+
+def _object_id_filters(lower: int | None, upper: int | None) -> list[dict]:
+    filters = []
+    if lower is not None:
+        filters.append(
+            {"propertyName": "hs_object_id", "operator": "GTE", "value": str(lower)},
+        )
+    if upper is not None:
+        filters.append(
+            {"propertyName": "hs_object_id", "operator": "LT", "value": str(upper)},
+        )
+    return filters
+
+
+class SearchPageToken(t.NamedTuple):
+    """Next page of a CRM search."""
+
+    # Paging cursor within the current search
+    after: str | None = None
+    # Value of the sort property to restart the search from, e.g. the replication
+    # key value overriding the bookmark
+    since: str | None = None
+
+
+class SearchTemplate:
+    """A search request body compiled once per partition.
+
+    Only the paging cursor and page size change from one page of a search to the
+    next, so everything else, including the often long property list, is encoded
+    up front.
+    """
+
+    def __init__(self, since: str | None, body: dict, properties: bytes) -> None:
+        """Compile a search request body.
+
+        Args:
+            since: The restart value the body was compiled for.
+            body: The fixed members of the body, e.g. filters and sorts.
+            properties: The JSON encoded property names to request.
+        """
+        self.since = since
+        self._members = json.dumps(body, separators=(",", ":"))[1:-1].encode()
+        self._properties = b'"properties":' + properties
+
+    def render(self, after: str | None, limit: int) -> bytes:
+        """Return the encoded request body of a page.
+
+        Args:
+            after: The paging cursor, if any.
+            limit: The page size.
+
+        Returns:
+            The JSON request body.
+        """
+        members = [self._members] if self._members else []
+        if after:
+            members.insert(0, b'"after":' + json.dumps(after).encode())
+        members.append(b'"limit":%d' % limit)
+        members.append(self._properties)
+        return b"{" + b",".join(members) + b"}"
+
 
 class HubspotStream(RESTStream):
     """tap-hubspot stream class."""
 
+    def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:  # noqa: D107
+        # Per-thread request state, as partitions may be fetched concurrently
+        self._local = threading.local()
+        self._authenticators: dict[str | None, _Auth] = {}
+        self._prefetcher: Prefetcher[dict] | None = None
+        # Records requested from the search endpoint so far, against the backlog
+        self._searched_records = 0
+        # Partitions that failed, left to be synced next time
+        self.deferred_partitions: list[Context | None] = []
+        super().__init__(*args, **kwargs)
+        if self.portals:
+            # Records of different portals may share IDs, so the portal becomes
+            # part of the primary key
+            if "portal_id" not in self.primary_keys:
+                self.primary_keys = ("portal_id", *self.primary_keys)
+            # Schemas built on demand are given the portal key as they are built
+            if isinstance(type(self).schema, dict):
+                self.schema = self._add_portal_key(self.schema)  # type: ignore[misc]
+
     @property
     def url_base(self) -> str:
         """Returns base url."""
@@ -41,90 +210,1490 @@ class HubspotStream(RESTStream):
     # Set this value or override `get_new_paginator`.
     next_page_token_jsonpath = "$.next_page"  # noqa: S105
 
+    # Page size used unless `adaptive_page_size` is enabled
+    default_page_size = 100
+    # Largest page size the endpoint accepts
+    max_page_size = 100
+    # Search endpoints accept larger pages than list endpoints
+    max_search_page_size = 200
+
+    # Path of the endpoint searching this stream's objects, if any
+    search_path: str | None = None
+
+    # Records buffered per partition fetched ahead of emission
+    prefetch_buffer_size = 1000
+    # Default size of the spool of each partition, if spooling is enabled
+    spool_max_bytes = 1024**3
+
+    # Estimated number of records to sync, when streams are scheduled by backlog
+    backlog: int | None = None
+
+    # Small reference streams, emitted as a diff against a snapshot of their last
+    # sync when `snapshot_diff` is enabled
+    snapshot_diff = False
+
+    # Portals
+
     @cached_property
+    def portals(self) -> dict[str, dict]:
+        """Return the configured portals' credentials, keyed by portal ID."""
+        return {
+            str(portal["portal_id"]): portal
+            for portal in self.config.get("portals") or []
+        }
+
+    def _add_portal_key(self, schema: dict) -> dict:
+        """Return the schema with the portal ID of records, if portals are set."""
+        if not self.portals or "portal_id" in schema["properties"]:
+            return schema
+        return {
+            **schema,
+            "properties": {
+                "portal_id": {"type": ["string"]},
+                **schema["properties"],
+            },
+        }
+
+    @property
+    def partitions(self) -> list[dict] | None:
+        """Return one partition per configured portal and object ID range.
+
+        Partitions the last sync deferred come first. Child streams are
+        partitioned by their parent's records instead, which carry the portal ID
+        along.
+        """
+        if self.parent_stream_type is not None:
+            return super().partitions
+
+        contexts = [{"portal_id": portal_id} for portal_id in self.portals]
+        partitions = contexts or super().partitions
+        if (
+            self._object_id_range_size
+            and self._get_search_path()
+            and self.resync_ids is None
+        ):
+            ranges = self._get_object_id_partitions(contexts or [{}])
+            if ranges is not None:
+                partitions = ranges
+        if not partitions:
+            return partitions
+        deferred = [p for p in self._last_deferred_partitions if p in partitions]
+        return [*deferred, *(p for p in partitions if p not in deferred)]
+
+    @cached_property
+    def _last_deferred_partitions(self) -> list[dict]:
+        # Read once, as partitions leave the state's list as they are synced
+        return list(self.stream_state.get(DEFERRED_PARTITIONS) or [])
+
+    def _get_credentials(self, portal_id: str | None) -> t.Mapping[str, t.Any]:
+        if portal_id is not None:
+            return self.portals[portal_id]
+        if self.portals and not (
+            "access_token" in self.config or "refresh_token" in self.config
+        ):
+            # Requests outside a portal partition, e.g. for property definitions,
+            # use the first portal
+            return next(iter(self.portals.values()))
+        return self.config
+
+    def _set_request_scope(self, context: Context | None, endpoint: str) -> None:
+        self._local.portal_id = (context or {}).get("portal_id")
+        self._local.endpoint = endpoint
+
+    # Page size
+
+    @cached_property
+    def _page_size_controllers(self) -> dict[str, PageSizeController]:
+        return {}
+
+    @property
+    def _endpoint(self) -> str:
+        """Path of the endpoint requested last on this thread."""
+        return getattr(self._local, "endpoint", None) or self.path
+
+    def _max_page_size(self) -> int:
+        if self._endpoint == self._get_search_path():
+            return self.max_search_page_size
+        return self.max_page_size
+
+    def _get_page_size_controller(self) -> PageSizeController | None:
+        if not self.config.get("adaptive_page_size"):
+            return None
+
+        # Keyed by path, as streams may switch between list and search endpoints
+        endpoint = self._endpoint
+        controller = self._page_size_controllers.get(endpoint)
+        if controller is None:
+            controller = self._page_size_controllers.setdefault(
+                endpoint,
+                PageSizeController(self.default_page_size, self._max_page_size()),
+            )
+        return controller
+
+    @property
+    def page_size(self) -> int:
+        """Return the number of records to request per page."""
+        if controller := self._get_page_size_controller():
+            return controller.page_size
+        return self.default_page_size
+
+    def validate_response(self, response: requests.Response) -> None:  # noqa: D102
+        if controller := self._get_page_size_controller():
+            if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                controller.penalise()
+            elif response.ok:
+                controller.observe(
+                    response.elapsed.total_seconds(),
+                    self._response_size(response),
+                    controller.page_size,
+                )
+        if response.ok and (tracker := self._get_latency_tracker()):
+            tracker.observe(response.elapsed.total_seconds())
+        super().validate_response(response)
+
+    def backoff_wait_generator(self) -> t.Generator[float, None, None]:  # noqa: D102
+        return retry_waits()
+
+    def backoff_jitter(self, value: float) -> float:  # noqa: D102
+        # Waits are jittered by the wait generator already, and those asked for by
+        # the server must not be cut short
+        return value
+
+    def backoff_handler(self, details: Details) -> None:  # noqa: D102
+        if isinstance(details.get("exception"), requests.exceptions.Timeout):
+            if controller := self._get_page_size_controller():
+                controller.penalise()
+            # Timeouts lengthen the timeout, or it could never grow past them
+            if tracker := self._get_latency_tracker():
+                tracker.observe(self.timeout)
+        super().backoff_handler(details)
+
+    # Latency
+
+    @cached_property
+    def _latency_trackers(self) -> dict[str, LatencyTracker]:
+        return {}
+
+    @cached_property
+    def _adaptive_timeouts(self) -> bool:
+        return bool(self.config.get("adaptive_timeouts"))
+
+    @cached_property
+    def _hedge_requests(self) -> bool:
+        # A duplicate would be served the next captured response to the request
+        return bool(self.config.get("hedge_requests")) and not self.config.get(
+            "replay_path",
+        )
+
+    def _get_latency_tracker(self) -> LatencyTracker | None:
+        if not self._adaptive_timeouts and not self._hedge_requests:
+            return None
+
+        endpoint = self._endpoint
+        tracker = self._latency_trackers.get(endpoint)
+        if tracker is None:
+            tracker = self._latency_trackers.setdefault(endpoint, LatencyTracker())
+        return tracker
+
+    @property
+    def timeout(self) -> int:
+        """Return the request timeout of the endpoint being requested, in seconds.
+
+        With `adaptive_timeouts`, requests time out after a multiple of the 99th
+        percentile of the endpoint's recent latencies.
+        """
+        timeout = super().timeout
+        if not self._adaptive_timeouts:
+            return timeout
+        tracker = t.cast("LatencyTracker", self._get_latency_tracker())
+        p99 = tracker.percentile(0.99)
+        if p99 is None:
+            return timeout
+        return min(max(math.ceil(p99 * TIMEOUT_P99_FACTOR), MIN_TIMEOUT), timeout)
+
+    # Hedged requests
+
+    def _get_hedge_delay(
+        self,
+        prepared_request: requests.PreparedRequest,
+    ) -> float | None:
+        """Return how long to wait for a response before hedging a request.
+
+        Only list and search pages are hedged, as they are safe to send twice.
+
+        Args:
+            prepared_request: The request to send.
+
+        Returns:
+            The 95th percentile of the endpoint's recent latencies, or None if the
+            request is not to be hedged.
+        """
+        if not self._hedge_requests or not (
+            prepared_request.method == "GET"
+            or (prepared_request.path_url or "").endswith("/search")
+        ):
+            return None
+        tracker = t.cast("LatencyTracker", self._get_latency_tracker())
+        return tracker.percentile(0.95)
+
+    def _acquire_hedge(
+        self,
+        prepared_request: requests.PreparedRequest,
+        context: Context | None,
+    ) -> bool:
+        # Hedges only take tokens nobody is waiting for, so they never hold up
+        # other requests or exceed the rate limits
+        portal_id = (context or {}).get("portal_id", "")
+        search_rate = self.config.get("search_requests_per_second")
+        if (
+            search_rate
+            and (prepared_request.path_url or "").endswith("/search")
+            and not get_rate_limiter(
+                f"search:{portal_id}",
+                search_rate,
+                PriorityRateLimiter,
+            ).try_acquire()
+        ):
+            return False
+        rate = self.config.get("max_requests_per_second")
+        return not rate or get_rate_limiter(f"portal:{portal_id}", rate).try_acquire()
+
+    def _send_hedged(
+        self,
+        prepared_request: requests.PreparedRequest,
+        context: Context | None,
+        delay: float,
+    ) -> requests.Response:
+        """Send a request, and a duplicate of it if no response came within `delay`.
+
+        The first successful response wins. The other request is left to finish
+        on its worker, and its response is closed unread.
+
+        Args:
+            prepared_request: The request to send.
+            context: Stream partition or context dictionary.
+            delay: Seconds to wait for a response before hedging.
+
+        Returns:
+            The first successful response.
+        """
+        # Requests are sent on workers, so this thread is free to hedge; each
+        # request takes one worker, and no job waits on another
+        race: Race[requests.Response] = Race(
+            get_worker_pool(2 * self._max_workers, "hedges"),
+            requests.Response.close,
+        )
+        send = partial(
+            self._send_on_worker,
+            timeout=self.timeout,
+            allow_redirects=self.allow_redirects,
+        )
+        race.submit(partial(send, prepared_request))
+        try:
+            response = race.result(delay)
+        except TimeoutError:
+            if self._acquire_hedge(prepared_request, context):
+                self.logger.debug("Hedging request to %s", prepared_request.path_url)
+                race.submit(partial(send, prepared_request.copy()))
+            response = race.result()
+        # Only the response used is captured, not that of a duplicate
+        capture(response)
+        return response
+
+    def _send_on_worker(
+        self,
+        prepared_request: requests.PreparedRequest,
+        *,
+        timeout: float,
+        allow_redirects: bool,
+    ) -> requests.Response:
+        # The worker's own session, as sessions are never shared between threads
+        with deferred_capture():
+            return self.requests_session.send(
+                prepared_request,
+                timeout=timeout,
+                allow_redirects=allow_redirects,
+            )
+
+    def _request(
+        self,
+        prepared_request: requests.PreparedRequest,
+        context: Context | None,
+    ) -> requests.Response:
+        delay = self._get_hedge_delay(prepared_request)
+        if delay is None:
+            return super()._request(prepared_request, context)
+
+        response = self._send_hedged(prepared_request, context, delay)
+        self._write_request_duration_log(
+            endpoint=self.path,
+            response=response,
+            context=context,
+            extra_tags=(
+                {"url": prepared_request.path_url}
+                if self._LOG_REQUEST_METRIC_URLS
+                else None
+            ),
+        )
+        self.validate_response(response)
+        return response
+
+    # Requests
+
+    @property
     def authenticator(self) -> _Auth:
-        """Return a new authenticator object.
+        """Return the authenticator for the portal being requested.
 
         Returns:
             An authenticator instance.
         """
-        if "refresh_token" in self.config:
-            return HubSpotOAuthAuthenticator(
+        portal_id = getattr(self._local, "portal_id", None)
+        authenticator = self._authenticators.get(portal_id)
+        if authenticator is None:
+            authenticator = self._authenticators.setdefault(
+                portal_id,
+                self._create_authenticator(self._get_credentials(portal_id)),
+            )
+        return authenticator
+
+    def _create_authenticator(self, credentials: t.Mapping[str, t.Any]) -> _Auth:
+        if "refresh_token" in credentials:
+            return HubSpotOAuthAuthenticator.for_credentials(
                 self,
+                credentials,
                 auth_endpoint="https://api.hubapi.com/oauth/v1/token",
+                # Token requests are captured and replayed with the others
+                session=self._create_session(),
             )
         return BearerTokenAuthenticator(
             self,
-            token=self.config.get("access_token"),  # type: ignore[arg-type]
+            token=credentials.get("access_token"),  # type: ignore[arg-type]
+        )
+
+    @property
+    def requests_session(self) -> requests.Session:
+        """Return the requests session of the current thread.
+
+        Sessions are shared by all streams on a thread, so connections to the API
+        are pooled across streams while worker threads never share a session.
+        """
+        sessions: dict[str, requests.Session] | None = getattr(
+            _sessions,
+            "sessions",
+            None,
+        )
+        if sessions is None:
+            sessions = _sessions.sessions = {}
+        # Sessions capturing or replaying traffic are kept apart from the others
+        key = self._transport_key
+        session = sessions.get(key)
+        if session is None:
+            session = sessions[key] = self._create_session()
+        # Stream response bodies if enabled
+        session.stream = self._stream_responses
+        return session
+
+    @cached_property
+    def _transport_key(self) -> str:
+        if path := self.config.get("replay_path"):
+            return f"replay:{path}"
+        if path := self.config.get("capture_path"):
+            return f"capture:{path}"
+        return ""
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        if path := self.config.get("replay_path"):
+            replay = ReplayAdapter(
+                get_cassette(path),
+                float(self.config.get("replay_latency_factor") or 0),
+            )
+            session.mount("https://", replay)
+            session.mount("http://", replay)
+        elif path := self.config.get("capture_path"):
+            session.mount("https://", CaptureAdapter(get_cassette(path)))
+        return session
+
+    @cached_property
+    def _stream_responses(self) -> bool:
+        if not self.config.get("stream_responses"):
+            return False
+        if not ijson_installed():
+            self.logger.warning(
+                "Responses of stream '%s' are decoded whole, as streaming them "
+                "requires the 'ijson' package of the 'streaming' extra",
+                self.name,
+            )
+            return False
+        return True
+
+    def _response_size(self, response: requests.Response) -> int:
+        # Reading a streamed body here would defeat incremental parsing
+        if self._stream_responses:
+            return int(response.headers.get("Content-Length", 0))
+        return len(response.content)
+
+    def request_decorator(self, func: t.Callable) -> t.Callable:
+        """Guard endpoints and rate limit requests per portal, within the retries.
+
+        Args:
+            func: Function to decorate.
+
+        Returns:
+            A decorated method.
+        """
+        rate = self.config.get("max_requests_per_second")
+        search_rate = self.config.get("search_requests_per_second")
+        threshold = int(self.config.get("circuit_breaker_threshold", 10))
+        cooldown = float(self.config.get("circuit_breaker_cooldown", 60))
+        if not rate and not search_rate and not threshold:
+            return super().request_decorator(func)
+
+        def throttled(
+            prepared_request: requests.PreparedRequest,
+            context: Context | None,
+        ) -> requests.Response:
+            portal_id = (context or {}).get("portal_id", "")
+            breaker = None
+            if threshold:
+                breaker = get_circuit_breaker(
+                    f"{portal_id}:{self._endpoint}",
+                    threshold,
+                    cooldown,
+                )
+                breaker.check()
+            if search_rate and prepared_request.path_url.endswith("/search"):
+                get_rate_limiter(
+                    f"search:{portal_id}",
+                    search_rate,
+                    PriorityRateLimiter,
+                ).acquire(weight=self._search_weight())
+            if rate:
+                get_rate_limiter(f"portal:{portal_id}", rate).acquire()
+            if breaker is None:
+                return func(prepared_request, context)
+
+            try:
+                response = func(prepared_request, context)
+            except Exception as e:
+                # Throttled requests reached an endpoint that is up
+                if isinstance(e, PARTITION_ERRORS) and failure_kind(e) != "throttled":
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                raise
+            breaker.record_success()
+            return response
+
+        return super().request_decorator(throttled)
+
+    @cached_property
+    def priority(self) -> float:
+        """Return the configured priority of the stream's searches."""
+        return float((self.config.get("stream_priorities") or {}).get(self.name, 1))
+
+    def _search_weight(self) -> float:
+        # Streams with the most left to sync search first, so they finish in time
+        if self.backlog is None:
+            return 0
+        return self.priority * max(self.backlog - self._searched_records, 0)
+
+    def prepare_request(  # noqa: D102
+        self,
+        context: Context | None,
+        next_page_token: t.Any,  # noqa: ANN401
+    ) -> requests.PreparedRequest:
+        template = self._get_search_template(context, next_page_token)
+        if template is None:
+            self._set_request_scope(context, self.path)
+            return super().prepare_request(context, next_page_token)
+
+        # Search endpoints use POST request
+        search_path = t.cast("str", self._get_search_path())
+        self._set_request_scope(context, search_path)
+        self._searched_records += self.page_size
+        return self.build_prepared_request(
+            method="POST",
+            url=self.url_base + search_path,
+            headers={**self.http_headers, "Content-Type": "application/json"},
+            data=template.render(
+                next_page_token.after if next_page_token else None,
+                self.page_size,
+            ),
+            auth=self.authenticator,
+        )
+
+    # Concurrent partitions
+
+    @cached_property
+    def _max_workers(self) -> int:
+        return int(self.config.get("max_workers") or 1)
+
+    def get_records(self, context: Context | None) -> t.Iterable[dict[str, t.Any]]:
+        """Return records of a partition.
+
+        With `max_workers` above one, the remaining partitions are fetched in the
+        background once the first one is requested. Records are still emitted
+        one partition at a time, in order.
+
+        Args:
+            context: Stream partition or context dictionary.
+
+        Yields:
+            One item per record.
+        """
+        check_shards = getattr(self._tap, "check_shards", None)
+        if check_shards is not None:
+            check_shards()
+        try:
+            yield from self._get_retried_records(context)
+        except BaseException:
+            # Stop fetching partitions that will no longer be read
+            if self._prefetcher is not None:
+                self._prefetcher.cancel()
+            raise
+
+    @cached_property
+    def _partition_retries(self) -> int:
+        return int(self.config.get("partition_retries", 1))
+
+    @cached_property
+    def _defer_failed_partitions(self) -> bool:
+        return bool(self.config.get("defer_failed_partitions"))
+
+    def _get_retried_records(self, context: Context | None) -> t.Iterable[dict]:
+        """Return the records of a partition, retrying it if its requests gave up.
+
+        A partition that still fails is either deferred to the next sync, with
+        its state left as it was, or fails the sync.
+
+        Args:
+            context: Stream partition or context dictionary.
+
+        Yields:
+            One item per record.
+
+        Raises:
+            CircuitOpenError: If the partition failed and is not deferred.
+            RetriableAPIError: If the partition failed and is not deferred.
+        """
+        state = self.get_context_state(context)
+        initial_state = copy.deepcopy(state) if self._defer_failed_partitions else None
+        waits = retry_waits()
+        next(waits)
+        failures = 0
+        while True:
+            records = self._get_partition_records(context)
+            if self._use_snapshot:
+                records = self._diff_snapshot(context, records)
+            try:
+                yield from records
+            except PARTITION_ERRORS as e:
+                # An open circuit counts as a failure too, so a partition of an
+                # endpoint that never recovers fails rather than waiting forever
+                failures += 1
+                if failures <= self._partition_retries:
+                    wait = waits.send(e)
+                    self.logger.warning(
+                        "Retrying partition %s of stream '%s' in %0.1f seconds "
+                        "after: %s",
+                        context,
+                        self.name,
+                        wait,
+                        e,
+                    )
+                    time.sleep(wait)
+                    continue
+                if initial_state is None:
+                    raise
+                # Nothing the partition emitted counts towards its bookmarks
+                state.clear()
+                state.update(initial_state)
+                self.deferred_partitions.append(context)
+                self._set_deferred(context, deferred=True)
+                self.logger.error(  # noqa: TRY400
+                    "Deferred partition %s of stream '%s' to the next sync after: %s",
+                    context,
+                    self.name,
+                    e,
+                )
+            else:
+                self._set_deferred(context, deferred=False)
+            return
+
+    def _set_deferred(self, context: Context | None, *, deferred: bool) -> None:
+        """Record in state whether a partition is left to the next sync."""
+        if context is None:
+            return
+        partitions = [
+            p for p in self.stream_state.get(DEFERRED_PARTITIONS) or [] if p != context
+        ]
+        if deferred:
+            partitions.append(dict(context))
+        if partitions:
+            self.stream_state[DEFERRED_PARTITIONS] = partitions
+        else:
+            self.stream_state.pop(DEFERRED_PARTITIONS, None)
+
+    def _get_partition_records(self, context: Context | None) -> t.Iterable[dict]:
+        key = (self.name, _partition_key(context))
+        prefetcher = self._prefetcher
+        if prefetcher is not None and key in prefetcher:
+            yield from prefetcher.take(key)
+            return
+
+        # Streams without partitions are synced as a single one
+        partitions: list[dict | None] = [None]
+        if self.partitions:
+            partitions = [*self.partitions]
+        if (
+            self._max_workers > 1
+            and prefetcher is None
+            and self.parent_stream_type is None
+            and context == partitions[0]
+        ):
+            self._prefetch_ahead(partitions[1:])
+
+        yield from self._fetch_spooled(context)
+
+    # Snapshot diffs
+
+    @cached_property
+    def _use_snapshot(self) -> bool:
+        return self.snapshot_diff and bool(self.config.get("snapshot_diff"))
+
+    @cached_property
+    def _snapshot_schema_digest(self) -> str:
+        # Records are emitted afresh if what is emitted of them may have changed
+        deselected = sorted(
+            str(breadcrumb) for breadcrumb, on in self.mask.items() if not on
+        )
+        return record_digest({"schema": self.schema, "deselected": deselected}).hex()
+
+    def _diff_snapshot(
+        self,
+        context: Context | None,
+        records: t.Iterable[dict],
+    ) -> t.Iterable[dict]:
+        """Yield only records that changed since the snapshot of the last sync.
+
+        The snapshot, a short hash of each record by primary key, is kept in the
+        partition's state and replaced once all records have been read.
+        """
+        state = self.get_context_state(context)
+        snapshot = state.get("snapshot") or {}
+        previous = snapshot.get("records") or {}
+        if snapshot.get("schema") != self._snapshot_schema_digest:
+            previous = {}
+
+        hashes: dict[str, str] = {}
+        changed = 0
+        for record in records:
+            key = "/".join(str(record.get(k)) for k in self.primary_keys)
+            hashes[key] = record_digest(record).hex()[:16]
+            if previous.get(key) != hashes[key]:
+                changed += 1
+                yield record
+
+        if changed or hashes.keys() != previous.keys():
+            self.logger.info(
+                "%d of %d records of stream '%s' changed since the last sync",
+                changed,
+                len(hashes),
+                self.name,
+            )
+        else:
+            self.logger.info(
+                "Skipped stream '%s', unchanged since the last sync",
+                self.name,
+            )
+        state["snapshot"] = {
+            "schema": self._snapshot_schema_digest,
+            "records": hashes,
+        }
+
+    def prefetch(
+        self,
+        partitions: t.Sequence[dict | None],
+        prefetcher: Prefetcher[dict] | None = None,
+    ) -> None:
+        """Start fetching partitions in the background.
+
+        Partitions must later be read in the order they are submitted in, so the
+        worker pool always gets round to the one being read.
+
+        Args:
+            partitions: The partitions to fetch.
+            prefetcher: A prefetcher shared with other streams, if any.
+        """
+        if prefetcher is None:
+            prefetcher = self._create_prefetcher()
+        self._prefetcher = prefetcher
+        for partition in partitions:
+            # State must be initialised on the main thread, as the SDK does for
+            # each partition before requesting its records
+            self._write_starting_replication_value(partition)
+            prefetcher.submit(
+                (self.name, _partition_key(partition)),
+                partial(self._fetch_spooled, partition),
+            )
+
+    def _create_prefetcher(self) -> Prefetcher[dict]:
+        return Prefetcher(
+            get_worker_pool(self._max_workers),
+            self.prefetch_buffer_size,
+            # Partitions fetched ahead each hold a buffer until they are read
+            PREFETCHED_PARTITIONS_PER_WORKER * self._max_workers,
+        )
+
+    def _prefetch_ahead(self, partitions: t.Sequence[dict | None]) -> None:
+        """Fetch the partitions after the one being read, and the streams after it.
+
+        Streams scheduled by backlog after this one are fetched ahead as well,
+        in the order they are synced.
+
+        Args:
+            partitions: The partitions of this stream after the one being read.
+        """
+        schedule: list[HubspotStream] = getattr(self._tap, "schedule", [])
+        if self not in schedule:
+            if partitions:
+                self.prefetch(partitions)
+            return
+
+        prefetcher = self._create_prefetcher()
+        self.prefetch(partitions, prefetcher)
+        for stream in schedule[schedule.index(self) + 1 :]:
+            # Streams without partitions are synced as a single one
+            stream_partitions = stream.partitions
+            stream.prefetch(
+                [None] if stream_partitions is None else stream_partitions,
+                prefetcher,
+            )
+
+    def _fetch_spooled(self, context: Context | None) -> t.Iterable[dict]:
+        """Fetch the records of a partition through a spool on disk, if enabled.
+
+        Records are then fetched on a thread of their own, which carries on at
+        full speed while emission is held up by a slow target, until the spool
+        is full.
+
+        Args:
+            context: Stream partition or context dictionary.
+
+        Returns:
+            The records of the partition.
+        """
+        spool_path = self.config.get("spool_path")
+        if not spool_path:
+            return self._fetch_records(context)
+
+        # Each partition has a directory of its own, to replay after a crash
+        partition_id = hashlib.sha256(
+            json.dumps(_partition_key(context)).encode(),
+        ).hexdigest()[:16]
+        spool = Spool(
+            Path(spool_path) / self.name / partition_id,
+            int(self.config.get("spool_max_bytes") or self.spool_max_bytes),
         )
 
+        def fill() -> None:
+            try:
+                for record in self._fetch_records(context):
+                    if not spool.put(record):
+                        return
+            except BaseException as e:  # noqa: BLE001
+                spool.close(e)
+            else:
+                spool.close()
+
+        threading.Thread(
+            target=fill,
+            name=f"tap-hubspot-spool-{self.name}",
+            daemon=True,
+        ).start()
+        return spool.records()
+
+    def _fetch_records(self, context: Context | None) -> t.Iterable[dict]:
+        """Request the records of a partition, possibly on a worker thread."""
+        if self.resync_ids is not None:
+            return self._get_resync_records(context)
+        return self.request_records(context)
+
     @property
     def http_headers(self) -> dict:
         """Return the http headers needed.
 
-        Returns:
-            A dictionary of HTTP headers.
+        Returns:
+            A dictionary of HTTP headers.
+        """
+        headers = {}
+        if "user_agent" in self.config:
+            headers["User-Agent"] = self.config.get("user_agent")
+        return headers
+
+    def get_new_paginator(self) -> BaseAPIPaginator:
+        """Create a new pagination helper instance.
+
+        If the source API can make use of the `next_page_token_jsonpath`
+        attribute, or it contains a `X-Next-Page` header in the response
+        then you can remove this method.
+
+        If you need custom pagination that uses page numbers, "next" links, or
+        other approaches, please read the guide: https://sdk.meltano.com/en/v0.25.0/guides/pagination-classes.html.
+
+        Returns:
+            A pagination helper instance.
+        """
+        return super().get_new_paginator()
+
+    def get_next_page_token(
+        self,
+        response: requests.Response,
+        previous_token: t.Any,  # noqa: ANN401
+    ) -> t.Any:  # noqa: ANN401
+        """Return a token for identifying next page or None if no more pages."""
+        next_page_token = self._get_next_after(response)
+        if response.request.method != "POST" or next_page_token is None:
+            return next_page_token
+
+        since = previous_token.since if previous_token else None
+        if int(next_page_token) + self.page_size < SEARCH_RESULTS_LIMIT:
+            return SearchPageToken(after=str(next_page_token), since=since)
+
+        # Hubspot wont return more than 10k records for a search, so restart it
+        # from the last record seen rather than paging further
+        last_record = self._get_last_record(response)
+        restart_value = self._get_restart_value(last_record) if last_record else None
+        if restart_value is None or restart_value == since:
+            # Records past the limit could only be missed, so the sync fails
+            msg = (
+                f"Too many objects of stream '{self.name}' share the value "
+                f"{restart_value} of '{self._get_search_sort_property()}' to search "
+                "for"
+            )
+            raise FatalAPIError(msg)
+        return SearchPageToken(since=restart_value)
+
+    def _get_next_after(self, response: requests.Response) -> str | None:
+        if (page := self._get_streamed_page(response)) is not None:
+            return page.next_after
+
+        # If pagination is required, return a token which can be used to get the
+        #       next page. If this is the final page, return "None" to end the
+        #       pagination loop.
+        resp_json = response.json()
+        paging = resp_json.get("paging")
+
+        if paging is not None:
+            next_page_token = resp_json.get("paging", {}).get("next", {}).get("after")
+        else:
+            next_page_token = None
+        return next_page_token
+
+    def _get_last_record(self, response: requests.Response) -> dict | None:
+        if (page := self._get_streamed_page(response)) is not None:
+            return page.last_record
+        results = response.json().get("results")
+        return results[-1] if results else None
+
+    def parse_response(self, response: requests.Response) -> t.Iterable[dict]:
+        """Parse the response and return an iterator of result records.
+
+        With `stream_responses` enabled, records are decoded as the body is read
+        instead of after the whole page has been loaded.
+
+        Args:
+            response: A raw :class:`requests.Response`
+
+        Returns:
+            An iterator over the records in the response.
+        """
+        if self._stream_responses and (prefix := records_prefix(self.records_jsonpath)):
+            page = StreamingPage(response, prefix)
+            self._local.streamed_page = (response, page)
+            return iter(page)
+        return super().parse_response(response)
+
+    def _get_streamed_page(self, response: requests.Response) -> StreamingPage | None:
+        streamed: tuple[requests.Response, StreamingPage] | None = getattr(
+            self._local,
+            "streamed_page",
+            None,
+        )
+        if streamed is not None and streamed[0] is response:
+            return streamed[1]
+        return None
+
+    def get_url_params(
+        self,
+        context: Context | None,  # noqa: ARG002
+        next_page_token: int | None,
+    ) -> dict[str, t.Any]:
+        """Return a dictionary of values to be used in URL parameterization.
+
+        Args:
+            context: The stream context.
+            next_page_token: The next page index or value.
+
+        Returns:
+            A dictionary of URL query parameters.
+        """
+        params: dict = {}
+        params["limit"] = self.page_size
+        if next_page_token:
+            params["after"] = next_page_token
+        if self.replication_key:
+            params["sort"] = "asc"
+            params["order_by"] = self.replication_key
+        return params
+
+    # Search
+
+    def _get_search_path(self) -> str | None:
+        return self.search_path
+
+    def _get_search_sort_property(self) -> str:
+        return "hs_object_id"
+
+    def _get_search_properties(self) -> list[str]:
+        # Properties requested by default from list endpoints are not all returned
+        # by search endpoints, so ask for those in the schema explicitly
+        properties = self.schema["properties"].get("properties", {})
+        return list(properties.get("properties", {}))
+
+    def _is_search(self, context: Context | None) -> bool:
+        # Object ID ranges can only be requested from search endpoints
+        return bool(self._get_search_path() and OBJECT_ID_GTE in (context or {}))
+
+    @cached_property
+    def _search_templates(self) -> dict[tuple, SearchTemplate | None]:
+        return {}
+
+    @cached_property
+    def _search_properties_json(self) -> bytes:
+        return json.dumps(self._get_search_properties()).encode()
+
+    def _get_search_template(
+        self,
+        context: Context | None,
+        next_page_token: SearchPageToken | str | None,
+    ) -> SearchTemplate | None:
+        """Return the compiled search request of a partition.
+
+        Whether a partition is searched is decided on its first page, and holds
+        for the pages after it.
+
+        Args:
+            context: Stream partition or context dictionary.
+            next_page_token: The next page of the search, if not the first.
+
+        Returns:
+            The search request template, or None if the partition is listed
+            rather than searched.
+        """
+        key = _partition_key(context)
+        # List endpoints page by a plain cursor
+        since = (
+            next_page_token.since
+            if isinstance(next_page_token, SearchPageToken)
+            else None
+        )
+        if next_page_token is None or key not in self._search_templates:
+            self._search_templates[key] = (
+                self._compile_search_template(context, since)
+                if self._is_search(context)
+                else None
+            )
+
+        template = self._search_templates[key]
+        if template is not None and template.since != since:
+            # The search restarted past the result limit
+            template = self._compile_search_template(context, since)
+            self._search_templates[key] = template
+        return template
+
+    def _compile_search_template(
+        self,
+        context: Context | None,
+        since: str | None,
+    ) -> SearchTemplate:
+        # https://developers.hubspot.com/docs/api/crm/search
+        body: dict[str, t.Any] = {}
+        if filters := self._get_search_filters(context, since):
+            body["filterGroups"] = [{"filters": filters}]
+        body["sorts"] = [
+            {
+                # This is inside the properties object
+                "propertyName": self._get_search_sort_property(),
+                "direction": "ASCENDING",
+            },
+        ]
+        # The limit, of at most 200 per request, is set per page
+        return SearchTemplate(since, body, self._search_properties_json)
+
+    def _get_search_filters(
+        self,
+        context: Context | None,
+        since: str | None,
+    ) -> list[dict]:
+        lower, upper = self._get_object_id_range(context)
+        if since is not None:
+            # Results are sorted by object ID, so restart past the last one
+            lower = max(lower or 0, int(since))
+        return _object_id_filters(lower, upper)
+
+    def _get_restart_value(self, record: dict) -> str | None:
+        return str(int(record["id"]) + 1)
+
+    def _search(self, context: Context | None, body: dict) -> dict:
+        """Send a single search request outside of pagination.
+
+        Args:
+            context: Stream partition or context dictionary.
+            body: The search request body.
+
+        Returns:
+            The decoded response.
+        """
+        search_path = t.cast("str", self._get_search_path())
+        # Kept apart from paginated searches, so as not to skew their page size
+        return self._call_api(
+            context,
+            "POST",
+            search_path,
+            body,
+            endpoint=f"{search_path}#single",
+        )
+
+    def _call_api(
+        self,
+        context: Context | None,
+        method: str,
+        path: str,
+        body: dict | None = None,
+        *,
+        endpoint: str | None = None,
+    ) -> dict:
+        """Send a single API request outside of pagination.
+
+        Args:
+            context: Stream partition or context dictionary.
+            method: The HTTP method.
+            path: The path, relative to the stream's URL base.
+            body: The JSON request body, if any.
+            endpoint: The endpoint to account the request to, by default `path`.
+
+        Returns:
+            The decoded response.
+        """
+        return self._send_api(context, method, path, body, endpoint=endpoint).json()
+
+    def _send_api(
+        self,
+        context: Context | None,
+        method: str,
+        path: str,
+        body: dict | None = None,
+        *,
+        endpoint: str | None = None,
+    ) -> requests.Response:
+        previous_endpoint = getattr(self._local, "endpoint", None)
+        self._set_request_scope(context, endpoint or path)
+        try:
+            request = self.build_prepared_request(
+                method=method,
+                url=self.url_base + path,
+                headers=self.http_headers,
+                json=body,
+                auth=self.authenticator,
+            )
+            return self.request_decorator(self._request)(request, context)
+        finally:
+            self._local.endpoint = previous_endpoint
+
+    def _download(self, context: Context | None, url: str) -> requests.Response:
+        """Request a file by URL, with the stream's session and request guards.
+
+        Args:
+            context: Stream partition or context dictionary.
+            url: Pre-signed URL of the file, sent without API credentials.
+
+        Returns:
+            The response, whose body is streamed.
+        """
+        previous_endpoint = getattr(self._local, "endpoint", None)
+        self._set_request_scope(context, f"{EXPORT_PATH}#download")
+        try:
+            # Not prepared by the session, which would add the API credentials
+            request = requests.Request(method="GET", url=url).prepare()
+            return self.request_decorator(self._send_download)(request, context)
+        finally:
+            self._local.endpoint = previous_endpoint
+
+    def _send_download(
+        self,
+        prepared_request: requests.PreparedRequest,
+        context: Context | None,  # noqa: ARG002
+    ) -> requests.Response:
+        response = self.requests_session.send(
+            prepared_request,
+            stream=True,
+            timeout=DOWNLOAD_TIMEOUT,
+        )
+        # Files are not pages, whose size the page size controllers would track
+        RESTStream.validate_response(self, response)
+        return response
+
+    # Batch reads
+
+    def _batch_read(
+        self,
+        context: Context | None,
+        ids: t.Sequence[str],
+    ) -> t.Iterator[dict]:
+        """Fetch objects by ID.
+
+        With `max_workers` above one, batches are read concurrently, while
+        records are still yielded in the order of `ids`.
+
+        Args:
+            context: Stream partition or context dictionary.
+            ids: Object IDs.
+
+        Yields:
+            One item per object found.
+        """
+        batches = [
+            ids[i : i + BATCH_READ_LIMIT] for i in range(0, len(ids), BATCH_READ_LIMIT)
+        ]
+        if self._max_workers == 1 or len(batches) == 1:
+            for batch in batches:
+                yield from self._read_batch(context, batch)
+            return
+
+        # Partition workers wait on batches, so these run in a pool of their own;
+        # each worker holds on to at most one batch the consumer has yet to read
+        prefetcher: Prefetcher[list[dict]] = Prefetcher(
+            get_worker_pool(self._max_workers, "batches"),
+            1,
+        )
+
+        def read(batch: t.Sequence[str]) -> list[list[dict]]:
+            return [self._read_batch(context, batch)]
+
+        try:
+            for index, batch in enumerate(batches):
+                prefetcher.submit(index, partial(read, batch))
+            for index in range(len(batches)):
+                for records in prefetcher.take(index):
+                    yield from records
+        finally:
+            prefetcher.cancel()
+
+    def _read_batch(self, context: Context | None, ids: t.Sequence[str]) -> list[dict]:
+        body = {
+            "properties": self._get_search_properties(),
+            "inputs": [{"id": id_} for id_ in ids],
+        }
+        response = self._call_api(context, "POST", f"{self.path}/batch/read", body)
+        return response.get("results") or []
+
+    # Targeted re-syncs
+
+    @cached_property
+    def resync_ids(self) -> list[str] | None:
+        """Return the IDs of the records to re-sync, if any are configured.
+
+        IDs are given inline, or as the path of a file with one ID per line.
         """
-        headers = {}
-        if "user_agent" in self.config:
-            headers["User-Agent"] = self.config.get("user_agent")
-        return headers
-
-    def get_new_paginator(self) -> BaseAPIPaginator:
-        """Create a new pagination helper instance.
+        value = (self.config.get("resync_ids") or {}).get(self.name)
+        # Property streams share the name of their object type
+        if value is None or not self.path.startswith("/objects/"):
+            return None
+        if isinstance(value, str):
+            value = Path(value).read_text(encoding="utf-8").split()
+        return list(dict.fromkeys(str(id_).strip() for id_ in value))
 
-        If the source API can make use of the `next_page_token_jsonpath`
-        attribute, or it contains a `X-Next-Page` header in the response
-        then you can remove this method.
+    def _get_resync_records(self, context: Context | None) -> t.Iterator[dict]:
+        """Fetch the records to re-sync, and report those that were not found.
 
-        If you need custom pagination that uses page numbers, "next" links, or
-        other approaches, please read the guide: https://sdk.meltano.com/en/v0.25.0/guides/pagination-classes.html.
+        Args:
+            context: Stream partition or context dictionary.
 
-        Returns:
-            A pagination helper instance.
+        Yields:
+            One item per record found.
         """
-        return super().get_new_paginator()
+        ids = t.cast("list[str]", self.resync_ids)
+        self.logger.info("Re-syncing %d records of stream '%s'", len(ids), self.name)
+        found = set()
+        for record in self._batch_read(context, ids):
+            found.add(str(record.get("id")))
+            yield record
+
+        if missing := [id_ for id_ in ids if id_ not in found]:
+            self.logger.warning(
+                "%d of %d records of stream '%s' to re-sync were not found: %s",
+                len(missing),
+                len(ids),
+                self.name,
+                ", ".join(missing),
+            )
 
-    def get_next_page_token(
+    def _increment_stream_state(
         self,
-        response: requests.Response,
-        previous_token: int | None,  # noqa: ARG002
-    ) -> int | None:
-        """Return a token for identifying next page or None if no more pages."""
-        # If pagination is required, return a token which can be used to get the
-        #       next page. If this is the final page, return "None" to end the
-        #       pagination loop.
-        resp_json = response.json()
-        paging = resp_json.get("paging")
+        latest_record: dict[str, t.Any],
+        *,
+        context: Context | None = None,
+    ) -> None:
+        # Re-syncing a few records says nothing about how far the stream got
+        if self.resync_ids is None:
+            super()._increment_stream_state(latest_record, context=context)
 
-        if paging is not None:
-            next_page_token = resp_json.get("paging", {}).get("next", {}).get("after")
-        else:
-            next_page_token = None
-        return next_page_token
+    # Object ID ranges
 
-    def get_url_params(
+    def _get_object_id_range(
         self,
-        context: Context | None,  # noqa: ARG002
-        next_page_token: int | None,
-    ) -> dict[str, t.Any]:
-        """Return a dictionary of values to be used in URL parameterization.
+        context: Context | None,
+    ) -> tuple[int | None, int | None]:
+        context = context or {}
+        return context.get(OBJECT_ID_GTE), context.get(OBJECT_ID_LT)
 
-        Args:
-            context: The stream context.
-            next_page_token: The next page index or value.
+    def _count_objects(
+        self,
+        context: Context | None,
+        lower: int | None,
+        upper: int | None,
+    ) -> int:
+        body: dict[str, t.Any] = {"limit": 1, "properties": ["hs_object_id"]}
+        if filters := _object_id_filters(lower, upper):
+            body["filterGroups"] = [{"filters": filters}]
+        return int(self._search(context, body).get("total", 0))
+
+    def _get_max_object_id(
+        self,
+        context: Context | None,
+        lower: int | None,
+        upper: int | None,
+    ) -> int:
+        body: dict[str, t.Any] = {
+            "sorts": [{"propertyName": "hs_object_id", "direction": "DESCENDING"}],
+            "limit": 1,
+            "properties": ["hs_object_id"],
+        }
+        if filters := _object_id_filters(lower, upper):
+            body["filterGroups"] = [{"filters": filters}]
+        results = self._search(context, body).get("results")
+        return int(results[0]["id"]) if results else 0
+
+    @cached_property
+    def _object_id_range_size(self) -> int | None:
+        size = self.config.get("object_id_range_size")
+        return min(size, SEARCH_RESULTS_LIMIT) if size else None
+
+    @cached_property
+    def _object_id_ranges(self) -> dict[tuple, list[tuple[int | None, int | None]]]:
+        return {}
+
+    def _get_object_id_partitions(self, contexts: list[dict]) -> list[dict] | None:
+        if self.replication_key:
+            # Resume the partitions of earlier syncs from their own bookmarks, and
+            # only split initial syncs. Partitions an interrupted sync did not
+            # start have no bookmarks yet, so they are resumed from its plan.
+            planned = self.stream_state.get(OBJECT_ID_PARTITIONS) or []
+            state_partitions = super().partitions or []
+            if planned or state_partitions:
+                return [*planned, *(p for p in state_partitions if p not in planned)]
+            if self.stream_state.get("replication_key_value"):
+                return None
+
+        partitions = [
+            {**context, OBJECT_ID_GTE: lower, OBJECT_ID_LT: upper}
+            for context in contexts
+            for lower, upper in self._get_object_id_ranges(context)
+        ]
+        if self.replication_key:
+            self.stream_state[OBJECT_ID_PARTITIONS] = [dict(p) for p in partitions]
+        return partitions
+
+    def _get_object_id_ranges(
+        self,
+        context: dict,
+    ) -> list[tuple[int | None, int | None]]:
+        key = _partition_key(context)
+        if key not in self._object_id_ranges:
+            lower, upper = self._get_object_id_range(context)
+            total = self._count_objects(context, lower, upper)
+            ranges = self._split_object_id_range(context, lower, upper, total)
+            self.logger.info(
+                "Split %s records of stream '%s' into %s object ID ranges",
+                total,
+                self.name,
+                len(ranges),
+            )
+            self._object_id_ranges[key] = ranges
+        return self._object_id_ranges[key]
+
+    def _split_object_id_range(
+        self,
+        context: dict,
+        lower: int | None,
+        upper: int | None,
+        total: int,
+    ) -> list[tuple[int | None, int | None]]:
+        """Bisect an object ID range until no part holds too many records.
+
+        Unbounded ends are kept unbounded, so objects created during the sync
+        still fall into a range.
+        """
+        if total <= t.cast("int", self._object_id_range_size):
+            return [(lower, upper)]
+
+        start = lower or 0
+        end = (
+            upper
+            if upper is not None
+            else self._get_max_object_id(context, lower, upper) + 1
+        )
+        if end - start < 2:  # noqa: PLR2004
+            return [(lower, upper)]
+
+        middle = (start + end) // 2
+        lower_total = self._count_objects(context, lower, middle)
+        return [
+            *self._split_object_id_range(context, lower, middle, lower_total),
+            *self._split_object_id_range(context, middle, upper, total - lower_total),
+        ]
+
+    def _process_record(
+        self,
+        record: dict,
+        child_context: Context | None = None,
+        partition_context: Context | None = None,
+    ) -> None:
+        # Object ID ranges partition state only, and are not fields of records
+        if partition_context is not None:
+            partition_context = {
+                key: value
+                for key, value in partition_context.items()
+                if key not in OBJECT_ID_RANGE_KEYS
+            }
+        super()._process_record(record, child_context, partition_context)
+
+    def _finalize_state(self, state: dict | None = None) -> None:
+        super()._finalize_state(state)
+        # The whole stream is finalized once all of its partitions were synced
+        if state is self.stream_state:
+            self._merge_object_id_partitions()
+
+    def _merge_object_id_partitions(self) -> None:
+        """Replace the bookmarks of object ID ranges by one bookmark per portal.
+
+        Ranges only split initial and full-table syncs, so once every range was
+        synced, later syncs resume from the earliest of their bookmarks. Ranges of
+        a sync with deferred partitions are kept, to resume them next time.
+        """
+        state = self.stream_state
+        partitions = state.get("partitions") or []
+        ranges = [p for p in partitions if OBJECT_ID_GTE in p["context"]]
+        if not ranges or self.deferred_partitions:
+            return
+
+        state.pop(OBJECT_ID_PARTITIONS, None)
+        state["partitions"] = [p for p in partitions if p not in ranges]
+        if not state["partitions"]:
+            del state["partitions"]
+        if not self.replication_key:
+            return
+
+        bookmarks: dict[tuple, tuple[dict, list[str]]] = {}
+        for partition in ranges:
+            context = {
+                key: value
+                for key, value in partition["context"].items()
+                if key not in OBJECT_ID_RANGE_KEYS
+            }
+            _, values = bookmarks.setdefault(_partition_key(context), (context, []))
+            if value := partition.get("replication_key_value"):
+                values.append(value)
+        for context, values in bookmarks.values():
+            if not values:
+                continue
+            bookmark = self.get_context_state(context or None)
+            bookmark["replication_key"] = self.replication_key
+            bookmark["replication_key_value"] = min(values, key=_parse_timestamp)
+
+    # Volume estimation
+
+    def estimate_volume(self) -> VolumeEstimate:
+        """Estimate the volume of syncing this stream from its current state.
+
+        Streams that can be searched are probed with a search for a single
+        record per portal, from the bookmark up to `end_date`. Its total and size
+        give the number of records, requests and bytes to expect. The duration is
+        that of the requests at `max_requests_per_second`, or else at the latency
+        of the probe.
 
         Returns:
-            A dictionary of URL query parameters.
+            The estimate, with unknown values left as None.
         """
-        params: dict = {}
-        params["limit"] = 100
-        if next_page_token:
-            params["after"] = next_page_token
-        if self.replication_key:
-            params["sort"] = "asc"
-            params["order_by"] = self.replication_key
-        return params
+        if self.parent_stream_type is not None or not self._get_search_path():
+            return VolumeEstimate(self.name)
+
+        estimate = VolumeEstimate(self.name, records=0, requests=0, bytes=0, seconds=0)
+
+        contexts: list[dict | None] = [
+            {"portal_id": portal_id} for portal_id in self.portals
+        ]
+        rate = self.config.get("max_requests_per_second")
+        for context in contexts or [None]:
+            started = time.monotonic()
+            response = self._search(context, self._get_probe_body(context))
+            latency = time.monotonic() - started
+
+            records = int(response.get("total") or 0)
+            sample = (response.get("results") or [{}])[0]
+            requests = max(-(-records // self._get_planned_page_size(context)), 1)
+            estimate += VolumeEstimate(
+                self.name,
+                records=records,
+                requests=requests,
+                bytes=records * len(json.dumps(sample)) if sample else 0,
+                seconds=requests / rate if rate else requests * latency,
+            )
+        return estimate
+
+    def _get_probe_body(self, context: Context | None) -> dict:
+        filters = self._get_search_filters(context, None)
+        end_date = self.config.get("end_date")
+        if (
+            end_date
+            and self.replication_key
+            and self.replication_method == REPLICATION_INCREMENTAL
+        ):
+            ts = datetime.datetime.fromisoformat(end_date)
+            filters.append(
+                {
+                    "propertyName": self.replication_key,
+                    "operator": "LT",
+                    "value": str(int(ts.timestamp() * 1000)),
+                },
+            )
+        body: dict[str, t.Any] = {
+            "limit": 1,
+            # A whole record, to size the records to come
+            "properties": self._get_search_properties(),
+        }
+        if filters:
+            body["filterGroups"] = [{"filters": filters}]
+        return body
+
+    def _get_planned_page_size(self, context: Context | None) -> int:
+        searched = self._is_search(context)
+        if self.config.get("adaptive_page_size"):
+            return self.max_search_page_size if searched else self.max_page_size
+        return self.default_page_size
+
 
 class PropertyStream(HubspotStream):
     """Property stream class."""
@@ -196,42 +1765,201 @@ class PropertyStream(HubspotStream):
 
         return super().parse_response(response)
 
+
 class DynamicHubspotStream(HubspotStream):
     """DynamicHubspotStream."""
 
     def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:  # noqa: D107
+        self._warned_unknown_properties = False
         super().__init__(*args, **kwargs)
 
     def _get_datatype(self, data_type: str) -> th.JSONTypeHelper:  # noqa: ARG002
         # TODO: consider typing more precisely  # noqa: TD002, TD003, FIX002
         return th.StringType()
 
+    # The `properties` object is conformed by `post_process` against the property
+    # table, so the SDK only needs to conform top-level fields
+    TYPE_CONFORMANCE_LEVEL = TypeConformanceLevel.ROOT_ONLY
+
     @cached_property
-    def schema(self) -> dict:
-        """Return a draft JSON schema for this stream."""
-        hs_props = []
-        self.hs_properties = self._get_available_properties()
-        for name, prop_type in self.hs_properties.items():
-            hs_props.append(
-                th.Property(name, self._get_datatype(prop_type)),
-            )
-        schema = th.PropertiesList(
+    def property_table(self) -> PropertyTable:
+        """Return the HubSpot properties available for this object type.
+
+        Properties are taken from the input catalog when one is provided, and
+        only fetched from the API otherwise.
+        """
+        if catalog_schema := self._get_catalog_properties_schema():
+            return PropertyTable.from_json_schema(catalog_schema)
+        return PropertyTable(self._get_available_properties())
+
+    def _get_catalog_properties_schema(self) -> dict | None:
+        catalog = self._tap.input_catalog
+        entry = catalog.get_stream(self.name) if catalog else None
+        if entry is None:
+            return None
+        if self._flatten_properties:
+            # Properties are the top-level fields of the catalog's flattened schema
+            # that are not fields of the records themselves
+            sources = {new: old for old, new in self._field_renames.items()}
+            flattened = {
+                sources.get(name, name): schema.to_dict()
+                for name, schema in (entry.schema.properties or {}).items()
+                if sources.get(name, name) not in {*OBJECT_RECORD_FIELDS, "portal_id"}
+            }
+            if not flattened:
+                return None
+            return {"type": ["object", "null"], "properties": flattened}
+        properties = (entry.schema.properties or {}).get("properties")
+        if properties is None or not properties.properties:
+            return None
+        return properties.to_dict()
+
+    @property
+    def hs_properties(self) -> tuple[str, ...]:
+        """Names of the HubSpot properties requested for this object type."""
+        return self.property_table.names
+
+    def _get_type_schema(self, data_type: str) -> dict:
+        return self._get_datatype(data_type).to_dict()
+
+    def _get_schema_properties(self) -> th.PropertiesList:
+        return th.PropertiesList(
             th.Property("id", th.StringType),
-            th.Property(
-                "properties",
-                th.ObjectType(*hs_props),
-            ),
+            # Replaced by the property table's schema
+            th.Property("properties", th.ObjectType()),
             th.Property("createdAt", th.DateTimeType),
             th.Property("updatedAt", th.DateTimeType),
             th.Property("archived", th.BooleanType),
         )
-        return schema.to_dict()
+
+    @cached_property
+    def schema(self) -> dict:
+        """Return a draft JSON schema for this stream.
+
+        Raises:
+            ConfigValidationError: If key fields of the stream are to be renamed.
+        """
+        schema = self._get_schema_properties().to_dict()
+        properties = self.property_table.json_schema(self._get_type_schema)
+        if not self._flatten_properties:
+            schema["properties"]["properties"] = properties
+        else:
+            fields = schema["properties"]
+            del fields["properties"]
+            # Top-level fields take precedence over properties of the same name,
+            # e.g. the replication key
+            schema["properties"] = {
+                **fields,
+                **{
+                    name: field_schema
+                    for name, field_schema in properties["properties"].items()
+                    if name not in fields
+                },
+            }
+
+        if renames := self._field_renames:
+            keys = {*self.primary_keys, self.replication_key or ""}.intersection(
+                renames,
+            )
+            if keys:
+                msg = (
+                    f"Cannot rename key fields of stream '{self.name}': "
+                    f"{', '.join(sorted(keys))}"
+                )
+                raise ConfigValidationError(msg)
+            schema["properties"] = {
+                renames.get(name, name): field_schema
+                for name, field_schema in schema["properties"].items()
+            }
+        return self._add_portal_key(schema)
+
+    # Projection
+
+    @cached_property
+    def _flatten_properties(self) -> bool:
+        return bool(self.config.get("flatten_properties"))
+
+    @cached_property
+    def _field_renames(self) -> dict[str, str]:
+        return (self.config.get("field_renames") or {}).get(self.name) or {}
+
+    @cached_property
+    def projection(self) -> Projection | None:
+        """Return the key map of emitted records, if they are flattened or renamed.
+
+        Deselected fields are left out of the map, so records need no further
+        pruning once projected.
+        """
+        if not self._flatten_properties and not self._field_renames:
+            return None
+        return Projection.compile(
+            [
+                name
+                for name in self.schema["properties"]
+                if self.mask.get(("properties", name), True)
+            ],
+            {*self._get_schema_properties().to_dict()["properties"], "portal_id"},
+            self._field_renames,
+            flatten=self._flatten_properties,
+        )
+
+    def _is_property_selected(self, name: str) -> bool:
+        breadcrumb: tuple[str, ...]
+        if self._flatten_properties:
+            breadcrumb = ("properties", self._field_renames.get(name, name))
+        else:
+            # The `properties` field, its object schema's `properties`, then the
+            # property, as the SDK's selection mask is keyed
+            breadcrumb = ("properties", "properties", "properties", name)
+        return self.mask.get(breadcrumb, True)
+
+    def _generate_record_messages(
+        self,
+        record: dict,
+    ) -> t.Generator[RecordMessage, None, None]:
+        if self.projection is not None:
+            record = self.projection(record)
+        yield from super()._generate_record_messages(record)
+
+    def post_process(  # noqa: D102
+        self,
+        row: dict,
+        context: Context | None = None,  # noqa: ARG002
+    ) -> dict | None:
+        if props := row.get("properties"):
+            unknown = self.property_table.conform(props)
+            if unknown and not self._warned_unknown_properties:
+                self.logger.warning(
+                    "Properties not found in the schema of stream '%s' were "
+                    "removed: %s",
+                    self.name,
+                    ", ".join(unknown),
+                )
+                self._warned_unknown_properties = True
+        return row
+
+    @property
+    def properties_object_type(self) -> str:
+        """Return the object type properties are listed by, the stream name."""
+        return self.name
 
     def _get_available_properties(self) -> dict[str, str]:
-        property_stream = PropertyStream(self._tap, self.name)
-        results = property_stream.get_records(None)
+        """Return the types of the properties of all portals, by name.
 
-        return {prop["name"]: prop["type"] for prop in results}
+        Portals define custom properties of their own, so each is listed, and
+        properties requested and emitted from any of them. Where portals type a
+        property differently, the first portal's type is kept.
+        """
+        property_stream = PropertyStream(self._tap, self.properties_object_type)
+        contexts: list[dict | None] = [
+            {"portal_id": portal_id} for portal_id in self.portals
+        ]
+        properties: dict[str, str] = {}
+        for context in contexts or [None]:
+            # Property lists have no state of their own to keep
+            for prop in property_stream.request_records(context):
+                properties.setdefault(prop["name"], prop["type"])
+        return properties
 
     def get_url_params(
         self,
@@ -249,50 +1977,121 @@ class DynamicHubspotStream(HubspotStream):
         """
         params = super().get_url_params(context, next_page_token)
         if self.hs_properties:
-            params["properties"] = ",".join(self.hs_properties)
+            params["properties"] = self._properties_param
         return params
 
+    @cached_property
+    def _properties_param(self) -> str:
+        return ",".join(self.hs_properties)
+
 
 class DynamicIncrementalHubspotStream(DynamicHubspotStream):
     """DynamicIncrementalHubspotStream."""
 
+    # CRM object type ID, of export jobs and webhook events
+    object_type_id: str | None = None
+    export_poll_interval = 10.0
+
     def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:  # noqa: D107
         super().__init__(*args, **kwargs)
+        # Keyed by (portal ID, record ID); pages may be parsed on worker threads
+        # ahead of their records being emitted on the main thread
+        self._unchanged_ids: set[tuple[str | None, str]] = set()
+        self._pending_digests: dict[tuple[str | None, str], bytes] = {}
+        self._emitted_digests: dict[tuple[str | None, str], bytes] = {}
+        self._encoder: RecordEncoder | None = None
+
+    @cached_property
+    def digest_store(self) -> DigestStore | None:
+        """Return the record digest store, if enabled."""
+        if path := self.config.get("digest_store_path"):
+            return DigestStore(path)
+        return None
+
+    @cached_property
+    def _digest_properties(self) -> list[str]:
+        # The replication key changes on every update, so it is never part of the
+        # digest; deselected properties are not emitted, so changes to them are
+        # not material either
+        return [
+            name
+            for name in self.hs_properties
+            if name != self.replication_key and self._is_property_selected(name)
+        ]
+
+    def _record_digest(self, row: dict) -> bytes:
+        props = row.get("properties") or {}
+        return record_digest(
+            {name: props.get(name) for name in self._digest_properties},
+        )
+
+    def _digest_scope(self, portal_id: str | None) -> str:
+        # Record IDs are only unique within a portal
+        return f"{self.name}:{portal_id}" if portal_id else self.name
+
+    def _check_digests(self, records: list[dict]) -> None:
+        """Work out which records of a page are unchanged since the last sync."""
+        store = t.cast("DigestStore", self.digest_store)
+        portal_id = getattr(self._local, "portal_id", None)
+        digests = {
+            row["id"]: self._record_digest(row) for row in records if "id" in row
+        }
+        stored = store.lookup(self._digest_scope(portal_id), digests)
+        for id_, digest in digests.items():
+            if stored.get(id_) == digest:
+                self._unchanged_ids.add((portal_id, id_))
+            else:
+                self._pending_digests[portal_id, id_] = digest
+
+    def _record_emitted(self, key: tuple[str | None, str]) -> None:
+        # Digests are stored with the next STATE message, rather than as soon as
+        # their record is emitted, so records whose state a target did not get
+        # to are emitted again next time
+        if (digest := self._pending_digests.pop(key, None)) is not None:
+            self._emitted_digests[key] = digest
+
+    def _flush_digests(self) -> None:
+        if self.digest_store is not None and self._emitted_digests:
+            by_scope: dict[str, dict[str, bytes]] = {}
+            for (portal_id, id_), digest in self._emitted_digests.items():
+                by_scope.setdefault(self._digest_scope(portal_id), {})[id_] = digest
+            for scope, digests in by_scope.items():
+                self.digest_store.update(scope, digests)
+        self._emitted_digests = {}
+
+    def get_replication_key_value(self, context: Context | None) -> str | None:
+        """Return the bookmark to sync a partition from.
+
+        Args:
+            context: Stream partition or context dictionary.
+
+        Returns:
+            The latest replication key value, or the start date.
+        """
+        return self.get_context_state(context).get(
+            "replication_key_value",
+        ) or self.get_starting_replication_key_value(context)
 
     @property
     def replication_key_value(self) -> str | None:
         """Latest replication key value."""
-        return self.get_context_state(self.context).get(
-            "replication_key_value",
-        ) or self.get_starting_replication_key_value(self.context)
-
-    def _is_incremental_search(self, context: Context | None) -> bool:
-        return (
-            self.replication_method == REPLICATION_INCREMENTAL  # type: ignore[return-value]
-            and self.replication_key_value
-            and hasattr(self, "incremental_path")
-            and self.incremental_path
+        return self.get_replication_key_value(self.context)
+
+    def _get_search_path(self) -> str | None:
+        return getattr(self, "incremental_path", None)
+
+    def _is_search(self, context: Context | None) -> bool:
+        if super()._is_search(context):
+            return True
+        return bool(
+            self.replication_method == REPLICATION_INCREMENTAL
+            and self._get_search_path()
+            # Shards always search, to filter by object ID
+            and (self.shard.count > 1 or self.get_replication_key_value(context)),
         )
 
-    @cached_property
-    def schema(self) -> dict:
-        """Return a draft JSON schema for this stream."""
-        hs_props = []
-        self.hs_properties = self._get_available_properties()
-        for name, prop_type in self.hs_properties.items():
-            hs_props.append(
-                th.Property(name, self._get_datatype(prop_type)),
-            )
-        schema = th.PropertiesList(
-            th.Property("id", th.StringType),
-            th.Property(
-                "properties",
-                th.ObjectType(*hs_props),
-            ),
-            th.Property("createdAt", th.DateTimeType),
-            th.Property("updatedAt", th.DateTimeType),
-            th.Property("archived", th.BooleanType),
-        )
+    def _get_schema_properties(self) -> th.PropertiesList:
+        schema = super()._get_schema_properties()
         if self.replication_key:
             schema.append(
                 th.Property(
@@ -300,30 +2099,89 @@ class DynamicIncrementalHubspotStream(DynamicHubspotStream):
                     th.DateTimeType,
                 ),
             )
-        return schema.to_dict()
-
-    def get_url_params(
-        self,
-        context: Context | None,
-        next_page_token: int | None,
-    ) -> dict[str, t.Any]:
-        """Return a dictionary of values to be used in URL parameterization.
+        return schema
 
-        Args:
-            context: The stream context.
-            next_page_token: The next page index or value.
+    def parse_response(self, response: requests.Response) -> t.Iterable[dict]:  # noqa: D102
+        records = super().parse_response(response)
+        if self.digest_store is None:
+            return records
+
+        if not self._stream_responses:
+            records = list(records)
+            self._check_digests(records)
+            return records
+        # Streamed records are looked up a few at a time as they are decoded, so
+        # that the page is never held in memory
+        return self._check_streamed_digests(records)
+
+    def _check_streamed_digests(self, records: t.Iterable[dict]) -> t.Iterator[dict]:
+        iterator = iter(records)
+        while batch := list(itertools.islice(iterator, DIGEST_LOOKUP_BATCH_SIZE)):
+            self._check_digests(batch)
+            yield from batch
+
+    def _read_batch(self, context: Context | None, ids: t.Sequence[str]) -> list[dict]:
+        records = super()._read_batch(context, ids)
+        # Re-synced records are emitted whether or not they changed
+        if self.digest_store is not None and self.resync_ids is None:
+            self._check_digests(records)
+        return records
+
+    # Encoding in worker processes
 
-        Returns:
-            A dictionary of URL query parameters.
-        """
-        if self._is_incremental_search(context):
-            return {}
-        return super().get_url_params(context, next_page_token)
+    @cached_property
+    def _transform_processes(self) -> int:
+        processes = int(self.config.get("transform_processes") or 1)
+        if processes > 1 and not (
+            len(self.stream_maps) == 1
+            and isinstance(self.stream_maps[0], SameRecordTransform)
+        ):
+            # Stream maps evaluate expressions that cannot be sent to workers
+            self.logger.warning(
+                "Records of stream '%s' are encoded in process, as it has stream maps",
+                self.name,
+            )
+            return 1
+        return processes
+
+    def _write_record_message(self, record: dict) -> None:
+        if self._transform_processes <= 1:
+            super()._write_record_message(record)
+            return
+
+        if self._encoder is None:
+            self._encoder = RecordEncoder(
+                get_process_pool(self._transform_processes),
+                EncodingSpec(
+                    self.name,
+                    self.schema,
+                    self.effective_schema,
+                    self.mask,
+                    self.TYPE_CONFORMANCE_LEVEL,
+                    self._stream_version,
+                    self.projection,
+                ),
+                self._tap.write_message,
+                batch_size=self.page_size,
+                max_pending=2 * self._transform_processes,
+            )
+        self._encoder.put(record)
+        self._is_state_flushed = False
+
+    def _write_state_message(self) -> None:
+        # Bookmarks must not get ahead of the records emitted
+        if self._encoder is not None:
+            self._encoder.flush()
+            self._encoder = None
+        last_state = self._last_emitted_state
+        super()._write_state_message()
+        if self._last_emitted_state is not last_state:
+            self._flush_digests()
 
     def post_process(
         self,
         row: dict,
-        context: Context | None = None,  # noqa: ARG002
+        context: Context | None = None,
     ) -> dict | None:
         """As needed, append or transform raw data to match expected structure.
 
@@ -341,85 +2199,430 @@ class DynamicIncrementalHubspotStream(DynamicHubspotStream):
         Returns:
             The resulting record dict, or `None` if the record should be excluded.
         """
+        row = super().post_process(row, context)  # type: ignore[assignment]
         if self.replication_key:
             val = None
             if props := row.get("properties"):
                 val = props[self.replication_key]
             row[self.replication_key] = val
+        if self.digest_store is not None and "id" in row:
+            key = ((context or {}).get("portal_id"), row["id"])
+            if key in self._unchanged_ids:
+                self._unchanged_ids.discard(key)
+                # Still advance the bookmark past records we suppress
+                self._increment_stream_state(row, context=context)
+                return None
+            self._record_emitted(key)
         return row
 
-    def prepare_request(  # noqa: D102
+    # Search
+
+    def _get_search_sort_property(self) -> str:
+        return t.cast("str", self.replication_key)
+
+    def _get_search_properties(self) -> list[str]:
+        return list(self.hs_properties)
+
+    def _get_search_filters(
         self,
         context: Context | None,
-        next_page_token: int | None,
-    ) -> requests.PreparedRequest:
-        if self._is_incremental_search(context):
-            # Search endpoints use POST request
-            self.path = self.incremental_path  # type: ignore[attr-defined]
-            self.http_method = "POST"
-        return super().prepare_request(context, next_page_token)
+        since: str | None,
+    ) -> list[dict]:
+        filters = super()._get_search_filters(context, None)
+        # Only filter in case we have a value to filter on
+        if value := since or self.get_replication_key_value(context):
+            ts = datetime.datetime.fromisoformat(value)
+            filters.append(
+                {
+                    "propertyName": self.replication_key,
+                    "operator": "GTE",
+                    # Timestamps need to be in milliseconds
+                    # https://legacydocs.hubspot.com/docs/faq/how-should-timestamps-be-formatted-for-hubspots-apis
+                    "value": str(int(ts.timestamp() * 1000)),
+                },
+            )
+        return filters
+
+    def _get_restart_value(self, record: dict) -> str | None:
+        return (record.get("properties") or {}).get(self.replication_key)
 
-    def prepare_request_payload(
+    # Sharding
+
+    @cached_property
+    def shard(self) -> Shard:
+        """Return the slice of this stream synced by this process."""
+        return getattr(self._tap, "shard", Shard())
+
+    def _get_object_id_range(
         self,
         context: Context | None,
-        next_page_token: int | None,
-    ) -> dict | None:
-        """Prepare the data payload for the REST API request.
+    ) -> tuple[int | None, int | None]:
+        if self.shard.count == 1 or OBJECT_ID_GTE in (context or {}):
+            return super()._get_object_id_range(context)
+        return object_id_range(self.shard, t.cast("int", self.shard_max_object_id))
+
+    @cached_property
+    def shard_max_object_id(self) -> int | None:
+        """Return the highest object ID shards split this stream on, if sharded.
+
+        Raises:
+            ConfigValidationError: If the stream is sharded without one.
+        """
+        if self.shard.count == 1 or not self._get_search_path():
+            return None
+        max_object_ids = self.config.get("shard_max_object_ids") or {}
+        if self.name not in max_object_ids:
+            msg = (
+                f"Cannot shard stream '{self.name}' without its highest object ID "
+                "in `shard_max_object_ids`, as reported by `--plan`"
+            )
+            raise ConfigValidationError(msg)
+        return int(max_object_ids[self.name])
+
+    def get_max_object_id(self) -> int:
+        """Return the highest object ID of the stream, over all portals."""
+        contexts: list[dict | None] = [
+            {"portal_id": portal_id} for portal_id in self.portals
+        ]
+        return max(
+            self._get_max_object_id(context, None, None)
+            for context in contexts or [None]
+        )
+
+    # Export backfills
+
+    def _use_export(self, context: Context | None) -> bool:
+        return bool(
+            self.config.get("export_backfill")
+            and self.object_type_id
+            and self.replication_method == REPLICATION_INCREMENTAL
+            and self._get_search_path()
+            # Object ID ranges and shards are synced by search instead
+            and self.shard.count == 1
+            and OBJECT_ID_GTE not in (context or {})
+            and not self.get_context_state(context).get("replication_key_value"),
+        )
+
+    def _fetch_records(self, context: Context | None) -> t.Iterable[dict]:
+        if self.resync_ids is None:
+            if self._use_change_feed(context):
+                yield from self._get_changed_records(context)
+                return
+            if self._use_export(context):
+                yield from self._get_export_records(context)
+        yield from super()._fetch_records(context)
 
-        By default, no payload will be sent (return None).
+    def _get_export_records(self, context: Context | None) -> t.Iterable[dict]:
+        """Backfill a partition from a CRM export job.
 
-        Developers may override this method if the API requires a custom payload along
-        with the request. (This is generally not required for APIs which use the
-        HTTP 'GET' method.)
+        Once the export has been read, the partition's starting replication value
+        is moved to when the export was requested, so the incremental search that
+        follows picks up any changes made since.
 
         Args:
             context: Stream partition or context dictionary.
-            next_page_token: Token, page number or any request argument to request the
-                next page of data.
+
+        Yields:
+            One item per exported record.
         """
-        body: dict[str, t.Any] = {}
-        if self._is_incremental_search(context):
-            # Only filter in case we have a value to filter on
-            # https://developers.hubspot.com/docs/api/crm/search
-            if next_page_token:
-                # Hubspot wont return more than 10k records so when we hit 10k we
-                # need to reset our epoch to most recent and not send the
-                # next_page_token
-                if int(next_page_token) + 100 >= 10000:  # noqa: PLR2004
-                    state = self.get_context_state(context)
-                    self.finalize_state_progress_markers(state)
-                else:
-                    body["after"] = next_page_token
+        requested_at = datetime.datetime.now(datetime.timezone.utc)
+        export = CrmExport(
+            partial(self._call_api, context),
+            download=partial(self._download, context),
+            poll_interval=self.export_poll_interval,
+        )
+        task_id = export.submit(
+            t.cast("str", self.object_type_id),
+            self.hs_properties,
+            self._get_search_filters(context, None),
+        )
+        self.logger.info("Backfilling stream '%s' from export %s", self.name, task_id)
+        url = export.wait(task_id)
 
-            ts = datetime.datetime.fromisoformat(self.replication_key_value)
-            epoch_ts = str(int(ts.timestamp() * 1000))
+        columns = self._export_columns
+        for row in export.rows(url):
+            yield self._parse_export_row(row, columns)
 
-            body.update(
-                {
-                    "filterGroups": [
-                        {
-                            "filters": [
-                                {
-                                    "propertyName": self.replication_key,
-                                    "operator": "GTE",
-                                    # Timestamps need to be in milliseconds
-                                    # https://legacydocs.hubspot.com/docs/faq/how-should-timestamps-be-formatted-for-hubspots-apis
-                                    "value": epoch_ts,
-                                },
-                            ],
-                        },
-                    ],
-                    "sorts": [
-                        {
-                            # This is inside the properties object
-                            "propertyName": self.replication_key,
-                            "direction": "ASCENDING",
-                        },
-                    ],
-                    # Hubspot sets a limit of most 100 per request. Default is 10
-                    "limit": 100,
-                    "properties": list(self.hs_properties),
-                },
-            )
+        self.get_context_state(context)["starting_replication_value"] = (
+            requested_at.isoformat()
+        )
 
-        return body
+    @cached_property
+    def _export_columns(self) -> dict[str, str]:
+        """Map export column headers, property labels or names, to property names."""
+        columns = {name: name for name in self.hs_properties}
+        properties = PropertyStream(self._tap, self.properties_object_type)
+        for prop in properties.get_records(None):
+            if prop.get("label") and prop["name"] in columns:
+                columns.setdefault(prop["label"], prop["name"])
+        return columns
+
+    @cached_property
+    def _export_types(self) -> dict[str, str]:
+        """Map property names to HubSpot types, to normalise exported values by.
+
+        Types of properties taken from a catalog are told by their JSON schema.
+        """
+        table = self.property_table
+        schemas = table.json_schema(self._get_type_schema)["properties"]
+        types = {
+            name: type_ or _schema_hubspot_type(schemas[name])
+            for name, type_ in zip(table.names, table.types)
+        }
+        types[t.cast("str", self.replication_key)] = "datetime"
+        return types
+
+    def _parse_export_row(self, row: dict[str, str], columns: dict[str, str]) -> dict:
+        types = self._export_types
+        props: dict[str, t.Any] = {}
+        for header, value in row.items():
+            if header in columns:
+                name = columns[header]
+                props[name] = normalise_value(value, types[name]) if value else None
+        return {
+            "id": props.get("hs_object_id") or row.get("Record ID"),
+            "properties": props,
+            "archived": False,
+        }
+
+    # Change feeds
+
+    def _use_change_feed(self, context: Context | None) -> bool:
+        return bool(
+            self.config.get("change_feed_path")
+            and self.object_type_id
+            and self.replication_method == REPLICATION_INCREMENTAL
+            # A change feed only tells what changed since the last sync
+            and self.get_context_state(context).get("replication_key_value")
+            and self.shard.count == 1
+            and OBJECT_ID_GTE not in (context or {}),
+        )
+
+    def _get_changed_records(self, context: Context | None) -> t.Iterable[dict]:
+        """Fetch the records of a partition named by the change feed.
+
+        Events are read from `change_feed_lag` seconds before the bookmark, so
+        that records changed around it are fetched again rather than missed.
+
+        Args:
+            context: Stream partition or context dictionary.
+
+        Returns:
+            One item per changed record.
+        """
+        bookmark = t.cast("str", self.get_replication_key_value(context))
+        # The bookmark is the latest change fetched, which events delivered late
+        # may predate
+        since = _parse_timestamp(bookmark) - datetime.timedelta(
+            seconds=float(self.config.get("change_feed_lag", 300)),
+        )
+        ids = read_changed_ids(
+            self.config["change_feed_path"],
+            t.cast("str", self.object_type_id),
+            portal_id=(context or {}).get("portal_id"),
+            since=since,
+        )
+        self.logger.info(
+            "Fetching %d records of stream '%s' changed since %s",
+            len(ids),
+            self.name,
+            since.isoformat(),
+        )
+        return self._batch_read(context, ids)
+
+
+class PropertyHistoryStream(HubspotStream):
+    """Values over time of selected properties of a CRM object type.
+
+    Objects changed since the bookmark are found with their object stream's
+    search endpoint, and the history of their properties read by ID in batches.
+    History rows are parsed as each response is read, so memory use does not
+    grow with the length of the history. Rows from before the bookmark were
+    emitted by an earlier sync, and are left out.
+    """
+
+    schema = th.PropertiesList(
+        th.Property("id", th.StringType),
+        th.Property("property", th.StringType),
+        th.Property("value", th.StringType),
+        th.Property("timestamp", th.DateTimeType),
+        th.Property("sourceType", th.StringType),
+        th.Property("sourceId", th.StringType),
+        th.Property("sourceLabel", th.StringType),
+        th.Property("updatedByUserId", th.IntegerType),
+    ).to_dict()
+
+    primary_keys = ("id", "property", "timestamp")
+    replication_key = "timestamp"
+    replication_method = REPLICATION_INCREMENTAL
+    is_sorted = False
+
+    def __init__(
+        self,
+        tap: t.Any,  # noqa: ANN401
+        object_stream: DynamicIncrementalHubspotStream,
+        properties: t.Sequence[str],
+    ) -> None:
+        """Create the property history stream of an object stream.
+
+        Args:
+            tap: The tap.
+            object_stream: The stream of the objects whose history to sync.
+            properties: Names of the properties whose history to sync.
+        """
+        self.object_stream = object_stream
+        self.history_properties = list(properties)
+        self.path = f"{object_stream.path}/batch/read"
+        super().__init__(tap, name=f"{object_stream.name}_property_history")
+
+    @property
+    def url_base(self) -> str:
+        """Returns the object stream's base url."""
+        return self.object_stream.url_base
+
+    @cached_property
+    def _stream_responses(self) -> bool:
+        # History is parsed as it is read, where ijson is installed to parse it
+        return ijson_installed()
+
+    def _fetch_records(self, context: Context | None) -> t.Iterable[dict]:
+        since = self.get_starting_replication_key_value(context)
+        rows = self._read_history(context, self._get_changed_ids(context, since))
+        if since is None:
+            return rows
+        start = _parse_timestamp(since)
+        return (row for row in rows if _parse_timestamp(row["timestamp"]) >= start)
+
+    def _get_changed_ids(
+        self,
+        context: Context | None,
+        since: str | None,
+    ) -> t.Iterator[str]:
+        """Search for the IDs of objects changed since a date-time.
+
+        Searches restart from the last date-time found before reaching the
+        search results limit.
+
+        Raises:
+            FatalAPIError: If more objects than the limit share a date-time.
+        """
+        key = t.cast("str", self.object_stream.replication_key)
+        # Objects found at the date-time a search restarts from
+        boundary: set[str] = set()
+        while True:
+            filters = []
+            if since is not None:
+                filters.append(
+                    {
+                        "propertyName": key,
+                        "operator": "GTE",
+                        "value": str(int(_parse_timestamp(since).timestamp() * 1000)),
+                    },
+                )
+            body: dict[str, t.Any] = {
+                "filterGroups": [{"filters": filters}] if filters else [],
+                "sorts": [{"propertyName": key, "direction": "ASCENDING"}],
+                "properties": [key],
+                "limit": self.object_stream.max_search_page_size,
+            }
+            restart = None
+            found: set[str] = set()
+            while True:
+                page = self.object_stream._search(context, body)  # noqa: SLF001
+                for result in page.get("results", []):
+                    value = (result.get("properties") or {}).get(key)
+                    if value != restart:
+                        restart, found = value, set()
+                    found.add(result["id"])
+                    if result["id"] not in boundary:
+                        yield result["id"]
+                after = page.get("paging", {}).get("next", {}).get("after")
+                if not after:
+                    return
+                if int(after) >= SEARCH_RESULTS_LIMIT:
+                    break
+                body["after"] = after
+            if restart is None or restart == since:
+                msg = (
+                    f"Too many objects of stream '{self.object_stream.name}' share "
+                    f"the value {since} of '{key}' to search for"
+                )
+                raise FatalAPIError(msg)
+            since, boundary = restart, found
+
+    def _read_history(
+        self,
+        context: Context | None,
+        ids: t.Iterator[str],
+    ) -> t.Iterator[dict]:
+        """Read the property history of objects, in batches.
+
+        With `max_workers` above one, batches are read concurrently, each worker
+        holding on to a bounded number of rows the consumer has yet to read.
+        """
+        batches = iter(
+            lambda: list(itertools.islice(ids, HISTORY_BATCH_READ_LIMIT)),
+            [],
+        )
+        if self._max_workers == 1:
+            for batch in batches:
+                yield from self._read_history_batch(context, batch)
+            return
+
+        prefetcher: Prefetcher[dict] = Prefetcher(
+            get_worker_pool(self._max_workers, "batches"),
+            self.prefetch_buffer_size,
+        )
+        pending: collections.deque[int] = collections.deque()
+        try:
+            for index, batch in enumerate(batches):
+                prefetcher.submit(
+                    index,
+                    partial(self._read_history_batch, context, batch),
+                )
+                pending.append(index)
+                if len(pending) > self._max_workers:
+                    yield from prefetcher.take(pending.popleft())
+            while pending:
+                yield from prefetcher.take(pending.popleft())
+        finally:
+            prefetcher.cancel()
+
+    def _read_history_batch(
+        self,
+        context: Context | None,
+        ids: t.Sequence[str],
+    ) -> t.Iterator[dict]:
+        response = self._send_api(
+            context,
+            "POST",
+            self.path,
+            {
+                "propertiesWithHistory": self.history_properties,
+                "properties": ["hs_object_id"],
+                "inputs": [{"id": id_} for id_ in ids],
+            },
+        )
+        return history_rows(response)
+
+
+def _parse_timestamp(value: str) -> datetime.datetime:
+    ts = datetime.datetime.fromisoformat(value)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=datetime.timezone.utc)
+    return ts
+
+
+def _schema_hubspot_type(schema: dict) -> str:
+    """Return the HubSpot type of a property with the given JSON schema."""
+    if schema.get("format") == "date-time":
+        return "datetime"
+    if schema.get("format") == "date":
+        return "date"
+    types = schema.get("type")
+    types = {types} if isinstance(types, str) else set(types or ())
+    if types & {"number", "integer"}:
+        return "number"
+    if "boolean" in types:
+        return "bool"
+    return "string"
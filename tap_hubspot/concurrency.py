@@ -0,0 +1,274 @@
+"""Concurrent fetching of stream partitions."""
+
+from __future__ import annotations
+
+import collections
+import queue
+import threading
+import typing as t
+from functools import partial
+
+T = t.TypeVar("T")
+
+# How long a blocked worker waits before checking whether it was cancelled
+_POLL_SECONDS = 0.5
+
+
+class WorkerPool:
+    """Fixed-size pool of daemon worker threads.
+
+    Unlike `concurrent.futures.ThreadPoolExecutor`, workers never hold up
+    interpreter exit, e.g. while blocked on a buffer nobody will read.
+    """
+
+    def __init__(self, max_workers: int, name: str = "tap-hubspot") -> None:
+        """Start the worker threads.
+
+        Args:
+            max_workers: Number of worker threads.
+            name: Prefix of the worker thread names.
+        """
+        self._jobs: queue.SimpleQueue[t.Callable[[], None]] = queue.SimpleQueue()
+        for index in range(max_workers):
+            threading.Thread(
+                target=self._work,
+                name=f"{name}-{index}",
+                daemon=True,
+            ).start()
+
+    def submit(self, func: t.Callable[[], None]) -> None:
+        """Run `func` on the next free worker.
+
+        Args:
+            func: The job to run.
+        """
+        self._jobs.put(func)
+
+    def _work(self) -> None:
+        while True:
+            self._jobs.get()()
+
+
+_pools: dict[tuple[str, int], WorkerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(max_workers: int, purpose: str = "partitions") -> WorkerPool:
+    """Return the process-wide worker pool of the given size.
+
+    Jobs may wait on jobs of a pool for another purpose, but never on jobs of
+    their own pool, which could otherwise be starved of workers.
+
+    Args:
+        max_workers: Number of worker threads.
+        purpose: What the pool's jobs do, e.g. fetch partitions.
+
+    Returns:
+        A worker pool shared by all streams.
+    """
+    key = (purpose, max_workers)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = WorkerPool(max_workers, f"tap-hubspot-{purpose}")
+        return _pools[key]
+
+
+class _Done:
+    def __init__(self, error: BaseException | None = None) -> None:
+        self.error = error
+
+
+class Prefetcher(t.Generic[T]):
+    """Fill bounded buffers from iterators running in a worker pool.
+
+    Each submitted iterator runs on a worker thread and blocks once its buffer
+    is full, so memory stays bounded while the consumer works through earlier
+    items. Items are read back per key in the order the iterator produced them.
+    Iterators are started in the order they were submitted, and no more than
+    `max_started` are started before being read to the end.
+    """
+
+    def __init__(
+        self,
+        pool: WorkerPool,
+        buffer_size: int,
+        max_started: int | None = None,
+    ) -> None:
+        """Create a prefetcher.
+
+        Args:
+            pool: Worker pool to run iterators on.
+            buffer_size: Maximum number of items buffered per iterator.
+            max_started: Maximum number of iterators started and not yet read to
+                the end, or None for no limit.
+        """
+        self._pool = pool
+        self._buffer_size = buffer_size
+        self._max_started = max_started
+        self._buffers: dict[t.Hashable, queue.Queue] = {}
+        self._waiting: collections.OrderedDict[
+            t.Hashable,
+            tuple[queue.Queue, t.Callable[[], t.Iterable[T]]],
+        ] = collections.OrderedDict()
+        self._started = 0
+        self._cancelled = threading.Event()
+
+    def __contains__(self, key: t.Hashable) -> bool:
+        """Return whether an iterator was submitted under `key`."""
+        return key in self._buffers
+
+    def submit(self, key: t.Hashable, func: t.Callable[[], t.Iterable[T]]) -> None:
+        """Start iterating `func()` in the background.
+
+        Args:
+            key: Key to read the items back with.
+            func: Returns the iterable to prefetch.
+        """
+        buffer: queue.Queue = queue.Queue(maxsize=self._buffer_size)
+        self._buffers[key] = buffer
+        self._waiting[key] = (buffer, func)
+        self._start_waiting()
+
+    def take(self, key: t.Hashable) -> t.Iterator[T]:
+        """Yield the items of the iterator submitted under `key`.
+
+        Args:
+            key: Key the iterator was submitted with.
+
+        Yields:
+            Items in the order they were produced.
+
+        Raises:
+            BaseException: Any error raised by the iterator.
+        """
+        buffer = self._buffers.pop(key)
+        if key in self._waiting:
+            # Read before the iterators submitted ahead of it
+            self._start(*self._waiting.pop(key))
+        try:
+            while True:
+                item = buffer.get()
+                if isinstance(item, _Done):
+                    if item.error is not None:
+                        raise item.error
+                    return
+                yield item
+        finally:
+            self._started -= 1
+            self._start_waiting()
+
+    def cancel(self) -> None:
+        """Stop all workers and discard buffered items."""
+        self._cancelled.set()
+        self._buffers.clear()
+        self._waiting.clear()
+
+    def _start_waiting(self) -> None:
+        while self._waiting and (
+            self._max_started is None or self._started < self._max_started
+        ):
+            _, (buffer, func) = self._waiting.popitem(last=False)
+            self._start(buffer, func)
+
+    def _start(
+        self,
+        buffer: queue.Queue,
+        func: t.Callable[[], t.Iterable[T]],
+    ) -> None:
+        self._started += 1
+        self._pool.submit(partial(self._fill, buffer, func))
+
+    def _put(self, buffer: queue.Queue, item: object) -> bool:
+        while not self._cancelled.is_set():
+            try:
+                buffer.put(item, timeout=_POLL_SECONDS)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _fill(self, buffer: queue.Queue, func: t.Callable[[], t.Iterable[T]]) -> None:
+        try:
+            for item in func():
+                if not self._put(buffer, item):
+                    return
+        except BaseException as e:  # noqa: BLE001
+            self._put(buffer, _Done(e))
+        else:
+            self._put(buffer, _Done())
+
+
+class Race(t.Generic[T]):
+    """Run interchangeable jobs in a worker pool and keep the first to succeed.
+
+    Results of jobs that finish once the race is decided are discarded, e.g. to
+    release the connection of a response nobody will read.
+    """
+
+    def __init__(self, pool: WorkerPool, discard: t.Callable[[T], object]) -> None:
+        """Create a race.
+
+        Args:
+            pool: Worker pool to run jobs on.
+            discard: Called with each result that is not returned.
+        """
+        self._pool = pool
+        self._discard = discard
+        self._finished = threading.Condition()
+        self._results: list[T] = []
+        self._errors: list[Exception] = []
+        self._submitted = 0
+        self._decided = False
+
+    def submit(self, func: t.Callable[[], T]) -> None:
+        """Start a job.
+
+        Args:
+            func: Returns the result.
+        """
+        with self._finished:
+            self._submitted += 1
+        self._pool.submit(partial(self._run, func))
+
+    def result(self, timeout: float | None = None) -> T:
+        """Return the result of the first job to succeed.
+
+        Args:
+            timeout: Seconds to wait for a job to finish, or None to wait until
+                one succeeds or all failed.
+
+        Returns:
+            The result.
+
+        Raises:
+            TimeoutError: If no job finished within `timeout`.
+            Exception: The error of the last job, if all failed.
+        """
+        with self._finished:
+            if not self._finished.wait_for(self._is_finished, timeout):
+                raise TimeoutError
+            if not self._results:
+                raise self._errors[-1]
+            self._decided = True
+            result, *others = self._results
+        for other in others:
+            self._discard(other)
+        return result
+
+    def _is_finished(self) -> bool:
+        return bool(self._results) or len(self._errors) >= self._submitted
+
+    def _run(self, func: t.Callable[[], T]) -> None:
+        try:
+            result = func()
+        except Exception as e:  # noqa: BLE001
+            with self._finished:
+                self._errors.append(e)
+                self._finished.notify_all()
+            return
+        with self._finished:
+            if not self._decided:
+                self._results.append(result)
+                self._finished.notify_all()
+                return
+        self._discard(result)
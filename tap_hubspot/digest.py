@@ -0,0 +1,104 @@
+"""Local record digest store used to suppress unchanged records."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import typing as t
+from pathlib import Path
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+_MAX_QUERY_IDS = 500
+
+
+def record_digest(properties: t.Mapping[str, t.Any]) -> bytes:
+    """Return a stable digest for a mapping of property values.
+
+    Args:
+        properties: Property names and values to hash.
+
+    Returns:
+        A 16-byte BLAKE2b digest.
+    """
+    payload = json.dumps(
+        properties,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+
+class DigestStore:
+    """SQLite-backed mapping of (stream, record id) to record digest.
+
+    The store may be shared between threads; access to the connection is
+    serialised.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open (or create) the digest store at `path`.
+
+        Args:
+            path: Location of the SQLite database file.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS digests ("
+            "stream TEXT NOT NULL, "
+            "id TEXT NOT NULL, "
+            "digest BLOB NOT NULL, "
+            "PRIMARY KEY (stream, id)"
+            ") WITHOUT ROWID",
+        )
+        self._connection.commit()
+
+    def lookup(self, stream: str, ids: t.Collection[str]) -> dict[str, bytes]:
+        """Return stored digests for the given record ids.
+
+        Args:
+            stream: Stream name.
+            ids: Record ids to look up.
+
+        Returns:
+            A mapping of record id to digest, for ids present in the store.
+        """
+        found: dict[str, bytes] = {}
+        id_list = list(ids)
+        for start in range(0, len(id_list), _MAX_QUERY_IDS):
+            chunk = id_list[start : start + _MAX_QUERY_IDS]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT id, digest FROM digests "  # noqa: S608
+                    f"WHERE stream = ? AND id IN ({placeholders})",
+                    (stream, *chunk),
+                )
+                found.update(rows)
+        return found
+
+    def update(self, stream: str, digests: t.Mapping[str, bytes]) -> None:
+        """Insert or replace digests for a batch of records.
+
+        Args:
+            stream: Stream name.
+            digests: A mapping of record id to digest.
+        """
+        if not digests:
+            return
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO digests (stream, id, digest) VALUES (?, ?, ?)",
+                ((stream, id_, digest) for id_, digest in digests.items()),
+            )
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,169 @@
+"""Building RECORD messages in worker processes."""
+
+from __future__ import annotations
+
+import collections
+import functools
+import logging
+import multiprocessing
+import pickle
+import threading
+import typing as t
+
+from singer_sdk.helpers._catalog import pop_deselected_record_properties
+from singer_sdk.helpers._typing import conform_record_data_types
+from singer_sdk.helpers._util import utc_now
+from singer_sdk.singerlib import RecordMessage
+
+if t.TYPE_CHECKING:
+    from multiprocessing.pool import AsyncResult, Pool
+
+    from singer_sdk.helpers._typing import TypeConformanceLevel
+
+    from tap_hubspot.projection import Projection
+
+logger = logging.getLogger("tap-hubspot")
+
+
+class EncodingSpec(t.NamedTuple):
+    """What a worker needs to encode the records of a stream."""
+
+    stream: str
+    schema: dict
+    effective_schema: dict
+    mask: dict
+    level: TypeConformanceLevel
+    version: int | None
+    projection: Projection | None = None
+
+
+@functools.lru_cache(maxsize=16)
+def _load_spec(spec: bytes) -> EncodingSpec:
+    # Specs are sent pickled, so each worker only unpickles a schema once
+    return pickle.loads(spec)  # noqa: S301
+
+
+def encode_records(spec: bytes, records: list[dict]) -> list[RecordMessage]:
+    """Project records, conform them to the schema of their stream and wrap them.
+
+    Runs in a worker process.
+
+    Args:
+        spec: The pickled `EncodingSpec` of the stream.
+        records: Post-processed records.
+
+    Returns:
+        One RECORD message per record.
+    """
+    stream, schema, effective_schema, mask, level, version, projection = _load_spec(
+        spec,
+    )
+    if projection is not None:
+        records = [projection(record) for record in records]
+    messages = []
+    for record in records:
+        pop_deselected_record_properties(record, schema, mask)  # type: ignore[arg-type]
+        conformed = conform_record_data_types(
+            stream_name=stream,
+            record=record,
+            schema=effective_schema,
+            level=level,
+            logger=logger,
+        )
+        messages.append(
+            RecordMessage(
+                stream=stream,
+                record=conformed,
+                version=version,
+                time_extracted=utc_now(),
+            ),
+        )
+    return messages
+
+
+_pools: dict[int, Pool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_process_pool(processes: int) -> Pool:
+    """Return the process-wide pool of worker processes of the given size.
+
+    Workers are spawned rather than forked, as the tap runs threads of its own.
+
+    Args:
+        processes: Number of worker processes.
+
+    Returns:
+        A process pool shared by all streams.
+    """
+    with _pools_lock:
+        if processes not in _pools:
+            context = multiprocessing.get_context("spawn")
+            _pools[processes] = context.Pool(processes)
+        return _pools[processes]
+
+
+class RecordEncoder:
+    """Encodes a stream's records in worker processes, writing them in order.
+
+    Records are sent to the workers in batches, and their messages are written
+    with the tap's message writer in the order the records were put. Up to
+    `max_pending` batches are encoded at once, after which `put` waits for the
+    oldest one.
+    """
+
+    def __init__(
+        self,
+        pool: Pool,
+        spec: EncodingSpec,
+        write: t.Callable[[RecordMessage], None],
+        batch_size: int,
+        max_pending: int,
+    ) -> None:
+        """Create an encoder.
+
+        Args:
+            pool: Worker processes.
+            spec: What the workers need to encode the stream's records.
+            write: Writes a message, e.g. the tap's `write_message`.
+            batch_size: Number of records sent to a worker at once.
+            max_pending: Number of batches encoded at once.
+        """
+        self._pool = pool
+        self._spec = pickle.dumps(spec)
+        self._write_message = write
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        self._batch: list[dict] = []
+        self._pending: collections.deque[AsyncResult[list[RecordMessage]]] = (
+            collections.deque()
+        )
+
+    def put(self, record: dict) -> None:
+        """Queue a record to be encoded and written.
+
+        Args:
+            record: A post-processed record.
+        """
+        self._batch.append(record)
+        if len(self._batch) >= self._batch_size:
+            self._submit()
+            while len(self._pending) > self._max_pending:
+                self._write(self._pending.popleft().get())
+
+    def flush(self) -> None:
+        """Write all queued records, e.g. before a STATE message."""
+        if self._batch:
+            self._submit()
+        while self._pending:
+            self._write(self._pending.popleft().get())
+
+    def _submit(self) -> None:
+        self._pending.append(
+            self._pool.apply_async(encode_records, (self._spec, self._batch)),
+        )
+        self._batch = []
+
+    def _write(self, messages: list[RecordMessage]) -> None:
+        for message in messages:
+            self._write_message(message)
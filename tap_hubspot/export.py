@@ -0,0 +1,204 @@
+"""Bulk backfills through HubSpot CRM export jobs."""
+
+from __future__ import annotations
+
+import csv
+import datetime
+import io
+import tempfile
+import time
+import typing as t
+import zipfile
+
+import requests
+
+# https://developers.hubspot.com/docs/api/crm/exports
+EXPORT_PATH = "/exports/export/async"
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Seconds to wait for the bytes of an exported file
+DOWNLOAD_TIMEOUT = 300
+
+# Exported values of boolean properties, by how the API returns them
+_BOOLEANS = {"true": "true", "yes": "true", "false": "false", "no": "false"}
+
+# Callable sending an API request: (method, path, JSON body) -> decoded response
+ApiCall = t.Callable[[str, str, t.Optional[dict]], dict]
+
+# Callable requesting a file by URL, whose body is streamed
+Download = t.Callable[[str], requests.Response]
+
+
+def _download(url: str) -> requests.Response:
+    # The URL is pre-signed, so no API credentials are sent along
+    return requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT)
+
+
+class ExportError(RuntimeError):
+    """An export job failed or did not finish in time."""
+
+
+class CrmExport:
+    """Submit a CRM export job, wait for it and read back its records.
+
+    The exported file is spooled to a temporary file rather than held in memory,
+    and its rows are parsed one at a time.
+    """
+
+    def __init__(
+        self,
+        api: ApiCall,
+        *,
+        download: Download = _download,
+        poll_interval: float = 10.0,
+        timeout: float = 6 * 60 * 60,
+    ) -> None:
+        """Create an export client.
+
+        Args:
+            api: Sends requests to the CRM API.
+            download: Requests exported files by URL. Defaults to a request of
+                its own.
+            poll_interval: Seconds to wait between status checks.
+            timeout: Seconds to wait for the export to complete.
+        """
+        self.api = api
+        self.download = download
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def submit(
+        self,
+        object_type: str,
+        properties: t.Sequence[str],
+        filters: list[dict] | None = None,
+    ) -> str:
+        """Start exporting objects of a type.
+
+        Args:
+            object_type: CRM object type ID, e.g. `0-1` for contacts.
+            properties: Names of the properties to export.
+            filters: Search filters selecting the objects to export.
+
+        Returns:
+            The export task ID.
+        """
+        body: dict[str, t.Any] = {
+            "exportType": "VIEW",
+            "exportName": f"tap-hubspot {object_type}",
+            "format": "CSV",
+            "language": "EN",
+            "objectType": object_type,
+            "objectProperties": list(properties),
+        }
+        if filters:
+            body["publicCrmSearchRequest"] = {"filters": filters}
+        return str(self.api("POST", EXPORT_PATH, body)["id"])
+
+    def wait(self, task_id: str) -> str:
+        """Poll an export task until it completes.
+
+        Args:
+            task_id: The export task ID.
+
+        Returns:
+            The URL of the exported file.
+
+        Raises:
+            ExportError: If the export was cancelled or timed out.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            status = self.api("GET", f"{EXPORT_PATH}/tasks/{task_id}/status", None)
+            if status.get("status") == "COMPLETE":
+                return status["result"]
+            if status.get("status") == "CANCELED":
+                msg = f"Export {task_id} was cancelled"
+                raise ExportError(msg)
+            if time.monotonic() + self.poll_interval > deadline:
+                msg = f"Export {task_id} did not complete within {self.timeout}s"
+                raise ExportError(msg)
+            time.sleep(self.poll_interval)
+
+    def rows(self, url: str) -> t.Iterator[dict[str, str]]:
+        """Download an exported file and yield its rows.
+
+        Large exports are delivered as a ZIP archive of CSV files.
+
+        Args:
+            url: The URL of the exported file.
+
+        Yields:
+            One mapping of column header to value per row.
+        """
+        with tempfile.TemporaryFile() as spool:
+            with self.download(url) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(_CHUNK_SIZE):
+                    spool.write(chunk)
+
+            spool.seek(0)
+            if not zipfile.is_zipfile(spool):
+                spool.seek(0)
+                yield from _read_csv(spool)
+                return
+
+            with zipfile.ZipFile(spool) as archive:
+                for name in archive.namelist():
+                    if name.lower().endswith(".csv"):
+                        with archive.open(name) as member:
+                            yield from _read_csv(member)
+
+
+def _read_csv(file: t.IO[bytes]) -> t.Iterator[dict[str, str]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        # Leave closing the underlying file to its owner
+        text.detach()
+
+
+def normalise_value(value: str, property_type: str) -> str:
+    """Normalise an exported property value to how the API returns it.
+
+    Args:
+        value: The exported value.
+        property_type: The HubSpot type of the property, e.g. `datetime`.
+
+    Returns:
+        The value as the API returns it, or as exported if it cannot be parsed.
+    """
+    if property_type in {"datetime", "date"}:
+        return _normalise_date(value, date_only=property_type == "date")
+    if property_type == "number":
+        # Exports group the digits of large numbers
+        number = value.replace(",", "")
+        try:
+            float(number)
+        except ValueError:
+            return value
+        return number
+    if property_type == "bool":
+        return _BOOLEANS.get(value.lower(), value)
+    return value
+
+
+def _normalise_date(value: str, *, date_only: bool) -> str:
+    # Exported as epoch milliseconds or ISO 8601, without an offset for UTC
+    try:
+        if value.isdigit():
+            ts = datetime.datetime.fromtimestamp(
+                int(value) / 1000,
+                tz=datetime.timezone.utc,
+            )
+        else:
+            ts = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if date_only:
+        return ts.date().isoformat()
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=datetime.timezone.utc)
+    return ts.isoformat()
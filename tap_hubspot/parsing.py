@@ -0,0 +1,161 @@
+"""Incremental parsing of HubSpot list responses."""
+
+from __future__ import annotations
+
+import importlib.util
+import re
+import typing as t
+
+if t.TYPE_CHECKING:
+    import requests
+
+# Matches the `$[key][*]`, `$.key[*]` and `$[*]` record paths used by our streams
+_RECORDS_JSONPATH = re.compile(r"^\$(?:\[(\w+)\]|\.(\w+))?\[\*\]$")
+_NEXT_AFTER_PREFIX = "paging.next.after"
+_HISTORY_PREFIX = "results.item.propertiesWithHistory."
+
+
+def records_prefix(records_jsonpath: str) -> str | None:
+    """Translate a records JSONPath into an ijson item prefix.
+
+    Args:
+        records_jsonpath: The stream's records JSONPath expression.
+
+    Returns:
+        The ijson prefix, or None if the expression cannot be streamed.
+    """
+    match = _RECORDS_JSONPATH.match(records_jsonpath)
+    if not match:
+        return None
+    key = match.group(1) or match.group(2)
+    return f"{key}.item" if key else "item"
+
+
+def ijson_installed() -> bool:
+    """Return whether the optional `ijson` package is installed."""
+    return importlib.util.find_spec("ijson") is not None
+
+
+def _import_ijson() -> t.Any:  # noqa: ANN401
+    try:
+        import ijson  # noqa: PLC0415
+    except ImportError as e:
+        msg = "Streaming responses requires the 'ijson' package: pip install ijson"
+        raise RuntimeError(msg) from e
+    return ijson
+
+
+class StreamingPage:
+    """Records of a single response, decoded as the body is read.
+
+    Iterating yields each record as soon as it has been parsed, so only one
+    record is held in memory at a time. The `paging.next.after` cursor and the
+    last record are available from `next_after` and `last_record` once
+    iteration has finished.
+    """
+
+    def __init__(self, response: requests.Response, prefix: str) -> None:
+        """Wrap a response opened with `stream=True`.
+
+        Args:
+            response: The streamed response.
+            prefix: ijson prefix of the record items.
+        """
+        self.response = response
+        self.prefix = prefix
+        self.next_after: str | None = None
+        self.last_record: dict | None = None
+
+    def __iter__(self) -> t.Iterator[dict]:
+        """Yield records from the response body.
+
+        Raises:
+            RuntimeError: If the optional `ijson` package is not installed.
+        """
+        ijson = _import_ijson()
+        raw = self.response.raw
+        raw.decode_content = True
+        builder: t.Any = None
+        try:
+            for prefix, event, value in ijson.parse(raw):
+                if builder is not None:
+                    builder.event(event, value)
+                    if prefix == self.prefix and event == "end_map":
+                        self.last_record = builder.value
+                        yield builder.value
+                        builder = None
+                elif prefix == self.prefix and event == "start_map":
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                elif prefix == _NEXT_AFTER_PREFIX and event in {"string", "number"}:
+                    self.next_after = str(value)
+        finally:
+            self.response.close()
+
+
+def _decoded_history_rows(response: requests.Response) -> t.Iterator[dict]:
+    with response:
+        results = response.json().get("results") or []
+    for result in results:
+        for name, values in (result.get("propertiesWithHistory") or {}).items():
+            for value in values:
+                yield {"id": str(result["id"]), "property": name, **value}
+
+
+def history_rows(response: requests.Response) -> t.Iterator[dict]:
+    """Yield the property history of a batch read, as the body is read.
+
+    Each row is one value a property had, with the ID of its object. Rows are
+    yielded as soon as they have been parsed, unless the object's ID follows
+    its history in the response, in which case the rows of that one object are
+    held until the ID is read. Without the optional `ijson` package, the whole
+    body is decoded first.
+
+    Args:
+        response: A batch read response, opened with `stream=True`.
+
+    Yields:
+        Rows with the object ID, property name, value, timestamp and source.
+    """
+    if not ijson_installed():
+        yield from _decoded_history_rows(response)
+        return
+
+    ijson = _import_ijson()
+    raw = response.raw
+    raw.decode_content = True
+    object_id: str | None = None
+    held: list[dict] = []
+    builder: t.Any = None
+    try:
+        for prefix, event, value in ijson.parse(raw):
+            if builder is not None:
+                builder.event(event, value)
+                if event == "end_map" and prefix.startswith(_HISTORY_PREFIX):
+                    row = {
+                        "id": object_id,
+                        "property": prefix[len(_HISTORY_PREFIX) : -len(".item")],
+                        **builder.value,
+                    }
+                    builder = None
+                    if object_id is None:
+                        held.append(row)
+                    else:
+                        yield row
+            elif prefix == "results.item" and event == "start_map":
+                object_id = None
+            elif prefix == "results.item.id":
+                object_id = str(value)
+                for row in held:
+                    row["id"] = object_id
+                    yield row
+                held = []
+            elif (
+                event == "start_map"
+                and prefix.startswith(_HISTORY_PREFIX)
+                and prefix.endswith(".item")
+            ):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+    finally:
+        response.close()
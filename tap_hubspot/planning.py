@@ -0,0 +1,57 @@
+"""Estimating the volume of a sync before running it."""
+
+from __future__ import annotations
+
+import dataclasses
+import typing as t
+
+
+@dataclasses.dataclass
+class VolumeEstimate:
+    """Expected volume of syncing a stream.
+
+    Values are None where they cannot be estimated without syncing, e.g. for
+    streams that can only be listed.
+    """
+
+    stream: str
+    records: int | None = None
+    requests: int | None = None
+    bytes: int | None = None
+    seconds: float | None = None
+
+    def __add__(self, other: VolumeEstimate) -> VolumeEstimate:
+        """Return the combined estimate of two partitions of a stream."""
+        return VolumeEstimate(
+            self.stream,
+            *(
+                _add(getattr(self, field), getattr(other, field))
+                for field in ("records", "requests", "bytes", "seconds")
+            ),
+        )
+
+
+def _add(a: t.Any, b: t.Any) -> t.Any:  # noqa: ANN401
+    return None if a is None or b is None else a + b
+
+
+def summarize(estimates: t.Sequence[VolumeEstimate]) -> dict[str, t.Any]:
+    """Summarize the volume estimates of the streams to sync.
+
+    Args:
+        estimates: Estimates of each stream.
+
+    Returns:
+        The estimates, largest first, and their totals over the streams they are
+        known for.
+    """
+    estimates = sorted(estimates, key=lambda e: e.records or 0, reverse=True)
+    totals = {
+        field: sum(getattr(e, field) or 0 for e in estimates)
+        for field in ("records", "requests", "bytes", "seconds")
+    }
+    return {
+        "streams": [dataclasses.asdict(estimate) for estimate in estimates],
+        "total": totals,
+        "unknown": [e.stream for e in estimates if e.records is None],
+    }
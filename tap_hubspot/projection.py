@@ -0,0 +1,82 @@
+"""Flattening, renaming and projection of HubSpot object records."""
+
+from __future__ import annotations
+
+import typing as t
+
+
+class Projection:
+    """Compiled key map from HubSpot object records to emitted records.
+
+    Each emitted field is read either from the top level of a record or from its
+    `properties` object. Fields left out of the map, e.g. deselected ones, are
+    dropped, so a record is projected in a single pass over the emitted fields.
+    """
+
+    __slots__ = ("fields", "properties")
+
+    def __init__(
+        self,
+        fields: t.Iterable[tuple[str, str]],
+        properties: t.Iterable[tuple[str, str]] = (),
+    ) -> None:
+        """Build the key map.
+
+        Args:
+            fields: Emitted and source names of top-level fields.
+            properties: Emitted and source names of fields read from `properties`.
+        """
+        self.fields = tuple(fields)
+        self.properties = tuple(properties)
+
+    @classmethod
+    def compile(
+        cls,
+        emitted: t.Iterable[str],
+        fields: t.Container[str],
+        renames: t.Mapping[str, str],
+        *,
+        flatten: bool,
+    ) -> Projection:
+        """Compile the key map of the fields to emit.
+
+        Args:
+            emitted: Names of the fields to emit, after renaming.
+            fields: Names of the top-level fields of source records. Where a
+                property has the same name, the top-level field is read.
+            renames: New names of source fields, by source name.
+            flatten: Whether fields not at the top level of source records are
+                read from their `properties`.
+
+        Returns:
+            A projection.
+        """
+        sources = {new: old for old, new in renames.items()}
+        top_level = []
+        properties = []
+        for name in emitted:
+            source = sources.get(name, name)
+            if source in fields or not flatten:
+                top_level.append((name, source))
+            else:
+                properties.append((name, source))
+        return cls(top_level, properties)
+
+    def __call__(self, record: dict) -> dict:
+        """Return the projected record, leaving the source record unchanged.
+
+        Args:
+            record: A HubSpot object record.
+
+        Returns:
+            The fields to emit. Fields missing from the source are left out.
+        """
+        projected = {
+            name: record[source] for name, source in self.fields if source in record
+        }
+        if self.properties:
+            props = record.get("properties") or {}
+            for name, source in self.properties:
+                if source in props:
+                    projected[name] = props[source]
+        return projected
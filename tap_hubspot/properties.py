@@ -0,0 +1,87 @@
+"""Compact representation of HubSpot object properties."""
+
+from __future__ import annotations
+
+import typing as t
+
+
+class PropertyTable:
+    """Names and HubSpot types of an object's properties.
+
+    Holds two parallel tuples rather than one schema object per property, and
+    generates the JSON schema for the `properties` object on demand.
+    """
+
+    __slots__ = ("_json_schema", "_names_set", "names", "types")
+
+    def __init__(self, properties: t.Mapping[str, str]) -> None:
+        """Build the table from a mapping of property name to HubSpot type.
+
+        Args:
+            properties: Property names and their HubSpot types.
+        """
+        self.names: tuple[str, ...] = tuple(properties)
+        self.types: tuple[str, ...] = tuple(properties.values())
+        self._names_set = frozenset(self.names)
+        self._json_schema: dict | None = None
+
+    @classmethod
+    def from_json_schema(cls, schema: dict) -> PropertyTable:
+        """Build the table from the JSON schema of a `properties` object.
+
+        Used to trust the schema of an input catalog. HubSpot property types are
+        not known in that case, and are left empty.
+
+        Args:
+            schema: JSON schema of the `properties` object.
+
+        Returns:
+            A property table.
+        """
+        table = cls(dict.fromkeys(schema.get("properties", {}), ""))
+        table._json_schema = schema
+        return table
+
+    def __len__(self) -> int:
+        """Return the number of properties."""
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        """Return whether the table has a property called `name`."""
+        return name in self._names_set
+
+    def json_schema(self, type_schema: t.Callable[[str], dict]) -> dict:
+        """Return the JSON schema of the `properties` object.
+
+        The result is memoised; each distinct HubSpot type is translated once and
+        the resulting property schema shared between properties of that type.
+
+        Args:
+            type_schema: Returns the JSON schema for a HubSpot property type.
+
+        Returns:
+            A JSON schema dictionary.
+        """
+        if self._json_schema is None:
+            schemas = {type_: type_schema(type_) for type_ in set(self.types)}
+            self._json_schema = {
+                "type": ["object", "null"],
+                "properties": {
+                    name: schemas[type_] for name, type_ in zip(self.names, self.types)
+                },
+            }
+        return self._json_schema
+
+    def conform(self, values: dict[str, t.Any]) -> list[str]:
+        """Drop values for properties that are not in the table, in place.
+
+        Args:
+            values: A record's `properties` object.
+
+        Returns:
+            The names of the dropped properties.
+        """
+        unknown = [name for name in values if name not in self._names_set]
+        for name in unknown:
+            del values[name]
+        return unknown
@@ -0,0 +1,164 @@
+"""Client-side rate limiting of HubSpot API requests."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+import typing as t
+
+# How long a queued request waits before checking whether it is next
+_POLL_SECONDS = 0.5
+
+
+class RateLimiter:
+    """Thread-safe token bucket."""
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        """Create a bucket refilled at `rate` tokens per second.
+
+        Args:
+            rate: Tokens added per second.
+            burst: Bucket capacity. Defaults to one second's worth of tokens.
+        """
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.rate,
+        )
+        self._updated = now
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Block until `tokens` are available, then take them.
+
+        Args:
+            tokens: Number of tokens to take.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take `tokens` if they are available right now.
+
+        Args:
+            tokens: Number of tokens to take.
+
+        Returns:
+            True if the tokens were taken.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+
+class PriorityRateLimiter(RateLimiter):
+    """Token bucket handing each token to the heaviest request waiting for one.
+
+    While requests queue for tokens, the one with the largest weight, e.g. from
+    the stream with the largest backlog, goes first rather than whichever asked
+    first. Requests of equal weight are served in order.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:  # noqa: D107
+        super().__init__(rate, burst)
+        self._available = threading.Condition(self._lock)
+        self._waiting: list[tuple[float, int]] = []
+        self._sequence = itertools.count()
+
+    def acquire(self, tokens: float = 1, *, weight: float = 0) -> None:
+        """Block until `tokens` are available and no heavier request waits.
+
+        Args:
+            tokens: Number of tokens to take.
+            weight: Priority of the request, highest first.
+        """
+        entry = (-weight, next(self._sequence))
+        with self._available:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    if self._waiting[0] != entry:
+                        self._available.wait(_POLL_SECONDS)
+                        continue
+                    self._refill()
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    self._available.wait((tokens - self._tokens) / self.rate)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._available.notify_all()
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take `tokens` if they are available right now and no request waits.
+
+        Args:
+            tokens: Number of tokens to take.
+
+        Returns:
+            True if the tokens were taken.
+        """
+        with self._available:
+            if self._waiting:
+                return False
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+L = t.TypeVar("L", bound=RateLimiter)
+
+
+@t.overload
+def get_rate_limiter(key: str, rate: float) -> RateLimiter: ...
+
+
+@t.overload
+def get_rate_limiter(key: str, rate: float, limiter_type: type[L]) -> L: ...
+
+
+def get_rate_limiter(
+    key: str,
+    rate: float,
+    limiter_type: type[RateLimiter] = RateLimiter,
+) -> RateLimiter:
+    """Return the process-wide rate limiter for `key`, creating it if needed.
+
+    Streams share limiters by key, so all requests against one portal draw from
+    the same bucket.
+
+    Args:
+        key: Bucket key, e.g. a portal ID.
+        rate: Requests per second, used if the bucket does not exist yet.
+        limiter_type: Type of the bucket, used if it does not exist yet.
+
+    Returns:
+        The rate limiter.
+    """
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = limiter_type(rate)
+        return _limiters[key]
@@ -0,0 +1,214 @@
+"""Retry policy and circuit breakers for HubSpot API requests."""
+
+from __future__ import annotations
+
+import email.utils
+import random
+import threading
+import time
+import typing as t
+from http import HTTPStatus
+
+import requests
+from singer_sdk.exceptions import RetriableAPIError
+
+# Longest wait asked for by a response that is honoured as is
+MAX_RETRY_AFTER = 300.0
+
+# Smallest and largest waits before retrying, by kind of failure. Throttled
+# requests are retried soonest, as HubSpot's rate limits roll over in seconds.
+RETRY_WAITS: dict[str, tuple[float, float]] = {
+    "throttled": (1.0, 10.0),
+    "server": (2.0, 60.0),
+    "network": (5.0, 120.0),
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to an endpoint that keeps failing."""
+
+    def __init__(self, endpoint: str, retry_after: float) -> None:
+        """Create the error.
+
+        Args:
+            endpoint: The failing endpoint.
+            retry_after: Seconds until the endpoint is tried again.
+        """
+        super().__init__(
+            f"Endpoint {endpoint} keeps failing, retrying in {retry_after:.0f}s",
+        )
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+# Failures a partition may be retried after, once its requests gave up
+PARTITION_ERRORS = (
+    CircuitOpenError,
+    ConnectionResetError,
+    RetriableAPIError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+)
+
+
+def _get_response(exception: BaseException | None) -> requests.Response | None:
+    return getattr(exception, "response", None)
+
+
+def failure_kind(exception: BaseException | None) -> str:
+    """Classify a failed request by how it should be retried.
+
+    Args:
+        exception: The error the request failed with.
+
+    Returns:
+        A key of `RETRY_WAITS`.
+    """
+    response = _get_response(exception)
+    if response is None:
+        return "network"
+    if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        return "throttled"
+    return "server"
+
+
+def retry_after(exception: BaseException | None) -> float | None:
+    """Return how long the server asked to wait before retrying, if it did.
+
+    Besides `Retry-After`, HubSpot reports the interval of an exhausted rate
+    limit in its `X-HubSpot-RateLimit-*` headers. An open circuit is waited out.
+
+    Args:
+        exception: The error the request failed with.
+
+    Returns:
+        Seconds to wait, or None without a hint.
+    """
+    if isinstance(exception, CircuitOpenError):
+        return exception.retry_after
+    response = _get_response(exception)
+    if response is None:
+        return None
+
+    headers = response.headers
+    value = headers.get("Retry-After")
+    if value is not None:
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                date = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            seconds = date.timestamp() - time.time()
+        return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+    if headers.get("X-HubSpot-RateLimit-Remaining") == "0":
+        interval = headers.get("X-HubSpot-RateLimit-Interval-Milliseconds")
+        if interval and interval.isdigit():
+            return min(int(interval) / 1000, MAX_RETRY_AFTER)
+    return None
+
+
+def retry_waits(
+    waits: t.Mapping[str, tuple[float, float]] = RETRY_WAITS,
+) -> t.Generator[float, BaseException | None, None]:
+    """Wait generator of the backoff decorator, with decorrelated jitter.
+
+    Each wait is drawn between the smallest wait for the kind of failure and
+    three times the previous wait of that kind, so concurrent requests spread
+    out rather than retrying in lockstep. A wait asked for by the server is
+    never cut short.
+
+    Args:
+        waits: Smallest and largest waits, by kind of failure.
+
+    Yields:
+        Seconds to wait before the next try.
+    """
+    previous: dict[str, float] = {}
+    # Advance past backoff's initial send
+    exception = yield 0.0
+    while True:
+        kind = failure_kind(exception)
+        low, high = waits[kind]
+        wait = min(high, random.uniform(low, previous.get(kind, low) * 3))  # noqa: S311
+        previous[kind] = wait
+        exception = yield max(wait, retry_after(exception) or 0.0)
+
+
+class CircuitBreaker:
+    """Stop requesting an endpoint after repeated failures, for a while.
+
+    The circuit opens after `threshold` failures in a row. Once `cooldown`
+    seconds have passed, a single request is let through; the circuit closes if
+    it succeeds and opens again if it fails.
+    """
+
+    def __init__(self, endpoint: str, threshold: int, cooldown: float) -> None:
+        """Create a closed circuit.
+
+        Args:
+            endpoint: The endpoint guarded.
+            threshold: Failures in a row that open the circuit.
+            cooldown: Seconds the circuit stays open.
+        """
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    def check(self) -> None:
+        """Let a request through, unless the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the endpoint is not to be requested yet.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(self.endpoint, max(remaining, 0.0))
+            self._probing = True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit after too many."""
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(key: str, threshold: int, cooldown: float) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for `key`, creating it if needed.
+
+    Args:
+        key: The endpoint, and portal, guarded.
+        threshold: Failures in a row that open the circuit, if it is new.
+        cooldown: Seconds the circuit stays open, if it is new.
+
+    Returns:
+        The circuit breaker.
+    """
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(key, threshold, cooldown)
+        return _breakers[key]
@@ -0,0 +1,153 @@
+"""Splitting streams across tap processes, and merging their state."""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import datetime
+import json
+import sys
+import typing as t
+from pathlib import Path
+
+if sys.version_info < (3, 11):
+    from backports.datetime_fromisoformat import MonkeyPatch
+
+    MonkeyPatch.patch_fromisoformat()
+
+
+@dataclasses.dataclass(frozen=True)
+class Shard:
+    """One of `count` disjoint slices of a stream."""
+
+    index: int = 0
+    count: int = 1
+
+
+def object_id_range(
+    shard: Shard,
+    max_object_id: int,
+) -> tuple[int | None, int | None]:
+    """Return the `hs_object_id` range of a shard.
+
+    Shards only fit together if they split the same IDs, so `max_object_id` is
+    configured for all of them rather than found by each.
+
+    Args:
+        shard: The shard.
+        max_object_id: The highest object ID to split between shards.
+
+    Returns:
+        Inclusive lower and exclusive upper bounds, None where unbounded. The
+        last shard is open-ended, so it also takes objects created since.
+    """
+    width = -(-(max_object_id + 1) // shard.count)
+    lower = shard.index * width if shard.index else None
+    upper = (shard.index + 1) * width if shard.index < shard.count - 1 else None
+    return lower, upper
+
+
+def _sort_key(value: t.Any) -> tuple:  # noqa: ANN401
+    if isinstance(value, str):
+        try:
+            return (0, datetime.datetime.fromisoformat(value))
+        except ValueError:
+            pass
+    return (1, value)
+
+
+def _completed_value(bookmark: dict) -> t.Any:  # noqa: ANN401
+    # An interrupted shard has only synced up to where it started from
+    if "progress_markers" in bookmark:
+        return bookmark.get("starting_replication_value")
+    return bookmark.get("replication_key_value")
+
+
+# Bookmark keys not taken as they are from the first shard
+_MERGED_KEYS = frozenset(
+    ("progress_markers", "replication_key_value", "partitions", "object_id_partitions"),
+)
+
+
+def _merge_bookmarks(bookmarks: list[dict]) -> dict:
+    merged = {
+        key: value for key, value in bookmarks[0].items() if key not in _MERGED_KEYS
+    }
+    values = [_completed_value(bookmark) for bookmark in bookmarks]
+    if values and all(value is not None for value in values):
+        # Every shard has synced up to the earliest of their bookmarks
+        merged["replication_key_value"] = min(values, key=_sort_key)
+    return merged
+
+
+def merge_states(states: t.Sequence[dict]) -> dict:
+    """Merge the final states of shards into a single state.
+
+    Each stream and partition bookmark becomes the earliest bookmark any shard
+    reached for it, so a following unsharded sync resumes without gaps.
+
+    Args:
+        states: Singer state of each shard.
+
+    Returns:
+        The merged state.
+    """
+    streams: dict[str, list[dict]] = {}
+    for state in states:
+        for stream_name, bookmark in state.get("bookmarks", {}).items():
+            streams.setdefault(stream_name, []).append(bookmark)
+
+    bookmarks: dict[str, dict] = {}
+    for stream_name, stream_bookmarks in streams.items():
+        merged = _merge_bookmarks(stream_bookmarks)
+
+        # Each shard planned the object ID ranges of its own slice
+        planned = {
+            json.dumps(context, sort_keys=True): context
+            for bookmark in stream_bookmarks
+            for context in bookmark.get("object_id_partitions", [])
+        }
+        if planned:
+            merged["object_id_partitions"] = list(planned.values())
+
+        deferred = {
+            json.dumps(context, sort_keys=True): context
+            for bookmark in stream_bookmarks
+            for context in bookmark.get("deferred_partitions", [])
+        }
+        if deferred:
+            merged["deferred_partitions"] = list(deferred.values())
+
+        partitions: dict[str, list[dict]] = {}
+        contexts: dict[str, dict] = {}
+        for bookmark in stream_bookmarks:
+            for partition in bookmark.get("partitions", []):
+                key = json.dumps(partition.get("context"), sort_keys=True)
+                contexts[key] = partition.get("context")
+                partitions.setdefault(key, []).append(partition)
+        if partitions:
+            merged["partitions"] = [
+                {**_merge_bookmarks(partition_bookmarks), "context": contexts[key]}
+                for key, partition_bookmarks in partitions.items()
+            ]
+        bookmarks[stream_name] = merged
+
+    return {"bookmarks": bookmarks}
+
+
+def main(argv: t.Sequence[str] | None = None) -> None:
+    """Merge shard state files and print the result."""
+    parser = argparse.ArgumentParser(
+        prog="tap-hubspot-merge-state",
+        description="Merge the state files of tap-hubspot shards.",
+    )
+    parser.add_argument("states", nargs="+", type=Path, help="Shard state files")
+    args = parser.parse_args(argv)
+
+    states = [json.loads(path.read_text()) for path in args.states]
+    json.dump(merge_states(states), sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
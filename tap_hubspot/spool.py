@@ -0,0 +1,175 @@
+"""Disk-backed spooling of records between fetching and emission."""
+
+from __future__ import annotations
+
+import json
+import struct
+import threading
+import typing as t
+import zlib
+from pathlib import Path
+
+# Length and CRC-32 of each record, so records torn by a crash can be detected
+_HEADER = struct.Struct(">II")
+
+# How long a blocked reader or writer waits before checking on the other side
+_POLL_SECONDS = 0.5
+
+
+def _read_frame(file: t.BinaryIO) -> bytes | None:
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    length, crc = _HEADER.unpack(header)
+    data = file.read(length)
+    if len(data) < length or zlib.crc32(data) != crc:
+        return None
+    return data
+
+
+class Spool:
+    """Bounded FIFO of records in append-only segment files.
+
+    One thread writes records with `put` while another reads them back from
+    `records`, so the writer can get ahead of a slow reader by up to `max_bytes`
+    on disk. Segments are removed once read. Any left behind by a process that
+    crashed are read back first.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int,
+        segment_bytes: int | None = None,
+    ) -> None:
+        """Open a spool, replaying any segments left in its directory.
+
+        Args:
+            directory: Directory holding the segment files.
+            max_bytes: Size on disk above which the writer waits for the reader.
+            segment_bytes: Size at which a new segment is started. Defaults to a
+                quarter of `max_bytes`.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes or max(max_bytes // 4, 1)
+
+        self._lock = threading.Condition()
+        self._segments = sorted(self.directory.glob("*.seg"))
+        self._size = sum(path.stat().st_size for path in self._segments)
+        self._next_segment = int(self._segments[-1].stem) + 1 if self._segments else 0
+        self._file: t.BinaryIO | None = None
+        self._file_path: Path | None = None
+        self._file_size = 0
+        self._closed = False
+        self._cancelled = False
+        self._error: BaseException | None = None
+
+    def put(self, record: dict) -> bool:
+        """Append a record, waiting while the spool is full.
+
+        Args:
+            record: A JSON serializable record.
+
+        Returns:
+            False if the reader has stopped, so writing should stop too.
+        """
+        data = json.dumps(record, separators=(",", ":")).encode()
+        frame = _HEADER.pack(len(data), zlib.crc32(data)) + data
+        with self._lock:
+            while self._size >= self.max_bytes and not self._cancelled:
+                # Let the reader finish the current segment, and remove it
+                self._end_segment()
+                self._lock.wait(_POLL_SECONDS)
+            if self._cancelled:
+                return False
+
+            if self._file is None:
+                self._file_path = self.directory / f"{self._next_segment:08d}.seg"
+                self._next_segment += 1
+                self._file = self._file_path.open("ab")
+                self._file_size = 0
+                self._segments.append(self._file_path)
+            self._file.write(frame)
+            self._file.flush()
+            self._file_size += len(frame)
+            self._size += len(frame)
+            if self._file_size >= self.segment_bytes:
+                self._end_segment()
+            self._lock.notify_all()
+        return True
+
+    def close(self, error: BaseException | None = None) -> None:
+        """Mark the end of the records.
+
+        Args:
+            error: An error to raise to the reader once it has read all records.
+        """
+        with self._lock:
+            self._end_segment()
+            self._closed = True
+            self._error = error
+            self._lock.notify_all()
+
+    def records(self) -> t.Iterator[dict]:
+        """Read records in the order they were written, waiting for more.
+
+        If the reader stops early, the writer is stopped and unread segments are
+        left on disk, to be replayed by the next spool opened on the directory.
+
+        Yields:
+            Records, until the spool is closed and all records have been read.
+
+        Raises:
+            BaseException: The error the spool was closed with, if any.
+        """
+        try:
+            while True:
+                with self._lock:
+                    while not self._segments and not self._closed:
+                        self._lock.wait(_POLL_SECONDS)
+                    if not self._segments:
+                        break
+                    path = self._segments[0]
+
+                yield from self._read_segment(path)
+
+                with self._lock:
+                    self._segments.pop(0)
+                    self._size -= path.stat().st_size
+                    path.unlink()
+                    self._lock.notify_all()
+        finally:
+            with self._lock:
+                self._cancelled = True
+                self._lock.notify_all()
+
+        if self._error is not None:
+            raise self._error
+        self.directory.rmdir()
+
+    def _end_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._file_path = None
+
+    def _read_segment(self, path: Path) -> t.Iterator[dict]:
+        offset = 0
+        with path.open("rb") as file:
+            while True:
+                with self._lock:
+                    writing = path == self._file_path
+                file.seek(offset)
+                data = _read_frame(file)
+                if data is not None:
+                    offset = file.tell()
+                    yield json.loads(data)
+                elif not writing:
+                    # The end of the segment, or a record torn by a crash
+                    return
+                else:
+                    with self._lock:
+                        if path == self._file_path:
+                            self._lock.wait(_POLL_SECONDS)
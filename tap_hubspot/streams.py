@@ -41,6 +41,7 @@ class ContactStream(DynamicIncrementalHubspotStream):
     name = "contacts"
     path = "/objects/contacts"
     incremental_path = "/objects/contacts/search"
+    object_type_id = "0-1"
     primary_keys = ("id",)
     replication_key = "lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -68,6 +69,7 @@ class UsersStream(HubspotStream):
     path = "/users"
     primary_keys = ("id",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
+    snapshot_diff = True
 
     schema = PropertiesList(
         Property("id", StringType),
@@ -98,6 +100,7 @@ class OwnersStream(HubspotStream):
     path = "/owners"
     primary_keys = ("id",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
+    snapshot_diff = True
 
     schema = PropertiesList(
         Property("id", StringType),
@@ -132,6 +135,7 @@ class TicketPipelineStream(HubspotStream):
     path = "/pipelines/tickets"
     primary_keys = ("createdAt",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
+    snapshot_diff = True
 
     schema = PropertiesList(
         Property("label", StringType),
@@ -187,6 +191,7 @@ class DealPipelineStream(HubspotStream):
     path = "/pipelines/deals"
     primary_keys = ("createdAt",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
+    snapshot_diff = True
 
     schema = PropertiesList(
         Property("label", StringType),
@@ -242,6 +247,7 @@ class EmailSubscriptionStream(HubspotStream):
     path = "/subscriptions"
     primary_keys = ("id",)
     records_jsonpath = "$[subscriptionDefinitions][*]"  # Or override `parse_response`.
+    snapshot_diff = True
 
     schema = PropertiesList(
         Property("id", IntegerType),
@@ -476,6 +482,7 @@ class CompanyStream(DynamicIncrementalHubspotStream):
     name = "companies"
     path = "/objects/companies"
     incremental_path = "/objects/companies/search"
+    object_type_id = "0-2"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -502,6 +509,7 @@ class DealStream(DynamicIncrementalHubspotStream):
     name = "deals"
     path = "/objects/deals"
     incremental_path = "/objects/deals/search"
+    object_type_id = "0-3"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -527,6 +535,7 @@ class FeedbackSubmissionsStream(HubspotStream):
 
     name = "feedback_submissions"
     path = "/objects/feedback_submissions"
+    search_path = "/objects/feedback_submissions/search"
     primary_keys = ("id",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
 
@@ -571,6 +580,7 @@ class LineItemStream(DynamicIncrementalHubspotStream):
     name = "line_items"
     path = "/objects/line_items"
     incremental_path = "/objects/line_items/search"
+    object_type_id = "0-8"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -596,6 +606,7 @@ class ProductStream(HubspotStream):
 
     name = "products"
     path = "/objects/products"
+    search_path = "/objects/products/search"
     primary_keys = ("id",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
 
@@ -639,6 +650,7 @@ class TicketStream(HubspotStream):
 
     name = "tickets"
     path = "/objects/tickets"
+    search_path = "/objects/tickets/search"
     primary_keys = ("id",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
 
@@ -680,6 +692,7 @@ class QuoteStream(HubspotStream):
 
     name = "quotes"
     path = "/objects/quotes"
+    search_path = "/objects/quotes/search"
     primary_keys = ("id",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
 
@@ -723,6 +736,7 @@ class GoalStream(DynamicIncrementalHubspotStream):
     name = "goal_targets"
     path = "/objects/goal_targets"
     incremental_path = "/objects/goal_targets/search"
+    object_type_id = "0-74"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -748,6 +762,7 @@ class CallStream(DynamicIncrementalHubspotStream):
     name = "calls"
     path = "/objects/calls"
     incremental_path = "/objects/calls/search"
+    object_type_id = "0-48"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -773,6 +788,7 @@ class CommunicationStream(DynamicIncrementalHubspotStream):
     name = "communications"
     path = "/objects/communications"
     incremental_path = "/objects/communications/search"
+    object_type_id = "0-18"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -790,6 +806,7 @@ class EmailStream(DynamicIncrementalHubspotStream):
     name = "emails"
     path = "/objects/emails"
     incremental_path = "/objects/emails/search"
+    object_type_id = "0-49"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
@@ -814,6 +831,7 @@ class MeetingStream(DynamicIncrementalHubspotStream):
     name = "meetings"
     path = "/objects/meetings"
     incremental_path = "/objects/meetings/search"
+    object_type_id = "0-47"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -839,6 +857,7 @@ class NoteStream(DynamicIncrementalHubspotStream):
     name = "notes"
     path = "/objects/notes"
     incremental_path = "/objects/notes/search"
+    object_type_id = "0-46"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -864,6 +883,7 @@ class PostalMailStream(DynamicIncrementalHubspotStream):
     name = "postal_mail"
     path = "/objects/postal_mail"
     incremental_path = "/objects/postal_mail/search"
+    object_type_id = "0-116"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -889,6 +909,7 @@ class TaskStream(DynamicIncrementalHubspotStream):
     name = "tasks"
     path = "/objects/tasks"
     incremental_path = "/objects/tasks/search"
+    object_type_id = "0-27"
     primary_keys = ("id",)
     replication_key = "hs_lastmodifieddate"
     replication_method = "INCREMENTAL"
@@ -995,7 +1016,10 @@ class FormsStream(HubspotStream):
 
     @override
     def get_child_context(self, record, context):  # noqa: ANN001, ANN201
-        return {"form_id": record["id"]}
+        child_context = {"form_id": record["id"]}
+        if context and "portal_id" in context:
+            child_context["portal_id"] = context["portal_id"]
+        return child_context
 
 
 class FormSubmissionsStream(HubspotStream):
@@ -1006,6 +1030,8 @@ class FormSubmissionsStream(HubspotStream):
     path = "/form-integrations/v1/submissions/forms/{form_id}"
     primary_keys = ("conversionId",)
     records_jsonpath = "$[results][*]"  # Or override `parse_response`.
+    default_page_size = 50
+    max_page_size = 50  # max supported
 
     schema = th.PropertiesList(
         th.Property("conversionId", th.StringType),
@@ -1023,8 +1049,87 @@ class FormSubmissionsStream(HubspotStream):
         th.Property("pageUrl", th.URIReferenceType),
     ).to_dict()
 
+
+class ObjectSchemaStream(HubspotStream):
+    """https://developers.hubspot.com/docs/api/crm/crm-custom-objects.
+
+    Read by the tap to discover custom object streams, rather than synced.
+    """
+
+    name = "object_schemas"
+    path = "/schemas"
+    primary_keys = ("id",)
+    records_jsonpath = "$[results][*]"
+
+    schema = PropertiesList(
+        Property("id", StringType),
+        Property("objectTypeId", StringType),
+        Property("name", StringType),
+        Property("fullyQualifiedName", StringType),
+        Property(
+            "labels",
+            ObjectType(
+                Property("singular", StringType),
+                Property("plural", StringType),
+            ),
+        ),
+        Property("primaryDisplayProperty", StringType),
+        Property("archived", BooleanType),
+        Property("createdAt", DateTimeType),
+        Property("updatedAt", DateTimeType),
+    ).to_dict()
+
+    @property
+    def url_base(self) -> str:
+        """Returns an updated path which includes the api version."""
+        return "https://api.hubapi.com/crm/v3"
+
+
+class CustomObjectStream(DynamicIncrementalHubspotStream):
+    """https://developers.hubspot.com/docs/api/crm/crm-custom-objects.
+
+    Records of a custom object type, which is only known from the portal's object
+    schemas. Streams are named after the object type, and synced like other CRM
+    objects.
+    """
+
+    primary_keys = ("id",)
+    replication_key = "hs_lastmodifieddate"
+    replication_method = "INCREMENTAL"
+    records_jsonpath = "$[results][*]"
+
+    def __init__(
+        self,
+        tap: t.Any,  # noqa: ANN401
+        object_schema: dict,
+        properties: dict[str, str] | None = None,
+    ) -> None:
+        """Create the stream of a custom object type.
+
+        Args:
+            tap: The tap.
+            object_schema: The object type's schema, as read from the API.
+            properties: Types of the object type's properties by name, if they
+                were fetched already.
+        """
+        self.object_type_id = object_schema["objectTypeId"]
+        self.path = f"/objects/{self.object_type_id}"
+        self.incremental_path = f"{self.path}/search"
+        self._properties = properties
+        super().__init__(tap, name=object_schema["name"])
+
+    @property
+    def url_base(self) -> str:
+        """Returns an updated path which includes the api version."""
+        return "https://api.hubapi.com/crm/v3"
+
+    @property
+    def properties_object_type(self) -> str:
+        """Return the object type ID, as custom object names are not accepted."""
+        return t.cast("str", self.object_type_id)
+
     @override
-    def get_url_params(self, context, next_page_token):  # noqa: ANN001, ANN201
-        params = super().get_url_params(context, next_page_token)
-        params["limit"] = 50  # max supported
-        return params
+    def _get_available_properties(self) -> dict[str, str]:
+        if self._properties is not None:
+            return self._properties
+        return super()._get_available_properties()
@@ -2,10 +2,33 @@
 
 from __future__ import annotations
 
+import json
+import sys
+import typing as t
+from functools import partial
+
+import click
 from singer_sdk import Tap
 from singer_sdk import typing as th  # JSON schema typing helpers
+from singer_sdk.exceptions import ConfigValidationError
 
 from tap_hubspot import streams
+from tap_hubspot.client import (
+    DynamicIncrementalHubspotStream,
+    HubspotStream,
+    PropertyHistoryStream,
+    PropertyStream,
+)
+from tap_hubspot.concurrency import Prefetcher, get_worker_pool
+from tap_hubspot.planning import summarize
+from tap_hubspot.shards import Shard
+from tap_hubspot.streams import CustomObjectStream
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+    from singer_sdk.singerlib import Catalog
+    from singer_sdk.streams import Stream
 
 
 class TapHubspot(Tap):
@@ -13,6 +36,14 @@ class TapHubspot(Tap):
 
     name = "tap-hubspot"
 
+    # Shard settings given on the command line, which override the config
+    cli_shard_settings: t.ClassVar[dict[str, int]] = {}
+
+    # Streams synced before the others, in order, when scheduled by backlog
+    schedule: t.Sequence[HubspotStream] = ()
+
+    _shards_checked = False
+
     config_jsonschema = th.PropertiesList(
         th.Property(
             "access_token",
@@ -38,6 +69,33 @@ class TapHubspot(Tap):
             required=False,
             description="The OAuth app refresh token.",
         ),
+        th.Property(
+            "token_cache_path",
+            th.StringType,
+            required=False,
+            description=(
+                "Path to a file in which OAuth access tokens are cached between "
+                "runs and shared between concurrent processes."
+            ),
+        ),
+        th.Property(
+            "portals",
+            th.ArrayType(
+                th.ObjectType(
+                    th.Property("portal_id", th.StringType, required=True),
+                    th.Property("access_token", th.StringType),
+                    th.Property("client_id", th.StringType),
+                    th.Property("client_secret", th.StringType),
+                    th.Property("refresh_token", th.StringType),
+                ),
+            ),
+            required=False,
+            description=(
+                "Portals to sync, each with its own access token or OAuth "
+                "credentials. Records are emitted with a `portal_id` field, and "
+                "state is kept per portal."
+            ),
+        ),
         th.Property(
             "start_date",
             th.DateTimeType,
@@ -48,41 +106,744 @@ class TapHubspot(Tap):
             th.DateTimeType,
             description="Latest record date to sync",
         ),
+        th.Property(
+            "max_workers",
+            th.IntegerType,
+            default=1,
+            description=(
+                "Number of worker threads fetching stream partitions, e.g. "
+                "portals, ahead of emission. Workers are shared by all streams."
+            ),
+        ),
+        th.Property(
+            "transform_processes",
+            th.IntegerType,
+            default=1,
+            description=(
+                "Number of worker processes conforming records of incremental CRM "
+                "object streams to their schema and encoding them as messages, "
+                "which are still emitted in order. Streams with stream maps are "
+                "encoded in the tap's own process."
+            ),
+        ),
+        th.Property(
+            "max_requests_per_second",
+            th.NumberType,
+            required=False,
+            description="Maximum number of API requests per second, per portal.",
+        ),
+        th.Property(
+            "search_requests_per_second",
+            th.NumberType,
+            required=False,
+            description=(
+                "Maximum number of search API requests per second, per portal. "
+                "Streams waiting for the search quota are served by estimated "
+                "backlog, times their priority, when `schedule_by_backlog` is set."
+            ),
+        ),
+        th.Property(
+            "schedule_by_backlog",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Estimate the records each selected stream has to sync before the "
+                "sync starts, and sync the largest backlogs first. With "
+                "`max_workers` above one, partitions of all streams are fetched "
+                "ahead in that order, up to twice as many as there are workers."
+            ),
+        ),
+        th.Property(
+            "stream_priorities",
+            th.ObjectType(additional_properties=th.NumberType),
+            required=False,
+            description=(
+                "Weights of stream backlogs when scheduling by backlog, by stream "
+                "name. Defaults to 1."
+            ),
+        ),
+        th.Property(
+            "circuit_breaker_threshold",
+            th.IntegerType,
+            default=10,
+            description=(
+                "Number of failed requests in a row, per endpoint and portal, after "
+                "which the endpoint is no longer requested until "
+                "`circuit_breaker_cooldown` has passed. 0 disables this."
+            ),
+        ),
+        th.Property(
+            "circuit_breaker_cooldown",
+            th.NumberType,
+            default=60,
+            description=(
+                "Seconds an endpoint that keeps failing is left alone, before a "
+                "single request tries it again."
+            ),
+        ),
+        th.Property(
+            "partition_retries",
+            th.IntegerType,
+            default=1,
+            description=(
+                "Number of times a stream partition, e.g. a portal or object ID "
+                "range, is synced again once its requests gave up retrying, or "
+                "found the circuit of their endpoint open."
+            ),
+        ),
+        th.Property(
+            "defer_failed_partitions",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Leave partitions that still fail after `partition_retries` to the "
+                "next sync, with their bookmarks unchanged, rather than failing the "
+                "sync. The next sync syncs them before any other partition."
+            ),
+        ),
+        th.Property(
+            "object_id_range_size",
+            th.IntegerType,
+            required=False,
+            description=(
+                "When set, full-table syncs of CRM object streams and initial syncs "
+                "of incremental ones are split into `hs_object_id` ranges of at "
+                "most this many records (up to 10000), synced as separate "
+                "partitions. Once all were synced, incremental syncs resume from "
+                "the earliest bookmark of the ranges."
+            ),
+        ),
+        th.Property(
+            "shard_index",
+            th.IntegerType,
+            default=0,
+            description=(
+                "Index of the slice of incremental CRM object streams synced by "
+                "this process, from 0 to `shard_count - 1`."
+            ),
+        ),
+        th.Property(
+            "shard_count",
+            th.IntegerType,
+            default=1,
+            description=(
+                "Number of processes splitting incremental CRM object streams "
+                "between them by `hs_object_id` range. Other streams are only "
+                "synced by shard 0."
+            ),
+        ),
+        th.Property(
+            "shard_max_object_ids",
+            th.ObjectType(additional_properties=th.IntegerType),
+            required=False,
+            description=(
+                "Highest `hs_object_id` to split between shards, by incremental "
+                "CRM object stream name, as reported by `--plan`. Required with "
+                "`shard_count` above one, and the same for every shard. Objects "
+                "created since go to the last shard."
+            ),
+        ),
+        th.Property(
+            "adaptive_page_size",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Adapt the page size of each stream to observed response latency, "
+                "size and rate limiting, within each endpoint's maximum."
+            ),
+        ),
+        th.Property(
+            "adaptive_timeouts",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Time requests out after four times the 99th percentile of the "
+                "endpoint's recent response times, between 15 and 300 seconds."
+            ),
+        ),
+        th.Property(
+            "hedge_requests",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Send a duplicate of a list or search page request that takes "
+                "longer than the 95th percentile of the endpoint's recent response "
+                "times, and use whichever response arrives first. Duplicates are "
+                "only sent while the rate limits leave room for them, and never "
+                "when replaying a cassette."
+            ),
+        ),
+        th.Property(
+            "stream_responses",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Decode records incrementally as each response body is read, so "
+                "memory use depends on record size rather than page size. "
+                "Requires the 'ijson' package of the 'streaming' extra, without "
+                "which whole responses are decoded."
+            ),
+        ),
+        th.Property(
+            "spool_path",
+            th.StringType,
+            required=False,
+            description=(
+                "Directory in which fetched records are spooled before they are "
+                "emitted, so fetching carries on while the target is slow. Records "
+                "left over from an interrupted sync are emitted first on the next."
+            ),
+        ),
+        th.Property(
+            "spool_max_bytes",
+            th.IntegerType,
+            default=1024**3,
+            description=(
+                "Size on disk of the spool of each partition being fetched, above "
+                "which fetching waits for emission to catch up."
+            ),
+        ),
+        th.Property(
+            "snapshot_diff",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Keep a hash of each record of small reference streams, e.g. "
+                "owners and pipelines, in state, and only emit records whose hash "
+                "changed since the last sync."
+            ),
+        ),
+        th.Property(
+            "flatten_properties",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Emit the `properties` of CRM object records as top-level fields, "
+                "rather than flattening them with stream maps. Top-level fields "
+                "take precedence over properties of the same name."
+            ),
+        ),
+        th.Property(
+            "field_renames",
+            th.ObjectType(
+                additional_properties=th.ObjectType(
+                    additional_properties=th.StringType,
+                ),
+            ),
+            required=False,
+            description=(
+                "New names of the fields of CRM object streams, by stream name and "
+                "field name. Properties can be renamed once flattened. Primary "
+                "and replication keys cannot be renamed."
+            ),
+        ),
+        th.Property(
+            "property_history",
+            th.ObjectType(additional_properties=th.ArrayType(th.StringType)),
+            required=False,
+            description=(
+                "Properties whose history to sync, by incremental CRM object "
+                "stream name. Each stream gets a `<stream>_property_history` "
+                "stream of one row per property value, of objects changed since "
+                "its bookmark."
+            ),
+        ),
+        th.Property(
+            "custom_objects",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Discover a stream for each custom object type, named after it, "
+                "from the object schemas of the portal. Needs the "
+                "`crm.schemas.custom.read` scope. Only one portal can be synced "
+                "with custom object types."
+            ),
+        ),
+        th.Property(
+            "digest_store_path",
+            th.StringType,
+            required=False,
+            description=(
+                "Path to a local SQLite file of record digests. When set, "
+                "incremental CRM object streams skip records whose selected "
+                "properties have not changed since they were last emitted, with "
+                "a STATE message following them."
+            ),
+        ),
+        th.Property(
+            "export_backfill",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Backfill incremental CRM object streams without a bookmark from a "
+                "CRM export job, rather than paging through the API. Incremental "
+                "search then takes over from when the export was requested."
+            ),
+        ),
+        th.Property(
+            "change_feed_path",
+            th.StringType,
+            required=False,
+            description=(
+                "Path to a JSONL file, or a directory of them, of captured HubSpot "
+                "webhook events. When set, incremental CRM object streams with a "
+                "bookmark only fetch the objects named by events since, by ID in "
+                "batches, rather than searching for changes."
+            ),
+        ),
+        th.Property(
+            "change_feed_lag",
+            th.NumberType,
+            default=300,
+            description=(
+                "Seconds before the bookmark from which change feed events are "
+                "read, so that events delivered late, or out of order, are not "
+                "missed."
+            ),
+        ),
+        th.Property(
+            "resync_ids",
+            th.ObjectType(
+                additional_properties=th.OneOf(
+                    th.ArrayType(th.StringType),
+                    th.StringType,
+                ),
+            ),
+            required=False,
+            description=(
+                "IDs of records to re-sync, by CRM object stream name: a list of "
+                "IDs, or the path of a file with one ID per line. When set, only "
+                "these streams are synced, only the given records are fetched, and "
+                "replication state is left as it was. Only one portal can be "
+                "re-synced at a time."
+            ),
+        ),
+        th.Property(
+            "capture_path",
+            th.StringType,
+            required=False,
+            description=(
+                "Path of a gzipped cassette file the API responses of the sync are "
+                "captured to, for replay. Credentials are left out, and string "
+                "values other than names, IDs, numbers and dates are replaced with "
+                "hashes of the same length. Responses that are not JSON, e.g. "
+                "export files, are not captured."
+            ),
+        ),
+        th.Property(
+            "replay_path",
+            th.StringType,
+            required=False,
+            description=(
+                "Path of a cassette file to serve API responses from, instead of "
+                "sending requests to HubSpot. Requests must match those captured."
+            ),
+        ),
+        th.Property(
+            "replay_latency_factor",
+            th.NumberType,
+            default=0,
+            description=(
+                "Multiple of the captured latency of each response to wait for "
+                "before serving it, when replaying a cassette."
+            ),
+        ),
     ).to_dict()
 
-    def discover_streams(self) -> list[streams.HubspotStream]:
+    @classmethod
+    def invoke(
+        cls,
+        *,
+        shard_index: int | None = None,
+        shard_count: int | None = None,
+        plan: bool = False,
+        **kwargs: t.Any,
+    ) -> None:
+        """Invoke the tap's command line interface.
+
+        Args:
+            shard_index: Index of the shard to sync.
+            shard_count: Number of shards.
+            plan: Estimate the volume of the sync rather than running it.
+            kwargs: Keyword arguments for `Tap.invoke`.
+        """
+        if shard_index is not None:
+            cls.cli_shard_settings["shard_index"] = shard_index
+        if shard_count is not None:
+            cls.cli_shard_settings["shard_count"] = shard_count
+        if plan:
+            cls.invoke_plan(**kwargs)
+        else:
+            super().invoke(**kwargs)
+
+    @classmethod
+    def invoke_plan(
+        cls,
+        *,
+        config: tuple[str, ...] = (),
+        state: Path | None = None,
+        catalog: Path | None = None,
+        **kwargs: t.Any,  # noqa: ARG003
+    ) -> None:
+        """Print the volume estimates of a sync as JSON.
+
+        Args:
+            config: Configuration file locations, or 'ENV'.
+            state: Bookmarks file to estimate from.
+            catalog: Catalog file selecting the streams to estimate.
+            kwargs: Other command line arguments, which are ignored.
+        """
+        config_files, parse_env_config = cls.config_from_cli_args(*config)
+        tap = cls(
+            config=config_files,  # type: ignore[arg-type]
+            state=state,
+            catalog=catalog,
+            parse_env_config=parse_env_config,
+            setup_mapper=False,
+        )
+        json.dump(tap.plan(), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    def plan(self) -> dict[str, t.Any]:
+        """Estimate the records, requests, bytes and duration of a sync.
+
+        Returns:
+            The estimates of each selected stream, largest first, and totals, and
+            the highest object IDs for shards to split streams on.
+        """
+        selected = [
+            stream
+            for stream in self.streams.values()
+            if isinstance(stream, HubspotStream)
+            and stream.selected
+            and stream.parent_stream_type is None
+        ]
+        plan = summarize([stream.estimate_volume() for stream in selected])
+        # For shards to split streams on, as they must all split the same IDs
+        plan["shard_max_object_ids"] = {
+            stream.name: stream.get_max_object_id()
+            for stream in selected
+            if isinstance(stream, DynamicIncrementalHubspotStream)
+            and getattr(stream, "incremental_path", None)
+        }
+        return plan
+
+    @property
+    def streams(self) -> dict[str, Stream]:
+        """Return the streams of the tap, in the order they are synced in.
+
+        Streams scheduled by backlog go first, and the others after them in their
+        usual order.
+        """
+        streams = super().streams
+        if not self.schedule:
+            return streams
+        return {**{stream.name: stream for stream in self.schedule}, **streams}
+
+    def load_state(self, state: dict[str, t.Any]) -> None:
+        """Load the state to sync from, and schedule streams by backlog from it.
+
+        Streams are only scheduled if `schedule_by_backlog` is set.
+
+        Args:
+            state: The state to sync from.
+        """
+        super().load_state(state)
+        if self.config.get("schedule_by_backlog"):
+            self.schedule = self._schedule_streams()
+
+    def check_shards(self) -> None:
+        """Check that every selected stream can be split across shards.
+
+        This is done once, when the first stream is synced, so that no stream is
+        synced if a shard cannot be split.
+        """
+        if self._shards_checked or self.shard.count == 1:
+            return
+        self._shards_checked = True
+        for stream in self.streams.values():
+            if stream.selected and isinstance(stream, DynamicIncrementalHubspotStream):
+                _ = stream.shard_max_object_id
+
+    def _schedule_streams(self) -> list[HubspotStream]:
+        """Return the streams to sync by estimated backlog, largest first.
+
+        Streams whose backlog cannot be estimated are synced after the others,
+        in their usual order. With `max_workers` above one, the partitions of
+        the scheduled streams are all fetched ahead in the same order, once the
+        first of them is synced.
+        """
+        scheduled = [
+            stream
+            for stream in self.streams.values()
+            if isinstance(stream, HubspotStream)
+            and stream.selected
+            and stream.parent_stream_type is None
+        ]
+        for stream in scheduled:
+            stream.backlog = stream.estimate_volume().records
+        scheduled.sort(
+            key=lambda s: (s.backlog is None, -s.priority * (s.backlog or 0)),
+        )
+        self.logger.info(
+            "Syncing streams by backlog: %s",
+            ", ".join(f"{s.name} ({s.backlog})" for s in scheduled),
+        )
+        return scheduled
+
+    @classmethod
+    def get_singer_command(cls) -> click.Command:
+        """Add sharding and planning options to the standard tap command.
+
+        Returns:
+            A click.Command object.
+        """
+        command = super().get_singer_command()
+        command.params.extend(
+            [
+                click.Option(
+                    ["--shard-index"],
+                    type=click.IntRange(min=0),
+                    help="Index of the shard to sync, from 0.",
+                ),
+                click.Option(
+                    ["--shard-count"],
+                    type=click.IntRange(min=1),
+                    help="Number of processes splitting the sync between them.",
+                ),
+                click.Option(
+                    ["--plan"],
+                    is_flag=True,
+                    help=(
+                        "Estimate the records, requests, bytes and duration of "
+                        "the sync, without running it."
+                    ),
+                ),
+            ],
+        )
+        return command
+
+    @property
+    def shard(self) -> Shard:
+        """Return the shard synced by this process.
+
+        Raises:
+            ConfigValidationError: If the shard index is out of range.
+        """
+        settings = {**self.config, **self.cli_shard_settings}
+        shard = Shard(
+            settings.get("shard_index") or 0,
+            settings.get("shard_count") or 1,
+        )
+        if not 0 <= shard.index < shard.count:
+            msg = f"Shard index {shard.index} is out of range for {shard.count} shards"
+            raise ConfigValidationError(msg)
+        return shard
+
+    def discover_streams(self) -> list[HubspotStream]:
         """Return a list of discovered streams.
 
+        When a catalog is provided, only selected streams (and the parents of
+        selected child streams) are initialized. Shards other than the first only
+        sync streams that can be sharded, and re-syncs only sync the streams
+        records are re-synced for.
+
         Returns:
             A list of discovered streams.
+
+        Raises:
+            ConfigValidationError: If records are to be re-synced for streams
+                that are not CRM object streams.
+        """
+        stream_types = STREAM_TYPES
+        if self.shard.index > 0:
+            stream_types = tuple(
+                stream_type
+                for stream_type in stream_types
+                if issubclass(stream_type, DynamicIncrementalHubspotStream)
+                and getattr(stream_type, "incremental_path", None)
+            )
+        if self.input_catalog is not None:
+            selected = {
+                stream_type
+                for stream_type in STREAM_TYPES
+                if self._is_selected_in_catalog(stream_type.name)  # type: ignore[misc]
+            }
+            for stream_type in list(selected):
+                parent_type = stream_type.parent_stream_type
+                while parent_type is not None:
+                    selected.add(parent_type)  # type: ignore[arg-type]
+                    parent_type = parent_type.parent_stream_type
+            stream_types = tuple(st for st in stream_types if st in selected)
+        object_schemas = self._get_custom_object_schemas()
+        if resync_ids := self.config.get("resync_ids"):
+            # Record IDs are only unique within a portal
+            if len(self.config.get("portals") or []) > 1:
+                msg = "Cannot re-sync records of more than one portal at a time"
+                raise ConfigValidationError(msg)
+            resync_types = {
+                stream_type
+                for stream_type in STREAM_TYPES
+                if _is_crm_object_stream(stream_type) and stream_type.name in resync_ids  # type: ignore[misc]
+            }
+            names = {st.name for st in resync_types}  # type: ignore[misc]
+            names.update(object_schema["name"] for object_schema in object_schemas)
+            if unknown := set(resync_ids) - names:
+                msg = f"Cannot re-sync records of streams: {', '.join(sorted(unknown))}"
+                raise ConfigValidationError(msg)
+            stream_types = tuple(st for st in stream_types if st in resync_types)
+            object_schemas = [s for s in object_schemas if s["name"] in resync_ids]
+
+        discovered = [stream_type(self) for stream_type in stream_types]
+        discovered.extend(self._discover_custom_object_streams(object_schemas))
+        if self.shard.index == 0 and not resync_ids:
+            discovered.extend(self._discover_history_streams(discovered))
+        return discovered
+
+    def _get_custom_object_schemas(self) -> list[dict]:
+        """Return the schemas of the custom object types to discover streams for.
+
+        Types named like a built-in stream are left out, as are types not
+        selected in the input catalog.
+        """
+        if not self.config.get("custom_objects"):
+            return []
+        # Portals have object types of their own, with IDs of their own
+        if len(self.config.get("portals") or []) > 1:
+            msg = "Cannot discover custom object types of more than one portal"
+            raise ConfigValidationError(msg)
+
+        names = {stream_type.name for stream_type in STREAM_TYPES}  # type: ignore[misc]
+        object_schemas = []
+        for object_schema in streams.ObjectSchemaStream(self).get_records(None):
+            name = object_schema["name"]
+            if object_schema.get("archived"):
+                continue
+            if name in names:
+                self.logger.warning(
+                    "Custom object type '%s' is named like a built-in stream, "
+                    "and was left out",
+                    name,
+                )
+                continue
+            if self.input_catalog is not None and not self._is_selected_in_catalog(
+                name,
+            ):
+                continue
+            object_schemas.append(object_schema)
+        return object_schemas
+
+    def _discover_custom_object_streams(
+        self,
+        object_schemas: list[dict],
+    ) -> list[CustomObjectStream]:
+        """Return the streams of custom object types.
+
+        Without an input catalog, the properties of each type are fetched
+        concurrently by `max_workers` threads, rather than one type at a time as
+        each stream's schema is built.
         """
+        if self.input_catalog is not None or not object_schemas:
+            return [CustomObjectStream(self, s) for s in object_schemas]
+
+        property_streams = {
+            s["objectTypeId"]: PropertyStream(self, s["objectTypeId"])
+            for s in object_schemas
+        }
+        prefetcher: Prefetcher[dict] = Prefetcher(
+            get_worker_pool(int(self.config.get("max_workers") or 1), "schemas"),
+            PropertyStream.prefetch_buffer_size,
+        )
+        try:
+            for type_id, property_stream in property_streams.items():
+                prefetcher.submit(type_id, partial(property_stream.get_records, None))
+            properties = {
+                type_id: {
+                    prop["name"]: prop["type"] for prop in prefetcher.take(type_id)
+                }
+                for type_id in property_streams
+            }
+        finally:
+            prefetcher.cancel()
         return [
-            streams.ContactStream(self),
-            streams.UsersStream(self),
-            streams.OwnersStream(self),
-            streams.TicketPipelineStream(self),
-            streams.DealPipelineStream(self),
-            streams.EmailSubscriptionStream(self),
-            streams.PropertyNotesStream(self),
-            streams.CompanyStream(self),
-            streams.DealStream(self),
-            streams.FeedbackSubmissionsStream(self),
-            streams.LineItemStream(self),
-            streams.ProductStream(self),
-            streams.TicketStream(self),
-            streams.QuoteStream(self),
-            streams.GoalStream(self),
-            streams.CallStream(self),
-            streams.CommunicationStream(self),
-            streams.EmailStream(self),
-            streams.MeetingStream(self),
-            streams.NoteStream(self),
-            streams.PostalMailStream(self),
-            streams.TaskStream(self),
-            streams.FormsStream(self),
-            streams.FormSubmissionsStream(self),
+            CustomObjectStream(self, s, properties[s["objectTypeId"]])
+            for s in object_schemas
         ]
 
+    def _discover_history_streams(
+        self,
+        discovered: list[HubspotStream],
+    ) -> list[PropertyHistoryStream]:
+        history = self.config.get("property_history") or {}
+        stream_types = {
+            stream_type.name: stream_type  # type: ignore[misc]
+            for stream_type in STREAM_TYPES
+            if issubclass(stream_type, DynamicIncrementalHubspotStream)
+            and getattr(stream_type, "incremental_path", None)
+        }
+        if unknown := set(history) - set(stream_types):
+            msg = (
+                "Cannot sync the property history of streams: "
+                f"{', '.join(sorted(unknown))}"
+            )
+            raise ConfigValidationError(msg)
+
+        object_streams = {stream.name: stream for stream in discovered}
+        history_streams = []
+        for name, properties in history.items():
+            if self.input_catalog is not None and not self._is_selected_in_catalog(
+                f"{name}_property_history",
+            ):
+                continue
+            object_stream = object_streams.get(name) or stream_types[name](self)
+            history_streams.append(
+                PropertyHistoryStream(
+                    self,
+                    t.cast("DynamicIncrementalHubspotStream", object_stream),
+                    properties,
+                ),
+            )
+        return history_streams
+
+    def _is_selected_in_catalog(self, stream_name: str) -> bool:
+        entry = t.cast("Catalog", self.input_catalog).get_stream(stream_name)
+        if entry is None:
+            return False
+        return entry.metadata.resolve_selection().get((), False)
+
+
+def _is_crm_object_stream(stream_type: type[streams.HubspotStream]) -> bool:
+    path = getattr(stream_type, "path", None)
+    return isinstance(path, str) and path.startswith("/objects/")
+
+
+STREAM_TYPES: tuple[type[streams.HubspotStream], ...] = (
+    streams.ContactStream,
+    streams.UsersStream,
+    streams.OwnersStream,
+    streams.TicketPipelineStream,
+    streams.DealPipelineStream,
+    streams.EmailSubscriptionStream,
+    streams.PropertyNotesStream,
+    streams.CompanyStream,
+    streams.DealStream,
+    streams.FeedbackSubmissionsStream,
+    streams.LineItemStream,
+    streams.ProductStream,
+    streams.TicketStream,
+    streams.QuoteStream,
+    streams.GoalStream,
+    streams.CallStream,
+    streams.CommunicationStream,
+    streams.EmailStream,
+    streams.MeetingStream,
+    streams.NoteStream,
+    streams.PostalMailStream,
+    streams.TaskStream,
+    streams.FormsStream,
+    streams.FormSubmissionsStream,
+)
+
 
 if __name__ == "__main__":
     TapHubspot.cli()
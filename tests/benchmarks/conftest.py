@@ -0,0 +1,96 @@
+"""Micro-benchmark harness, comparing hot paths against stored baselines.
+
+Benchmarks only run with `TAP_HUBSPOT_BENCHMARKS=1`. Timings are divided by the
+time of a fixed calibration workload, so baselines recorded on one machine
+carry over to another. Set `TAP_HUBSPOT_UPDATE_BASELINES=1` to record new
+baselines instead of checking them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import timeit
+import typing as t
+from pathlib import Path
+
+import pytest
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+# A benchmark fails once it is this many times slower than its baseline
+DEFAULT_TOLERANCE = 2.0
+
+_REPEATS = 5
+
+
+def _calibrate() -> None:
+    record = {f"property_{i}": str(i) for i in range(100)}
+    for _ in range(10):
+        sorted(json.loads(json.dumps(record)).items())
+
+
+def _best_time(func: t.Callable[[], object]) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=_REPEATS, number=number)) / number
+
+
+class Bench:
+    """Times a function and compares it against its baseline."""
+
+    def __init__(self, baselines: dict[str, float], *, update: bool) -> None:
+        """Create the harness.
+
+        Args:
+            baselines: Relative timings by benchmark name.
+            update: Whether to record timings rather than check them.
+        """
+        self.baselines = baselines
+        self.update = update
+        self.tolerance = float(
+            os.environ.get("TAP_HUBSPOT_BENCHMARK_TOLERANCE", DEFAULT_TOLERANCE),
+        )
+        self._unit = _best_time(_calibrate)
+
+    def __call__(self, name: str, func: t.Callable[[], object]) -> float:
+        """Time `func` relative to the calibration workload.
+
+        Args:
+            name: Name of the baseline.
+            func: The function to time.
+
+        Returns:
+            The relative timing.
+        """
+        relative = _best_time(func) / self._unit
+        if self.update:
+            self.baselines[name] = round(relative, 4)
+            return relative
+
+        baseline = self.baselines.get(name)
+        if baseline is None:
+            pytest.fail(f"No baseline for '{name}', record one to compare against")
+        assert relative <= baseline * self.tolerance, (
+            f"'{name}' took {relative:.3f} units, "
+            f"{relative / baseline:.1f}x its baseline of {baseline:.3f}"
+        )
+        return relative
+
+
+@pytest.fixture(scope="session")
+def bench() -> t.Iterator[Bench]:
+    """Return the benchmark harness, skipping benchmarks unless enabled."""
+    if os.environ.get("TAP_HUBSPOT_BENCHMARKS") != "1":
+        pytest.skip("Benchmarks run with TAP_HUBSPOT_BENCHMARKS=1")
+
+    update = os.environ.get("TAP_HUBSPOT_UPDATE_BASELINES") == "1"
+    baselines = (
+        json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    )
+    harness = Bench(baselines, update=update)
+    yield harness
+    if update:
+        BASELINES_PATH.write_text(
+            json.dumps(dict(sorted(baselines.items())), indent=2) + "\n",
+        )
@@ -0,0 +1,179 @@
+"""Micro-benchmarks of the tap's hot paths, on synthetic data."""
+
+from __future__ import annotations
+
+import json
+import pickle
+import typing as t
+
+import pytest
+import requests
+
+from tap_hubspot.client import SearchPageToken
+from tap_hubspot.encoding import EncodingSpec, encode_records
+from tap_hubspot.properties import PropertyTable
+from tap_hubspot.streams import DealStream, PropertyNotesStream
+from tap_hubspot.tap import TapHubspot
+
+if t.TYPE_CHECKING:
+    from tests.benchmarks.conftest import Bench
+
+PROPERTY_TYPES = ("string", "number", "datetime", "bool", "enumeration")
+# Deals have as many properties as the widest portals, other objects fewer
+DEAL_PROPERTIES = 5000
+OTHER_PROPERTIES = 200
+RECORD_PROPERTIES = 200
+PAGE_SIZE = 200
+
+BOOKMARK = "2024-01-01T00:00:00Z"
+
+
+def _properties(object_type: str, count: int) -> list[dict]:
+    properties = [
+        {
+            "name": f"{object_type}_property_{i}",
+            "label": f"Property {i}",
+            "type": PROPERTY_TYPES[i % len(PROPERTY_TYPES)],
+            "fieldType": "text",
+            "groupName": f"{object_type}information",
+            "options": [],
+        }
+        for i in range(count - 1)
+    ]
+    properties.append(
+        {"name": "hs_lastmodifieddate", "label": "Modified", "type": "datetime"},
+    )
+    return properties
+
+
+def _send(self, request, **kwargs):  # noqa: ARG001
+    response = requests.Response()
+    response.status_code = 200
+    response.request = request
+    body: dict = {"results": []}
+    if "/properties/" in request.path_url:
+        object_type = request.path_url.split("?")[0].rsplit("/", 1)[-1]
+        count = DEAL_PROPERTIES if object_type == "deals" else OTHER_PROPERTIES
+        body = {"results": _properties(object_type, count)}
+    response._content = json.dumps(body).encode()
+    return response
+
+
+def _record(i: int) -> dict:
+    properties: dict[str, t.Any] = {
+        f"deals_property_{j}": str(i * j) for j in range(RECORD_PROPERTIES)
+    }
+    properties["hs_lastmodifieddate"] = "2024-02-01T00:00:00.000Z"
+    return {
+        "id": str(i),
+        "properties": properties,
+        "createdAt": "2024-01-01T00:00:00.000Z",
+        "updatedAt": "2024-02-01T00:00:00.000Z",
+        "archived": False,
+    }
+
+
+@pytest.fixture(scope="module")
+def tap() -> t.Iterator[TapHubspot]:
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(requests.Session, "send", _send)
+        yield TapHubspot(
+            config={"access_token": "token"},
+            state={
+                "bookmarks": {
+                    "deals": {
+                        "replication_key": "hs_lastmodifieddate",
+                        "replication_key_value": BOOKMARK,
+                    },
+                },
+            },
+            setup_mapper=False,
+        )
+
+
+@pytest.fixture(scope="module")
+def deals(tap: TapHubspot) -> DealStream:
+    stream = DealStream(tap)
+    _ = stream.schema
+    return stream
+
+
+def test_get_next_page_token(bench: Bench, deals: DealStream):
+    request = deals.prepare_request(None, None)
+    content = json.dumps(
+        {
+            "results": [_record(i) for i in range(PAGE_SIZE)],
+            "paging": {"next": {"after": str(PAGE_SIZE)}},
+        },
+    ).encode()
+
+    def next_page_token() -> object:
+        response = requests.Response()
+        response._content = content
+        response.request = request
+        return deals.get_next_page_token(response, None)
+
+    assert next_page_token() == SearchPageToken(after=str(PAGE_SIZE), since=None)
+    bench("get_next_page_token", next_page_token)
+
+
+def test_search_page_request(bench: Bench, deals: DealStream):
+    token = SearchPageToken(after=str(PAGE_SIZE), since=None)
+    request = deals.prepare_request(None, token)
+    assert request.path_url.endswith("/search")
+
+    bench("search_page_request", lambda: deals.prepare_request(None, token))
+
+
+def test_post_process(bench: Bench, deals: DealStream):
+    record = _record(1)
+
+    def post_process() -> object:
+        return deals.post_process(
+            {**record, "properties": dict(record["properties"])},
+            None,
+        )
+
+    assert post_process()["hs_lastmodifieddate"] == "2024-02-01T00:00:00.000Z"  # type: ignore[index]
+    bench("post_process", post_process)
+
+
+def test_schema_of_wide_objects(bench: Bench, deals: DealStream):
+    available = dict(zip(deals.property_table.names, deals.property_table.types))
+    assert len(available) == DEAL_PROPERTIES
+
+    def build_schema() -> dict:
+        deals.__dict__["property_table"] = PropertyTable(available)
+        deals.__dict__.pop("schema", None)
+        return deals.schema
+
+    bench("schema_5k_properties", build_schema)
+
+
+def test_merged_property_records(bench: Bench, tap: TapHubspot):
+    stream = PropertyNotesStream(tap)
+    assert (
+        len(list(stream.get_records(None))) == DEAL_PROPERTIES + 13 * OTHER_PROPERTIES
+    )
+
+    bench("property_notes_get_records", lambda: list(stream.get_records(None)))
+
+
+def test_record_serialisation(bench: Bench, deals: DealStream):
+    spec = pickle.dumps(
+        EncodingSpec(
+            deals.name,
+            deals.schema,
+            deals.effective_schema,
+            deals.mask,
+            deals.TYPE_CONFORMANCE_LEVEL,
+            None,
+        ),
+    )
+    records = [deals.post_process(_record(i), None) for i in range(PAGE_SIZE)]
+
+    def encode() -> str:
+        return encode_records(spec, [dict(record) for record in records])  # type: ignore[arg-type]
+
+    assert encode().count("\n") == PAGE_SIZE
+    bench("record_serialisation", encode)
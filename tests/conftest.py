@@ -1,3 +1,64 @@
 """Test Configuration."""
 
 from __future__ import annotations
+
+import copy
+import io
+import json
+import typing as t
+
+import pytest
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+from tap_hubspot.tap import TapHubspot
+
+if t.TYPE_CHECKING:
+    import requests
+
+# Answers the tap's requests: a JSON body, or an HTTP status and a JSON body
+Handler = t.Callable[["requests.PreparedRequest"], t.Any]
+
+
+@pytest.fixture
+def fake_api(monkeypatch) -> t.Callable[[Handler], None]:
+    """Answer the tap's requests with a handler, rather than the HubSpot API.
+
+    Responses are built by the transport, as they would be from the network, so
+    they can be streamed and captured. A body of None answers with no content.
+    """
+
+    def install(handler: Handler) -> None:
+        def send(self, request, **kwargs):  # noqa: ARG001
+            answer = handler(request)
+            status, body = answer if isinstance(answer, tuple) else (200, answer)
+            content = b"" if body is None else json.dumps(body).encode()
+            raw = HTTPResponse(
+                body=io.BytesIO(content),
+                headers={"Content-Type": "application/json;charset=utf-8"},
+                status=status,
+                preload_content=False,
+            )
+            return self.build_response(request, raw)
+
+        monkeypatch.setattr(HTTPAdapter, "send", send)
+
+    return install
+
+
+@pytest.fixture
+def sync_stream(capsys) -> t.Callable[..., tuple[TapHubspot, list[dict]]]:
+    """Sync a stream of a new tap, returning the tap and the records emitted."""
+
+    def sync(
+        name: str,
+        config: dict,
+        state: dict | None = None,
+        catalog: dict | None = None,
+    ) -> tuple[TapHubspot, list[dict]]:
+        tap = TapHubspot(config=config, state=copy.deepcopy(state), catalog=catalog)
+        tap.streams[name].sync()
+        messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        return tap, [m["record"] for m in messages if m["type"] == "RECORD"]
+
+    return sync
@@ -0,0 +1,46 @@
+"""Tests for adaptive request tuning."""
+
+from __future__ import annotations
+
+from tap_hubspot.adaptive import LatencyTracker, PageSizeController
+
+
+def test_page_size_grows_on_fast_responses():
+    controller = PageSizeController(100, 200)
+    for _ in range(20):
+        controller.observe(0.5, 10_000, controller.page_size)
+    assert controller.page_size == 200
+
+
+def test_page_size_shrinks_on_slow_or_large_responses():
+    controller = PageSizeController(100, 100, max_response_bytes=1_000_000)
+    controller.observe(20.0, 1_000, 100)
+    assert controller.page_size == 25
+
+    controller = PageSizeController(100, 100, max_response_bytes=1_000_000)
+    controller.observe(1.0, 4_000_000, 100)
+    assert controller.page_size == 25
+
+
+def test_penalty_halves_and_holds_page_size():
+    controller = PageSizeController(100, 200, cooldown=2)
+    controller.penalise()
+    assert controller.page_size == 50
+    controller.observe(0.1, 100, 50)
+    controller.observe(0.1, 100, 50)
+    assert controller.page_size == 50
+    controller.observe(0.1, 100, 50)
+    assert controller.page_size > 50
+
+
+def test_latency_percentiles_need_enough_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for seconds in range(1, 10):
+        tracker.observe(seconds)
+    assert tracker.percentile(0.95) is None
+
+    for seconds in range(10, 101):
+        tracker.observe(seconds)
+    assert tracker.percentile(0.5) == 50
+    assert tracker.percentile(0.95) == 95
+    assert tracker.percentile(1) == 100
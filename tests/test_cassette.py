@@ -0,0 +1,136 @@
+"""Tests for capturing API traffic to cassettes and replaying it."""
+
+from __future__ import annotations
+
+import gzip
+import json
+
+from tap_hubspot.auth import HubSpotOAuthAuthenticator
+from tap_hubspot.cassette import Anonymiser, get_cassette
+
+OWNERS = [
+    {
+        "id": "101",
+        "email": "jane@example.com",
+        "firstName": "Jane",
+        "updatedAt": "2024-01-01T00:00:00.000Z",
+        "archived": False,
+    },
+]
+
+
+def test_anonymiser_keeps_names_of_definitions():
+    anonymise = Anonymiser(b"key")
+    document = {
+        "results": [
+            {"name": "dealname", "label": "Deal name", "type": "string"},
+        ],
+    }
+
+    (definition,) = anonymise(document, definitions=True)["results"]
+
+    assert definition["name"] == "dealname"
+    assert definition["type"] == "string"
+    assert definition["label"] != "Deal name"
+    assert len(definition["label"]) == len("Deal name")
+
+
+def test_anonymiser_hashes_values_of_records():
+    anonymise = Anonymiser(b"key")
+    company = {
+        "id": "1",
+        "properties": {
+            "hs_object_id": "1",
+            "name": "Acme",
+            "phone": "01234 567890",
+            "zip": "90210",
+            "annualrevenue": "10.5",
+            "createdate": "2024-01-01T00:00:00Z",
+        },
+    }
+    document = {
+        "results": [company],
+        "paging": {"next": {"after": "MTA=", "link": "https://api.hubapi.com"}},
+    }
+
+    anonymised = anonymise(document)
+
+    (record,) = anonymised["results"]
+    properties = record["properties"]
+    assert record["id"] == "1"
+    assert properties["hs_object_id"] == "1"
+    assert properties["createdate"] == "2024-01-01T00:00:00Z"
+    assert properties["name"] == anonymise.hash("Acme")
+    for name in ("phone", "zip", "annualrevenue"):
+        assert properties[name] != company["properties"][name]
+        assert len(properties[name]) == len(company["properties"][name])
+    # Numbers still parse as numbers when replayed
+    assert float(properties["annualrevenue"]) >= 0
+    assert properties["zip"].isdigit()
+    assert anonymised["paging"] == document["paging"]
+
+
+def test_captured_traffic_is_replayed(fake_api, sync_stream, tmp_path):
+    path = tmp_path / "owners.jsonl.gz"
+    fake_api(lambda r: {"results": OWNERS if "/owners" in r.path_url else []})
+    _, captured = sync_stream(
+        "owners",
+        {"access_token": "token", "capture_path": str(path)},
+    )
+    get_cassette(path).close()
+
+    with gzip.open(path, "rt") as file:
+        cassette = file.read()
+    assert "token" not in cassette
+    assert "jane" not in cassette
+
+    # Replayed responses are served by the cassette, not the fake API
+    _, replayed = sync_stream(
+        "owners",
+        {"access_token": "token", "replay_path": str(path)},
+    )
+
+    assert captured[0]["email"] == "jane@example.com"
+    assert replayed[0]["id"] == "101"
+    assert replayed[0]["updatedAt"] == OWNERS[0]["updatedAt"]
+    assert len(replayed[0]["email"]) == len("jane@example.com")
+    assert replayed[0]["email"] != "jane@example.com"
+
+
+def test_token_requests_are_captured_and_replayed(
+    fake_api,
+    sync_stream,
+    tmp_path,
+    monkeypatch,
+):
+    path = tmp_path / "owners.jsonl.gz"
+    tokens = []
+
+    def answer(request):
+        if "/oauth/" in request.path_url:
+            tokens.append(request.path_url)
+            return {"access_token": "secret-access-token", "expires_in": 1800}
+        return {"results": OWNERS if "/owners" in request.path_url else []}
+
+    fake_api(answer)
+    config = {
+        "client_id": "client",
+        "client_secret": "secret",
+        "refresh_token": "refresh",
+    }
+    # Authenticators of their own, so no other test shares their tokens
+    monkeypatch.setattr(HubSpotOAuthAuthenticator, "_instances", {})
+    sync_stream("owners", {**config, "capture_path": str(path)})
+    get_cassette(path).close()
+
+    with gzip.open(path, "rt") as file:
+        entries = [json.loads(line) for line in file]
+    assert tokens == ["/oauth/v1/token"]
+    assert any("/oauth/v1/token" in entry["request"] for entry in entries)
+    assert "secret-access-token" not in json.dumps(entries)
+
+    monkeypatch.setattr(HubSpotOAuthAuthenticator, "_instances", {})
+    _, replayed = sync_stream("owners", {**config, "replay_path": str(path)})
+
+    assert tokens == ["/oauth/v1/token"]
+    assert replayed[0]["id"] == "101"
@@ -0,0 +1,122 @@
+"""Tests for change feed driven incremental syncs."""
+
+from __future__ import annotations
+
+import datetime
+import json
+
+from tap_hubspot.changes import read_changed_ids
+from tap_hubspot.streams import ContactStream
+from tap_hubspot.tap import TapHubspot
+
+BOOKMARK = "2024-01-01T00:00:00+00:00"
+BOOKMARK_MS = 1704067200000
+
+
+def _event(object_id: int, **kwargs: object) -> str:
+    event = {
+        "objectId": object_id,
+        "subscriptionType": "contact.propertyChange",
+        "portalId": 1,
+        "occurredAt": BOOKMARK_MS + object_id,
+        **kwargs,
+    }
+    return json.dumps(event) + "\n"
+
+
+def test_changed_ids_are_unique_and_filtered(tmp_path):
+    (tmp_path / "a.jsonl").write_text(
+        _event(1)
+        + _event(2, subscriptionType="deal.creation")
+        + _event(3, objectTypeId="0-1", subscriptionType="object.propertyChange")
+        + _event(1)
+        + _event(4, occurredAt=BOOKMARK_MS - 1),
+    )
+    (tmp_path / "b.jsonl").write_text(
+        _event(5, portalId=2) + _event(3) + '{"objectId": 6, "subscr',
+    )
+    (tmp_path / "notes.txt").write_text(_event(7))
+
+    since = datetime.datetime.fromisoformat(BOOKMARK)
+    assert read_changed_ids(tmp_path, "0-1", since=since) == ["1", "3", "5"]
+    assert read_changed_ids(tmp_path / "a.jsonl", "0-1") == ["1", "3", "4"]
+    assert read_changed_ids(tmp_path, "0-1", portal_id="2") == ["5"]
+    assert read_changed_ids(tmp_path, "0-3") == ["2"]
+
+
+def test_changed_records_are_read_in_batches(tmp_path, fake_api):
+    feed = tmp_path / "feed.jsonl"
+    feed.write_text("".join(_event(i) for i in range(1, 251)))
+    batches = []
+
+    def answer(request):
+        if request.method == "GET":
+            return {
+                "results": [
+                    {"name": "email", "type": "string"},
+                    {"name": "lastmodifieddate", "type": "datetime"},
+                ],
+            }
+        ids = [item["id"] for item in json.loads(request.body)["inputs"]]
+        batches.append(ids)
+        return {
+            "results": [
+                {"id": i, "properties": {"lastmodifieddate": "2024-02-01"}}
+                # Deleted objects are not returned
+                for i in ids
+                if i != "7"
+            ],
+        }
+
+    fake_api(answer)
+
+    tap = TapHubspot(
+        config={
+            "access_token": "token",
+            "change_feed_path": str(feed),
+            "max_workers": 2,
+        },
+        setup_mapper=False,
+    )
+    stream = ContactStream(tap)
+    stream.get_context_state(None)["replication_key_value"] = BOOKMARK
+
+    records = list(stream.get_records(None))
+
+    assert sorted(len(batch) for batch in batches) == [50, 100, 100]
+    expected = [str(i) for i in range(1, 251) if i != 7]
+    assert [record["id"] for record in records] == expected
+
+
+def test_changes_are_read_from_before_the_bookmark(tmp_path, fake_api):
+    feed = tmp_path / "feed.jsonl"
+    feed.write_text(
+        _event(1, occurredAt=BOOKMARK_MS - 60_000)
+        + _event(2, occurredAt=BOOKMARK_MS - 180_000)
+        + _event(3),
+    )
+    batches = []
+
+    def answer(request):
+        if request.method == "GET":
+            return {"results": [{"name": "lastmodifieddate", "type": "datetime"}]}
+        batches.append([item["id"] for item in json.loads(request.body)["inputs"]])
+        return {"results": []}
+
+    fake_api(answer)
+
+    tap = TapHubspot(
+        config={
+            "access_token": "token",
+            "change_feed_path": str(feed),
+            "change_feed_lag": 120,
+        },
+        setup_mapper=False,
+    )
+    stream = ContactStream(tap)
+    stream.get_context_state(None)["replication_key_value"] = BOOKMARK
+
+    list(stream.get_records(None))
+
+    # Events delivered late, within the lag, are not missed
+    assert batches == [["1", "3"]]
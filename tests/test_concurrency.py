@@ -0,0 +1,143 @@
+"""Tests for concurrent partition fetching and multi-portal syncs."""
+
+from __future__ import annotations
+
+import threading
+import typing as t
+from functools import partial
+
+import pytest
+
+from tap_hubspot.concurrency import Prefetcher, get_worker_pool
+from tap_hubspot.ratelimit import RateLimiter
+from tap_hubspot.streams import OwnersStream
+from tap_hubspot.tap import TapHubspot
+
+
+def test_prefetcher_preserves_order_per_key():
+    prefetcher: Prefetcher[int] = Prefetcher(get_worker_pool(2), buffer_size=2)
+    prefetcher.submit("a", lambda: range(5))
+    prefetcher.submit("b", lambda: range(10, 13))
+
+    assert list(prefetcher.take("b")) == [10, 11, 12]
+    assert list(prefetcher.take("a")) == [0, 1, 2, 3, 4]
+    assert "a" not in prefetcher
+
+
+def test_prefetcher_reraises_worker_errors():
+    def fail():
+        yield 1
+        msg = "boom"
+        raise ValueError(msg)
+
+    prefetcher: Prefetcher[int] = Prefetcher(get_worker_pool(2), buffer_size=2)
+    prefetcher.submit("a", fail)
+
+    items = prefetcher.take("a")
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="boom"):
+        next(items)
+
+
+def test_prefetcher_starts_a_limited_number_of_iterators():
+    started = []
+
+    def items(key: str) -> t.Iterator[str]:
+        started.append(key)
+        yield key
+
+    prefetcher: Prefetcher[str] = Prefetcher(
+        get_worker_pool(2),
+        buffer_size=2,
+        max_started=1,
+    )
+    for key in "abc":
+        prefetcher.submit(key, partial(items, key))
+
+    # Read before the others, "c" is started even though "a" was not read yet
+    assert list(prefetcher.take("c")) == ["c"]
+    assert "b" not in started
+    assert list(prefetcher.take("a")) == ["a"]
+    assert list(prefetcher.take("b")) == ["b"]
+    assert started[-1] == "b"
+
+
+def test_rate_limiter_burst():
+    limiter = RateLimiter(rate=1, burst=2)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+
+def test_portals_are_fetched_concurrently(fake_api):
+    tap = TapHubspot(
+        config={
+            "portals": [
+                {"portal_id": "1", "access_token": "token-1"},
+                {"portal_id": "2", "access_token": "token-2"},
+            ],
+            "max_workers": 2,
+        },
+        setup_mapper=False,
+    )
+    stream = OwnersStream(tap)
+    threads = set()
+
+    def answer(request):
+        threads.add(threading.get_ident())
+        token = request.headers["Authorization"].removeprefix("Bearer ")
+        return {"results": [{"id": token}]}
+
+    fake_api(answer)
+
+    assert stream.partitions == [{"portal_id": "1"}, {"portal_id": "2"}]
+    assert stream.primary_keys == ("portal_id", "id")
+    assert "portal_id" in stream.schema["properties"]
+    assert "portal_id" not in OwnersStream.schema["properties"]
+
+    records = [
+        record
+        for partition in stream.partitions
+        for record in stream.get_records(partition)
+    ]
+    assert records == [{"id": "token-1"}, {"id": "token-2"}]
+    assert len(threads) == 2  # noqa: PLR2004
+
+
+def test_properties_of_all_portals_are_synced(fake_api, sync_stream):
+    properties = {
+        "token-1": ["email", "lastmodifieddate"],
+        "token-2": ["email", "lastmodifieddate", "favourite_colour"],
+    }
+
+    def answer(request):
+        token = request.headers["Authorization"].removeprefix("Bearer ")
+        names = properties[token]
+        if "/properties/" in request.path_url:
+            return {"results": [{"name": name, "type": "string"} for name in names]}
+        if "/contacts" in request.path_url:
+            record = {name: f"{token} {name}" for name in names}
+            return {"results": [{"id": "1", "properties": record}]}
+        return {"results": []}
+
+    fake_api(answer)
+
+    tap, records = sync_stream(
+        "contacts",
+        {
+            "portals": [
+                {"portal_id": "1", "access_token": "token-1"},
+                {"portal_id": "2", "access_token": "token-2"},
+            ],
+        },
+    )
+
+    stream = tap.streams["contacts"]
+    assert "favourite_colour" in stream.hs_properties
+    assert (
+        "favourite_colour" in (stream.schema["properties"]["properties"]["properties"])
+    )
+    assert [r["properties"].get("favourite_colour") for r in records] == [
+        None,
+        "token-2 favourite_colour",
+    ]
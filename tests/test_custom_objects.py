@@ -0,0 +1,90 @@
+"""Tests for streams of custom object types."""
+
+from __future__ import annotations
+
+import typing as t
+
+import pytest
+from singer_sdk.exceptions import ConfigValidationError
+
+from tap_hubspot.streams import CustomObjectStream
+from tap_hubspot.tap import TapHubspot
+
+if t.TYPE_CHECKING:
+    import requests
+
+SCHEMAS = [
+    {"id": "1", "objectTypeId": "2-101", "name": "cars", "archived": False},
+    {"id": "2", "objectTypeId": "2-102", "name": "boats", "archived": True},
+    {"id": "3", "objectTypeId": "2-103", "name": "deals", "archived": False},
+]
+
+CAR = {
+    "id": "7",
+    "properties": {"model": "Beetle", "hs_lastmodifieddate": "2024-02-01T00:00:00Z"},
+    "createdAt": "2024-01-01T00:00:00Z",
+    "updatedAt": "2024-02-01T00:00:00Z",
+    "archived": False,
+}
+
+
+def _answer(request: requests.PreparedRequest) -> dict:
+    path = request.path_url.split("?")[0]
+    results: list[dict] = []
+    if path.endswith("/schemas"):
+        results = SCHEMAS
+    elif path.endswith("/properties/2-101"):
+        results = [
+            {"name": "model", "type": "string"},
+            {"name": "hs_lastmodifieddate", "type": "datetime"},
+        ]
+    elif path.startswith("/crm/v3/objects/2-101"):
+        results = [CAR]
+    return {"results": results}
+
+
+def test_custom_object_types_are_discovered(fake_api):
+    fake_api(_answer)
+    tap = TapHubspot(
+        config={"access_token": "token", "custom_objects": True, "max_workers": 2},
+    )
+
+    stream = tap.streams["cars"]
+    assert isinstance(stream, CustomObjectStream)
+    assert "boats" not in tap.streams
+    assert not isinstance(tap.streams["deals"], CustomObjectStream)
+    assert stream.path == "/objects/2-101"
+    assert set(stream.schema["properties"]["properties"]["properties"]) == {
+        "model",
+        "hs_lastmodifieddate",
+    }
+
+
+def test_custom_object_records_are_synced(fake_api, sync_stream):
+    fake_api(_answer)
+
+    _, records = sync_stream("cars", {"access_token": "token", "custom_objects": True})
+
+    assert [r["id"] for r in records] == ["7"]
+    assert records[0]["properties"]["model"] == "Beetle"
+
+
+def test_custom_objects_are_not_discovered_by_default(fake_api):
+    fake_api(_answer)
+    tap = TapHubspot(config={"access_token": "token"})
+
+    assert "cars" not in tap.streams
+
+
+def test_custom_objects_are_only_for_one_portal(fake_api):
+    fake_api(_answer)
+    config = {
+        "portals": [
+            {"portal_id": "1", "access_token": "token-1"},
+            {"portal_id": "2", "access_token": "token-2"},
+        ],
+        "custom_objects": True,
+    }
+
+    with pytest.raises(ConfigValidationError, match="more than one portal"):
+        TapHubspot(config=config)
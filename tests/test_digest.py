@@ -0,0 +1,149 @@
+"""Tests for the record digest store."""
+
+from __future__ import annotations
+
+import pytest
+
+from singer_sdk.singerlib import StateMessage
+
+from tap_hubspot.digest import DigestStore, record_digest
+from tap_hubspot.tap import TapHubspot
+
+
+def test_record_digest_is_order_independent():
+    assert record_digest({"a": "1", "b": None}) == record_digest({"b": None, "a": "1"})
+    assert record_digest({"a": "1"}) != record_digest({"a": "2"})
+
+
+def test_digest_store_roundtrip(tmp_path):
+    store = DigestStore(tmp_path / "digests.db")
+    store.update("contacts", {"1": b"x", "2": b"y"})
+    store.update("contacts", {"2": b"z"})
+
+    assert store.lookup("contacts", ["1", "2", "3"]) == {"1": b"x", "2": b"z"}
+    assert store.lookup("companies", ["1"]) == {}
+    store.close()
+
+
+# Streamed records are looked up a few at a time, as they are decoded
+@pytest.mark.parametrize("stream_responses", [False, True])
+def test_changes_to_deselected_properties_are_not_emitted(
+    fake_api,
+    sync_stream,
+    tmp_path,
+    stream_responses,
+):
+    note = {
+        "hs_lastmodifieddate": "2024-01-01T00:00:00Z",
+        "hs_note_body": "note",
+        "hs_attachment_ids": "1",
+    }
+
+    def answer(request):
+        if "/properties/" in request.path_url:
+            return {"results": [{"name": name, "type": "string"} for name in note]}
+        return {"results": [{"id": "1", "properties": dict(note)}]}
+
+    fake_api(answer)
+    config = {
+        "access_token": "token",
+        "digest_store_path": str(tmp_path / "d.db"),
+        "stream_responses": stream_responses,
+    }
+    catalog = TapHubspot(config=config).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            metadata["metadata"]["selected"] = entry["tap_stream_id"] == "notes" and (
+                metadata["breadcrumb"][-1:] != ["hs_attachment_ids"]
+            )
+
+    tap, records = sync_stream("notes", config, catalog=catalog)
+    assert [record["id"] for record in records] == ["1"]
+
+    note["hs_attachment_ids"] = "1;2"
+    note["hs_lastmodifieddate"] = "2024-02-01T00:00:00Z"
+    tap, records = sync_stream("notes", config, tap.state, catalog)
+
+    assert records == []
+    bookmark = tap.state["bookmarks"]["notes"]["replication_key_value"]
+    assert bookmark.startswith("2024-02-01")
+
+
+def _answer_notes(request):
+    if "/properties/" in request.path_url:
+        return {
+            "results": [
+                {"name": "hs_lastmodifieddate", "type": "datetime"},
+                {"name": "hs_note_body", "type": "string"},
+            ],
+        }
+    return {
+        "results": [
+            {
+                "id": str(i),
+                "properties": {
+                    "hs_lastmodifieddate": "2024-01-01T00:00:00Z",
+                    "hs_note_body": f"note {i}",
+                },
+            }
+            for i in range(3)
+        ],
+    }
+
+
+def test_digests_are_stored_with_state(
+    fake_api,
+    sync_stream,
+    monkeypatch,
+    capsys,
+    tmp_path,
+):
+    fake_api(_answer_notes)
+    config = {"access_token": "token", "digest_store_path": str(tmp_path / "d.db")}
+    write_message = TapHubspot.write_message
+
+    def fail_on_state(self, message):
+        if isinstance(message, StateMessage):
+            msg = "Target failed"
+            raise RuntimeError(msg)
+        write_message(self, message)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(TapHubspot, "write_message", fail_on_state)
+        with pytest.raises(RuntimeError, match="Target failed"):
+            sync_stream("notes", config)
+    capsys.readouterr()
+
+    # The records are emitted again, as their state was never written
+    _, records = sync_stream("notes", config)
+    assert [record["id"] for record in records] == ["0", "1", "2"]
+
+    _, records = sync_stream("notes", config)
+    assert records == []
+
+
+def test_streamed_digests_are_looked_up_in_batches(
+    fake_api,
+    sync_stream,
+    monkeypatch,
+    tmp_path,
+):
+    fake_api(_answer_notes)
+    lookups = []
+    lookup = DigestStore.lookup
+
+    def count_lookups(self, stream, ids):
+        lookups.append(list(ids))
+        return lookup(self, stream, ids)
+
+    monkeypatch.setattr(DigestStore, "lookup", count_lookups)
+    config = {
+        "access_token": "token",
+        "digest_store_path": str(tmp_path / "d.db"),
+        "stream_responses": True,
+    }
+
+    _, records = sync_stream("notes", config)
+
+    assert len(records) == 3  # noqa: PLR2004
+    assert lookups == [["0", "1", "2"]]
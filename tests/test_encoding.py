@@ -0,0 +1,74 @@
+"""Tests for encoding records in worker processes."""
+
+from __future__ import annotations
+
+import typing as t
+from urllib.parse import parse_qsl, urlsplit
+
+from tap_hubspot.streams import NoteStream
+from tap_hubspot.tap import TapHubspot
+
+if t.TYPE_CHECKING:
+    import requests
+
+PAGES = 3
+PAGE_SIZE = 100
+
+
+def _answer(request: requests.PreparedRequest) -> dict:
+    if "/properties/" in request.path_url:
+        return {
+            "results": [
+                {"name": "hs_lastmodifieddate", "type": "datetime"},
+                {"name": "hs_note_body", "type": "string"},
+                {"name": "hs_attachment_count", "type": "number"},
+            ],
+        }
+    after = int(dict(parse_qsl(urlsplit(request.url or "").query)).get("after", 0))
+    body: dict = {
+        "results": [
+            {
+                "id": str(after + i),
+                "properties": {
+                    "hs_lastmodifieddate": f"2024-01-01T00:00:{i % 60:02d}Z",
+                    "hs_note_body": "note",
+                    "hs_attachment_count": "2",
+                },
+            }
+            for i in range(PAGE_SIZE)
+        ],
+    }
+    if after < (PAGES - 1) * PAGE_SIZE:
+        body["paging"] = {"next": {"after": str(after + PAGE_SIZE)}}
+    return body
+
+
+def test_records_are_encoded_in_order_before_state(
+    fake_api,
+    sync_stream,
+    monkeypatch,
+):
+    fake_api(_answer)
+    monkeypatch.setattr(NoteStream, "STATE_MSG_FREQUENCY", 150)
+    write_message = TapHubspot.write_message
+    types: list[str] = []
+
+    def record_type(self, message):
+        types.append(message.type)
+        write_message(self, message)
+
+    monkeypatch.setattr(TapHubspot, "write_message", record_type)
+
+    _, records = sync_stream(
+        "notes",
+        {"access_token": "token", "transform_processes": 2},
+    )
+
+    assert [record["id"] for record in records] == [
+        str(i) for i in range(PAGES * PAGE_SIZE)
+    ]
+    # Every state message follows the records it covers
+    assert types[: types.index("STATE")].count("RECORD") == 150  # noqa: PLR2004
+    assert types[-1] == "STATE"
+    _, in_process = sync_stream("notes", {"access_token": "token"})
+    assert records == in_process
@@ -0,0 +1,163 @@
+"""Tests for backfills through CRM export jobs, against a local stand-in."""
+
+from __future__ import annotations
+
+import io
+import json
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from tap_hubspot.client import PropertyStream
+from tap_hubspot.export import CrmExport
+from tap_hubspot.streams import ContactStream
+from tap_hubspot.tap import TapHubspot
+
+PROPERTIES = [
+    {"name": "hs_object_id", "label": "Record ID", "type": "number"},
+    {"name": "email", "label": "Email", "type": "string"},
+    {"name": "lastmodifieddate", "label": "Last Modified Date", "type": "datetime"},
+    {"name": "numberofemployees", "label": "Number of Employees", "type": "number"},
+    {"name": "hs_is_unworked", "label": "Contact unworked", "type": "bool"},
+    {"name": "date_of_birth", "label": "Date of birth", "type": "date"},
+]
+
+
+def _archive() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "contacts-1.csv",
+            "﻿Record ID,Email,Last Modified Date,Number of Employees,"
+            "Contact unworked,Date of birth\r\n"
+            '1,a@example.com,2024-01-01 10:00,"1,250",Yes,1990-05-17 00:00\r\n'
+            "2,,2024-01-02 11:30,,,\r\n",
+        )
+        archive.writestr(
+            "contacts-2.csv",
+            'Record ID,Email,Last Modified Date\r\n3,"c,d@example.com",2024-01-03\r\n',
+        )
+    return buffer.getvalue()
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Serves the export, property and search endpoints."""
+
+    requests: list[tuple[str, str, dict | None]]
+    polls: int
+
+    def _reply(self, body: dict | bytes) -> None:
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:  # noqa: D102
+        self.requests.append(("GET", self.path, None))
+        if self.path.startswith("/properties/contacts"):
+            self._reply({"results": PROPERTIES})
+        elif self.path == "/exports/export/async/tasks/42/status":
+            type(self).polls += 1
+            if self.polls < 2:  # noqa: PLR2004
+                self._reply({"status": "PROCESSING"})
+            else:
+                base = f"http://{self.headers['Host']}"
+                self._reply({"status": "COMPLETE", "result": f"{base}/files/42.zip"})
+        elif self.path == "/files/42.zip":
+            self._reply(_archive())
+        else:
+            self.send_error(404)
+
+    def do_POST(self) -> None:  # noqa: D102
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(("POST", self.path, body))
+        if self.path == "/exports/export/async":
+            self._reply({"id": "42"})
+        elif self.path == "/objects/contacts/search":
+            self._reply({"total": 0, "results": []})
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args: object) -> None:
+        """Keep test output quiet."""
+
+
+@pytest.fixture
+def stand_in():
+    handler = type("Handler", (StandIn,), {"requests": [], "polls": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_export_rows_are_read_from_archive(stand_in):
+    base, _ = stand_in
+
+    def api(method: str, path: str, body: dict | None) -> dict:
+        return requests.request(method, base + path, json=body, timeout=5).json()
+
+    export = CrmExport(api, poll_interval=0)
+    task_id = export.submit("0-1", ["email"])
+    rows = list(export.rows(export.wait(task_id)))
+
+    assert [row["Record ID"] for row in rows] == ["1", "2", "3"]
+    assert rows[2]["Email"] == "c,d@example.com"
+
+
+def test_stream_backfills_from_export_then_searches(stand_in, monkeypatch):
+    base, handler = stand_in
+    monkeypatch.setattr(ContactStream, "url_base", base)
+    monkeypatch.setattr(PropertyStream, "url_base", base)
+
+    tap = TapHubspot(
+        config={"access_token": "token", "export_backfill": True},
+        setup_mapper=False,
+    )
+    stream = ContactStream(tap)
+    stream.export_poll_interval = 0
+    session = stream.requests_session
+    sent = []
+    send = session.send
+    monkeypatch.setattr(
+        session,
+        "send",
+        lambda request, **kwargs: sent.append(request) or send(request, **kwargs),
+    )
+
+    records = list(stream.get_records(None))
+
+    assert [record["id"] for record in records] == ["1", "2", "3"]
+    assert records[0]["properties"] == {
+        "hs_object_id": "1",
+        "email": "a@example.com",
+        "lastmodifieddate": "2024-01-01T10:00:00+00:00",
+        "numberofemployees": "1250",
+        "hs_is_unworked": "true",
+        "date_of_birth": "1990-05-17",
+    }
+    assert records[1]["properties"]["email"] is None
+    assert records[1]["properties"]["numberofemployees"] is None
+
+    # The file is downloaded through the stream's session, without credentials
+    download = next(r for r in sent if r.url == f"{base}/files/42.zip")
+    assert "Authorization" not in download.headers
+
+    submitted = next(body for _, _, body in handler.requests if body)
+    assert submitted["objectType"] == "0-1"
+    assert set(submitted["objectProperties"]) == {p["name"] for p in PROPERTIES}
+
+    # Search takes over from when the export was requested
+    search = handler.requests[-1]
+    assert search[1] == "/objects/contacts/search"
+    starting_value = stream.get_context_state(None)["starting_replication_value"]
+    assert search[2]["filterGroups"][0]["filters"][0]["propertyName"] == (
+        "lastmodifieddate"
+    )
+    assert starting_value > "2024-01-03"
@@ -0,0 +1,103 @@
+"""Tests for latency-adaptive timeouts and hedged requests."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+import time
+
+from tap_hubspot.adaptive import LatencyTracker
+from tap_hubspot.cassette import get_cassette
+from tap_hubspot.streams import OwnersStream
+from tap_hubspot.tap import TapHubspot
+
+
+def _owners_stream(config: dict, latency: float) -> OwnersStream:
+    tap = TapHubspot(
+        # A portal of its own, so no other test shares its rate limiter
+        config={
+            "portals": [{"portal_id": "hedging", "access_token": "token"}],
+            **config,
+        },
+        setup_mapper=False,
+    )
+    stream = OwnersStream(tap)
+    tracker = LatencyTracker()
+    for _ in range(tracker.min_samples):
+        tracker.observe(latency)
+    stream._latency_trackers[stream.path] = tracker
+    return stream
+
+
+def test_timeouts_follow_endpoint_latency():
+    assert _owners_stream({"adaptive_timeouts": True}, 10).timeout == 40
+    assert _owners_stream({"adaptive_timeouts": True}, 0.1).timeout == 15
+    assert _owners_stream({}, 10).timeout == 300
+
+
+def _fake_owners(fake_api) -> tuple[list[str], threading.Event]:
+    calls: list[str] = []
+    release = threading.Event()
+
+    def answer(request):
+        calls.append(request.path_url)
+        if len(calls) == 1:
+            # The first request hangs until the test is over
+            release.wait(5)
+        owner = {"id": str(len(calls)), "email": "a@example.com", "archived": False}
+        return {"results": [owner]}
+
+    fake_api(answer)
+    return calls, release
+
+
+def test_slow_request_is_hedged(fake_api):
+    calls, release = _fake_owners(fake_api)
+    stream = _owners_stream({"hedge_requests": True}, 0.01)
+
+    try:
+        records = list(stream.get_records({"portal_id": "hedging"}))
+    finally:
+        release.set()
+
+    assert len(calls) == 2
+    assert [record["id"] for record in records] == ["2"]
+
+
+def test_only_the_response_used_is_captured(fake_api, tmp_path):
+    calls, release = _fake_owners(fake_api)
+    path = tmp_path / "owners.jsonl.gz"
+    stream = _owners_stream({"hedge_requests": True, "capture_path": str(path)}, 0.01)
+
+    try:
+        records = list(stream.get_records({"portal_id": "hedging"}))
+    finally:
+        release.set()
+    # The slow request still finishes, once the race was decided
+    time.sleep(0.2)
+    get_cassette(path).close()
+
+    with gzip.open(path, "rt") as file:
+        entries = [json.loads(line) for line in file]
+    assert len(calls) == 2  # noqa: PLR2004
+    assert [record["id"] for record in records] == ["2"]
+    assert [entry["body"]["results"][0]["id"] for entry in entries] == ["2"]
+
+
+def test_hedges_stay_within_rate_limits(fake_api):
+    calls, release = _fake_owners(fake_api)
+    stream = _owners_stream(
+        {
+            "hedge_requests": True,
+            # The first request takes the only token for a long while
+            "max_requests_per_second": 0.001,
+        },
+        0.01,
+    )
+    threading.Timer(0.2, release.set).start()
+
+    records = list(stream.get_records({"portal_id": "hedging"}))
+
+    assert len(calls) == 1
+    assert [record["id"] for record in records] == ["1"]
@@ -0,0 +1,143 @@
+"""Tests for the property history streams."""
+
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+import requests
+from singer_sdk.exceptions import FatalAPIError
+
+from tap_hubspot.parsing import history_rows
+
+pytest.importorskip("ijson")
+
+BOOKMARK = "2024-01-01T00:00:00+00:00"
+
+
+def _history(id_: str) -> dict:
+    return {
+        "id": id_,
+        "propertiesWithHistory": {
+            "dealstage": [
+                {"value": "won", "timestamp": "2024-02-01T00:00:00Z"},
+                {"value": "open", "timestamp": "2023-12-01T00:00:00Z"},
+            ],
+        },
+    }
+
+
+def _response(body: dict) -> requests.Response:
+    response = requests.Response()
+    response.raw = io.BytesIO(json.dumps(body).encode())
+    response.status_code = 200
+    return response
+
+
+@pytest.mark.parametrize("streamed", [True, False])
+def test_history_rows_carry_their_object_id(monkeypatch, streamed):
+    # Without ijson, the whole body is decoded instead
+    monkeypatch.setattr("tap_hubspot.parsing.ijson_installed", lambda: streamed)
+    body = {
+        "results": [
+            _history("1"),
+            # The ID of an object may follow its history
+            {
+                "propertiesWithHistory": _history("2")["propertiesWithHistory"],
+                "id": "2",
+            },
+        ],
+    }
+
+    rows = list(history_rows(_response(body)))
+
+    assert [(row["id"], row["property"], row["value"]) for row in rows] == [
+        ("1", "dealstage", "won"),
+        ("1", "dealstage", "open"),
+        ("2", "dealstage", "won"),
+        ("2", "dealstage", "open"),
+    ]
+    assert rows[0]["timestamp"] == "2024-02-01T00:00:00Z"
+
+
+def test_history_of_changed_objects_since_bookmark(fake_api, sync_stream):
+    searches = []
+    batches = []
+
+    def answer(request):
+        if request.path_url.endswith("/batch/read"):
+            ids = [i["id"] for i in json.loads(request.body)["inputs"]]
+            batches.append(json.loads(request.body))
+            return {"results": [_history(id_) for id_ in ids]}
+        if request.path_url.endswith("/search"):
+            searches.append(json.loads(request.body))
+            return {
+                "results": [
+                    {"id": str(i), "properties": {"hs_lastmodifieddate": "x"}}
+                    for i in range(60)
+                ],
+            }
+        return {"results": []}
+
+    fake_api(answer)
+    _, rows = sync_stream(
+        "deals_property_history",
+        {
+            "access_token": "token",
+            "max_workers": 2,
+            "property_history": {"deals": ["dealstage"]},
+        },
+        {
+            "bookmarks": {
+                "deals_property_history": {
+                    "replication_key": "timestamp",
+                    "replication_key_value": BOOKMARK,
+                },
+            },
+        },
+    )
+
+    assert [row["id"] for row in rows] == [str(i) for i in range(60)]
+    assert {row["value"] for row in rows} == {"won"}
+    assert searches[0]["properties"] == ["hs_lastmodifieddate"]
+    assert searches[0]["filterGroups"][0]["filters"][0]["value"] == "1704067200000"
+    assert sorted(len(batch["inputs"]) for batch in batches) == [10, 50]
+    assert batches[0]["propertiesWithHistory"] == ["dealstage"]
+
+
+@pytest.mark.parametrize("stream", ["deals", "deals_property_history"])
+def test_search_fails_when_too_many_objects_share_a_date(
+    fake_api,
+    sync_stream,
+    stream,
+):
+    def answer(request):
+        if not request.path_url.endswith("/search"):
+            return {"results": []}
+        body = json.loads(request.body)
+        after = int(body.get("after") or 0)
+        return {
+            "results": [
+                {
+                    "id": str(after + i),
+                    "properties": {"hs_lastmodifieddate": BOOKMARK},
+                }
+                for i in range(body["limit"])
+            ],
+            "paging": {"next": {"after": str(after + body["limit"])}},
+        }
+
+    fake_api(answer)
+    config = {"access_token": "token", "property_history": {"deals": ["dealstage"]}}
+    bookmark = {"replication_key_value": BOOKMARK}
+    state = {
+        "bookmarks": {
+            "deals": {**bookmark, "replication_key": "hs_lastmodifieddate"},
+            "deals_property_history": {**bookmark, "replication_key": "timestamp"},
+        },
+    }
+
+    # Objects past the search results limit would be missed
+    with pytest.raises(FatalAPIError, match="Too many objects of stream 'deals'"):
+        sync_stream(stream, config, state)
@@ -0,0 +1,205 @@
+"""Tests for object ID range partitioning."""
+
+from __future__ import annotations
+
+import copy
+import datetime
+import json
+import typing as t
+
+from tap_hubspot.streams import DealStream, TicketStream
+from tap_hubspot.tap import TapHubspot
+
+BOOKMARK = "2024-01-01T00:00:00+00:00"
+
+OBJECT_IDS = [3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
+
+
+def _search(body: dict) -> dict:
+    """Answer a search request against `OBJECT_IDS`."""
+    ids = OBJECT_IDS
+    for group in body.get("filterGroups", []):
+        for f in group["filters"]:
+            value = int(f["value"])
+            ids = [
+                i for i in ids if (i >= value if f["operator"] == "GTE" else i < value)
+            ]
+    if body.get("sorts", [{}])[0].get("direction") == "DESCENDING":
+        ids = ids[::-1]
+
+    after = int(body.get("after", 0))
+    page = ids[after : after + body["limit"]]
+    response: dict = {
+        "total": len(ids),
+        "results": [{"id": str(i), "properties": {}} for i in page],
+    }
+    if after + body["limit"] < len(ids):
+        response["paging"] = {"next": {"after": str(after + body["limit"])}}
+    return response
+
+
+def test_full_table_stream_is_split_by_object_id(fake_api):
+    fake_api(lambda request: _search(json.loads(request.body)))
+
+    tap = TapHubspot(
+        config={"access_token": "token", "object_id_range_size": 3},
+        setup_mapper=False,
+    )
+    stream = TicketStream(tap)
+    stream.default_page_size = 2
+
+    partitions = stream.partitions
+    assert partitions[0]["hs_object_id_gte"] is None
+    assert partitions[-1]["hs_object_id_lt"] is None
+    assert all(
+        len(_search({"filterGroups": [], "limit": 100, **_filters(p)})["results"]) <= 3  # noqa: PLR2004
+        for p in partitions
+    )
+
+    records = [
+        record for partition in partitions for record in stream.get_records(partition)
+    ]
+    assert [int(record["id"]) for record in records] == OBJECT_IDS
+
+
+def test_interrupted_initial_sync_resumes_every_range(fake_api):
+    fake_api(
+        lambda request: (
+            _search(json.loads(request.body)) if request.body else {"results": []}
+        ),
+    )
+    config = {"access_token": "token", "object_id_range_size": 3}
+    tap = TapHubspot(config=config, setup_mapper=False)
+    planned = DealStream(tap).partitions
+    assert len(planned) > 2  # noqa: PLR2004
+
+    # The sync was interrupted once two ranges were started
+    state = copy.deepcopy(tap.state)
+    state["bookmarks"]["deals"]["partitions"] = [
+        {
+            "context": context,
+            "replication_key": "hs_lastmodifieddate",
+            "replication_key_value": BOOKMARK,
+        }
+        for context in planned[:2]
+    ]
+
+    def no_search(request):
+        if request.body:
+            msg = f"Ranges were split again: {request.path_url}"
+            raise AssertionError(msg)
+        return {"results": []}
+
+    fake_api(no_search)
+    stream = DealStream(TapHubspot(config=config, state=state, setup_mapper=False))
+
+    assert stream.partitions == planned
+    assert stream.get_context_state(planned[0])["replication_key_value"] == BOOKMARK
+    assert "replication_key_value" not in stream.get_context_state(planned[-1])
+
+
+def _answer_deals(modified: dict[int, str]) -> t.Callable:
+    """Answer searches of deals modified at the given dates, by object ID."""
+
+    def answer(request):
+        if not request.body:
+            return {
+                "results": [{"name": "hs_lastmodifieddate", "type": "datetime"}],
+            }
+        body = json.loads(request.body)
+        ids = sorted(modified)
+        for group in body.get("filterGroups", []):
+            for f in group["filters"]:
+                if f["propertyName"] == "hs_object_id":
+                    value = int(f["value"])
+                    ids = [
+                        i
+                        for i in ids
+                        if (i >= value if f["operator"] == "GTE" else i < value)
+                    ]
+                else:
+                    since = datetime.datetime.fromtimestamp(
+                        int(f["value"]) / 1000,
+                        tz=datetime.timezone.utc,
+                    )
+                    ids = [
+                        i
+                        for i in ids
+                        if datetime.datetime.fromisoformat(modified[i]) >= since
+                    ]
+        if body.get("sorts", [{}])[0].get("direction") == "DESCENDING":
+            ids = ids[::-1]
+        requests.append(body)
+        return {
+            "total": len(ids),
+            "results": [
+                {"id": str(i), "properties": {"hs_lastmodifieddate": modified[i]}}
+                for i in ids[: body["limit"]]
+            ],
+        }
+
+    requests: list[dict] = []
+    answer.requests = requests  # type: ignore[attr-defined]
+    return answer
+
+
+def test_ranges_are_merged_once_synced(fake_api, sync_stream, caplog):
+    # Older objects were modified more recently
+    modified = {i: f"2024-01-{10 - i:02d}T00:00:00+00:00" for i in range(1, 10)}
+    answer = _answer_deals(modified)
+    fake_api(answer)
+    config = {"access_token": "token", "object_id_range_size": 3}
+
+    tap, records = sync_stream("deals", config)
+
+    assert len(answer.requests) > 3  # noqa: PLR2004
+    assert sorted(int(record["id"]) for record in records) == list(modified)
+    # Ranges partition state only, and are not fields of records
+    assert not any("hs_object_id_gte" in record for record in records)
+    assert "not found in catalog schema" not in caplog.text
+    # The earliest bookmark of the ranges, that of IDs 7 to 9
+    state = tap.state["bookmarks"]["deals"]
+    assert state == {
+        "replication_key": "hs_lastmodifieddate",
+        "replication_key_value": "2024-01-03T00:00:00+00:00",
+    }
+
+    answer.requests.clear()
+    _, records = sync_stream("deals", config, tap.state)
+
+    # A single search from the bookmark
+    assert [r["filterGroups"][0]["filters"] for r in answer.requests] == [
+        [
+            {
+                "propertyName": "hs_lastmodifieddate",
+                "operator": "GTE",
+                "value": "1704240000000",
+            },
+        ],
+    ]
+    assert sorted(int(record["id"]) for record in records) == list(range(1, 8))
+
+
+def test_full_table_ranges_are_not_kept(fake_api, sync_stream, caplog):
+    fake_api(
+        lambda request: (
+            _search(json.loads(request.body)) if request.body else {"results": []}
+        ),
+    )
+    config = {"access_token": "token", "object_id_range_size": 3}
+
+    tap, records = sync_stream("tickets", config)
+
+    assert len(records) == len(OBJECT_IDS)
+    assert not any("hs_object_id_gte" in record for record in records)
+    assert "not found in catalog schema" not in caplog.text
+    assert "partitions" not in tap.state["bookmarks"].get("tickets", {})
+
+
+def _filters(partition: dict) -> dict:
+    filters = []
+    if partition["hs_object_id_gte"] is not None:
+        filters.append({"operator": "GTE", "value": partition["hs_object_id_gte"]})
+    if partition["hs_object_id_lt"] is not None:
+        filters.append({"operator": "LT", "value": partition["hs_object_id_lt"]})
+    return {"filterGroups": [{"filters": filters}]}
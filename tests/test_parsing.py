@@ -0,0 +1,78 @@
+"""Tests for incremental response parsing."""
+
+from __future__ import annotations
+
+import io
+import json
+from decimal import Decimal
+
+import pytest
+import requests
+
+from tap_hubspot.parsing import StreamingPage, records_prefix
+
+pytest.importorskip("ijson")
+
+
+def _response(body: dict) -> requests.Response:
+    response = requests.Response()
+    response.raw = io.BytesIO(json.dumps(body).encode())
+    response.status_code = 200
+    return response
+
+
+@pytest.mark.parametrize(
+    ("jsonpath", "prefix"),
+    [
+        ("$[results][*]", "results.item"),
+        ("$.results[*]", "results.item"),
+        ("$[*]", "item"),
+        ("$.results[*].id", None),
+    ],
+)
+def test_records_prefix(jsonpath, prefix):
+    assert records_prefix(jsonpath) == prefix
+
+
+def test_streaming_page_yields_records_and_cursor():
+    body = {
+        "results": [
+            {"id": "1", "properties": {"nested": {"x": [1, 2]}}, "score": 1.5},
+            {"id": "2", "properties": {}},
+        ],
+        "paging": {"next": {"after": "2"}},
+    }
+    page = StreamingPage(_response(body), "results.item")
+
+    records = list(page)
+
+    assert records == [
+        {"id": "1", "properties": {"nested": {"x": [1, 2]}}, "score": Decimal("1.5")},
+        {"id": "2", "properties": {}},
+    ]
+    assert page.next_after == "2"
+
+
+def test_streaming_page_without_paging():
+    page = StreamingPage(_response({"results": []}), "results.item")
+
+    assert list(page) == []
+    assert page.next_after is None
+
+
+def test_responses_are_decoded_whole_without_ijson(
+    monkeypatch,
+    caplog,
+    fake_api,
+    sync_stream,
+):
+    monkeypatch.setattr("tap_hubspot.client.ijson_installed", lambda: False)
+    fake_api(lambda r: {"results": [{"id": "1"}] if "/owners" in r.path_url else []})
+
+    _, records = sync_stream(
+        "owners",
+        {"access_token": "token", "stream_responses": True},
+    )
+
+    assert [record["id"] for record in records] == ["1"]
+    assert "requires the 'ijson' package" in caplog.text
@@ -0,0 +1,75 @@
+"""Tests for estimating the volume of a sync."""
+
+from __future__ import annotations
+
+import json
+
+from click.testing import CliRunner
+
+from tap_hubspot.tap import TapHubspot
+
+BOOKMARK = "2024-01-01T00:00:00+00:00"
+
+
+def test_plan_probes_searchable_streams(tmp_path, fake_api):
+    probes = []
+
+    def answer(request):
+        if request.method == "GET":
+            return {"results": [{"name": "lastmodifieddate", "type": "datetime"}]}
+        probes.append((request.path_url, json.loads(request.body)))
+        return {"total": 450, "results": [{"id": "1", "properties": {}}]}
+
+    fake_api(answer)
+    config = tmp_path / "config.json"
+    config.write_text(
+        json.dumps(
+            {
+                "access_token": "token",
+                "max_requests_per_second": 10,
+                "end_date": "2024-06-01T00:00:00+00:00",
+            },
+        ),
+    )
+    state = tmp_path / "state.json"
+    state.write_text(
+        json.dumps(
+            {
+                "bookmarks": {
+                    "contacts": {
+                        "replication_key": "lastmodifieddate",
+                        "replication_key_value": BOOKMARK,
+                    },
+                },
+            },
+        ),
+    )
+
+    result = CliRunner().invoke(
+        TapHubspot.cli,
+        ["--config", str(config), "--state", str(state), "--plan"],
+    )
+
+    assert result.exit_code == 0, result.output
+    plan = json.loads(result.output[result.output.index("{") :])
+    estimates = {estimate["stream"]: estimate for estimate in plan["streams"]}
+    assert estimates["tickets"] == {
+        "stream": "tickets",
+        "records": 450,
+        "requests": 5,
+        "bytes": 450 * len(json.dumps({"id": "1", "properties": {}})),
+        "seconds": 0.5,
+    }
+    assert "owners" in plan["unknown"]
+
+    volume, max_object_id = (
+        body for path, body in probes if path == "/crm/v3/objects/contacts/search"
+    )
+    assert volume["limit"] == 1
+    assert [f["operator"] for f in volume["filterGroups"][0]["filters"]] == [
+        "GTE",
+        "LT",
+    ]
+    assert max_object_id["sorts"][0]["direction"] == "DESCENDING"
+    assert plan["shard_max_object_ids"]["contacts"] == 1
+    assert "owners" not in plan["shard_max_object_ids"]
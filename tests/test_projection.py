@@ -0,0 +1,99 @@
+"""Tests for flattening and projecting records natively."""
+
+from __future__ import annotations
+
+import json
+import typing as t
+
+import pytest
+from singer_sdk.exceptions import ConfigValidationError
+
+from tap_hubspot.projection import Projection
+from tap_hubspot.tap import TapHubspot
+
+if t.TYPE_CHECKING:
+    import requests
+
+
+def test_projection_flattens_renames_and_drops_fields():
+    projection = Projection.compile(
+        ["id", "body", "hs_lastmodifieddate", "archived"],
+        {"id", "properties", "hs_lastmodifieddate", "archived"},
+        {"hs_note_body": "body"},
+        flatten=True,
+    )
+    record = {
+        "id": "1",
+        "properties": {"hs_note_body": "note", "hs_lastmodifieddate": "ignored"},
+        "hs_lastmodifieddate": "2024-01-01T00:00:00Z",
+        "createdAt": "2024-01-01T00:00:00Z",
+    }
+
+    assert projection(record) == {
+        "id": "1",
+        "body": "note",
+        "hs_lastmodifieddate": "2024-01-01T00:00:00Z",
+    }
+    assert "createdAt" in record
+
+
+def _answer(request: requests.PreparedRequest) -> dict:
+    if "/properties/" in request.path_url:
+        return {
+            "results": [
+                {"name": "hs_lastmodifieddate", "type": "datetime"},
+                {"name": "hs_note_body", "type": "string"},
+                {"name": "hs_attachment_ids", "type": "string"},
+            ],
+        }
+    properties = {
+        "hs_lastmodifieddate": "2024-01-01T00:00:00Z",
+        "hs_note_body": "note",
+        "hs_attachment_ids": "1;2",
+    }
+    return {"results": [{"id": "1", "properties": properties, "archived": False}]}
+
+
+def test_emitted_records_match_flattened_schema(fake_api, capsys):
+    fake_api(_answer)
+    config = {
+        "access_token": "token",
+        "flatten_properties": True,
+        "field_renames": {"notes": {"hs_note_body": "body"}},
+    }
+    catalog = TapHubspot(config=config).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            breadcrumb = metadata["breadcrumb"]
+            metadata["metadata"]["selected"] = entry["tap_stream_id"] == "notes" and (
+                breadcrumb != ["properties", "hs_attachment_ids"]
+            )
+
+    tap = TapHubspot(config=config, catalog=catalog)
+    tap.streams["notes"].sync()
+
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    schema = next(m["schema"] for m in messages if m["type"] == "SCHEMA")
+    record = next(m["record"] for m in messages if m["type"] == "RECORD")
+    assert "properties" not in schema["properties"]
+    assert "body" in schema["properties"]
+    assert "hs_attachment_ids" not in schema["properties"]
+    assert record == {
+        "id": "1",
+        "archived": False,
+        "hs_lastmodifieddate": "2024-01-01T00:00:00Z",
+        "body": "note",
+    }
+    # Properties are still requested by their HubSpot names
+    assert "hs_note_body" in tap.streams["notes"].hs_properties
+
+
+def test_key_fields_cannot_be_renamed(fake_api):
+    fake_api(_answer)
+    tap = TapHubspot(
+        config={"access_token": "token", "field_renames": {"notes": {"id": "note"}}},
+        setup_mapper=False,
+    )
+
+    with pytest.raises(ConfigValidationError, match="Cannot rename key fields"):
+        _ = tap.streams["notes"].schema
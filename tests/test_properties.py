@@ -0,0 +1,31 @@
+"""Tests for the compact property table."""
+
+from __future__ import annotations
+
+from tap_hubspot.properties import PropertyTable
+
+
+def test_json_schema_is_memoised_and_shares_type_schemas():
+    table = PropertyTable({"email": "string", "age": "number", "city": "string"})
+    calls = []
+
+    def type_schema(type_):
+        calls.append(type_)
+        return {"type": ["string", "null"]}
+
+    schema = table.json_schema(type_schema)
+
+    assert list(schema["properties"]) == ["email", "age", "city"]
+    assert schema["properties"]["email"] is schema["properties"]["city"]
+    assert table.json_schema(type_schema) is schema
+    assert sorted(calls) == ["number", "string"]
+
+
+def test_conform_drops_unknown_properties():
+    table = PropertyTable({"email": "string"})
+    values = {"email": "a@b.c", "unknown": "x"}
+
+    assert table.conform(values) == ["unknown"]
+    assert values == {"email": "a@b.c"}
+    assert "email" in table
+    assert len(table) == 1
@@ -0,0 +1,98 @@
+"""Tests for targeted re-syncs of records by ID."""
+
+from __future__ import annotations
+
+import json
+import logging
+
+import pytest
+from singer_sdk.exceptions import ConfigValidationError
+
+from tap_hubspot.tap import TapHubspot
+
+BOOKMARK = "2024-01-01T00:00:00+00:00"
+
+
+@pytest.fixture
+def batch_reads(fake_api):
+    batches = []
+
+    def answer(request):
+        if request.method == "GET":
+            return {
+                "results": [
+                    {"name": "email", "type": "string"},
+                    {"name": "lastmodifieddate", "type": "datetime"},
+                ],
+            }
+        ids = [item["id"] for item in json.loads(request.body)["inputs"]]
+        batches.append((request.path_url, ids))
+        return {
+            "results": [
+                {"id": i, "properties": {"lastmodifieddate": "2024-02-01"}}
+                for i in ids
+                if i != "404"
+            ],
+        }
+
+    fake_api(answer)
+    return batches
+
+
+def test_resync_fetches_ids_without_touching_state(
+    tmp_path,
+    batch_reads,
+    caplog,
+    capsys,
+):
+    ids_file = tmp_path / "ids.txt"
+    ids_file.write_text("1\n404\n2\n1\n")
+    state = {
+        "bookmarks": {
+            "contacts": {
+                "replication_key": "lastmodifieddate",
+                "replication_key_value": BOOKMARK,
+            },
+        },
+    }
+    tap = TapHubspot(
+        config={"access_token": "token", "resync_ids": {"contacts": str(ids_file)}},
+        state=state,
+    )
+    assert list(tap.streams) == ["contacts"]
+
+    stream = tap.streams["contacts"]
+    with caplog.at_level(logging.WARNING):
+        stream.sync()
+
+    assert batch_reads == [("/crm/v3/objects/contacts/batch/read", ["1", "404", "2"])]
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [m["record"]["id"] for m in messages if m["type"] == "RECORD"] == ["1", "2"]
+    assert stream.stream_state["replication_key_value"] == BOOKMARK
+    assert "1 of 3 records of stream 'contacts' to re-sync were not found: 404" in (
+        caplog.text
+    )
+
+
+def test_resync_is_only_for_crm_object_streams():
+    tap = TapHubspot(
+        config={"access_token": "token", "resync_ids": {"owners": ["1"]}},
+        setup_mapper=False,
+    )
+    with pytest.raises(ConfigValidationError, match="owners"):
+        tap.discover_streams()
+
+
+def test_resync_is_only_for_one_portal():
+    tap = TapHubspot(
+        config={
+            "portals": [
+                {"portal_id": "1", "access_token": "token-1"},
+                {"portal_id": "2", "access_token": "token-2"},
+            ],
+            "resync_ids": {"contacts": ["1"]},
+        },
+        setup_mapper=False,
+    )
+    with pytest.raises(ConfigValidationError, match="more than one portal"):
+        tap.discover_streams()
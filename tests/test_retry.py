@@ -0,0 +1,156 @@
+"""Tests for the retry policy, circuit breakers and partition retries."""
+
+from __future__ import annotations
+
+import pytest
+import requests
+from singer_sdk.exceptions import RetriableAPIError
+
+from tap_hubspot.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    retry_after,
+    retry_waits,
+)
+
+
+def _error(status: int, headers: dict | None = None) -> RetriableAPIError:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return RetriableAPIError("failed", response)
+
+
+def test_retry_after_honours_server_hints():
+    assert retry_after(_error(429, {"Retry-After": "3"})) == 3
+    assert (
+        retry_after(
+            _error(
+                429,
+                {
+                    "X-HubSpot-RateLimit-Remaining": "0",
+                    "X-HubSpot-RateLimit-Interval-Milliseconds": "10000",
+                },
+            ),
+        )
+        == 10
+    )
+    assert retry_after(_error(502)) is None
+    assert retry_after(requests.exceptions.Timeout()) is None
+
+
+def test_waits_are_jittered_by_kind_of_failure():
+    waits = retry_waits()
+    next(waits)
+
+    assert waits.send(_error(429, {"Retry-After": "30"})) >= 30
+    for _ in range(10):
+        assert 5 <= waits.send(requests.exceptions.Timeout()) <= 120
+        assert 2 <= waits.send(_error(503)) <= 60
+
+
+def test_circuit_opens_after_repeated_failures(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("tap_hubspot.retry.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker("/crm/v3/objects/deals", threshold=2, cooldown=60)
+
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    # A single request tries the endpoint again after the cooldown
+    now[0] = 61
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    breaker.check()
+
+
+def _answer(request: requests.PreparedRequest) -> tuple[int, dict | None]:
+    # Property definitions are listed by every portal when the tap starts
+    if "/properties/" in request.path_url:
+        return 200, {"results": []}
+    if request.headers["Authorization"] == "Bearer broken":
+        return 503, None
+    results = []
+    if "/owners" in request.path_url:
+        results = [{"id": "1", "email": "a@example.com", "archived": False}]
+    return 200, {"results": results}
+
+
+CONFIG = {
+    "portals": [
+        {"portal_id": "1", "access_token": "token"},
+        {"portal_id": "2", "access_token": "broken"},
+    ],
+    "circuit_breaker_threshold": 0,
+}
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda _: None)
+
+
+@pytest.mark.usefixtures("no_sleep")
+def test_failing_partition_is_deferred(fake_api, sync_stream):
+    fake_api(_answer)
+
+    tap, records = sync_stream("owners", {**CONFIG, "defer_failed_partitions": True})
+
+    assert [(r["portal_id"], r["id"]) for r in records] == [("1", "1")]
+    assert tap.streams["owners"].deferred_partitions == [{"portal_id": "2"}]
+
+
+@pytest.mark.usefixtures("no_sleep")
+def test_deferred_partition_is_synced_first_next_time(fake_api, sync_stream):
+    fake_api(_answer)
+    config = {**CONFIG, "defer_failed_partitions": True}
+    tap, _ = sync_stream("owners", config)
+    assert tap.state["bookmarks"]["owners"]["deferred_partitions"] == [
+        {"portal_id": "2"},
+    ]
+
+    portals = [{**portal, "access_token": "token"} for portal in CONFIG["portals"]]
+    tap, records = sync_stream("owners", {**config, "portals": portals}, tap.state)
+
+    assert [r["portal_id"] for r in records] == ["2", "1"]
+    assert "deferred_partitions" not in tap.state["bookmarks"]["owners"]
+
+
+@pytest.mark.usefixtures("no_sleep")
+def test_failing_partition_fails_the_sync_unless_deferred(fake_api, sync_stream):
+    fake_api(_answer)
+
+    with pytest.raises(RetriableAPIError):
+        sync_stream("owners", CONFIG)
+
+
+@pytest.mark.usefixtures("no_sleep")
+def test_partition_fails_once_its_circuit_keeps_opening(
+    fake_api,
+    sync_stream,
+    monkeypatch,
+):
+    # Circuits of their own, so no other test finds them open
+    monkeypatch.setattr("tap_hubspot.retry._breakers", {})
+    requests_sent = []
+
+    def answer(request):
+        if "/owners" not in request.path_url:
+            return {"results": []}
+        requests_sent.append(request.path_url)
+        return 503, None
+
+    fake_api(answer)
+
+    with pytest.raises(CircuitOpenError):
+        sync_stream(
+            "owners",
+            {"access_token": "token", "circuit_breaker_threshold": 3},
+        )
+    # Requests stopped once the circuit opened, and the retry found it open
+    assert len(requests_sent) == 3  # noqa: PLR2004
@@ -0,0 +1,58 @@
+"""Tests for scheduling streams by backlog."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+from tap_hubspot.ratelimit import PriorityRateLimiter
+from tap_hubspot.tap import TapHubspot
+
+
+def test_heaviest_waiting_request_goes_first():
+    limiter = PriorityRateLimiter(rate=20, burst=1)
+    limiter.acquire()
+    order = []
+
+    def acquire(weight: int) -> None:
+        limiter.acquire(weight=weight)
+        order.append(weight)
+
+    threads = [threading.Thread(target=acquire, args=(w,)) for w in (1, 5, 3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+
+    assert order == [5, 3, 1]
+
+
+def test_streams_are_synced_largest_backlog_first(fake_api, capsys):
+    totals = {"tickets": 100, "deals": 5000, "contacts": 2000}
+
+    def answer(request):
+        if request.method == "POST":
+            name = request.path_url.split("/")[-2]
+            return {"total": totals[name], "results": [{"id": "1"}]}
+        return {"results": []}
+
+    fake_api(answer)
+    config = {"access_token": "token", "stream_priorities": {"tickets": 100}}
+    catalog = TapHubspot(config=config).catalog_dict
+    for entry in catalog["streams"]:
+        for metadata in entry["metadata"]:
+            metadata["metadata"]["selected"] = entry["tap_stream_id"] in {
+                *totals,
+                "owners",
+            }
+    tap = TapHubspot(config={**config, "schedule_by_backlog": True}, catalog=catalog)
+
+    tap.sync_all()
+
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    synced = [m["stream"] for m in messages if m["type"] == "SCHEMA"]
+    assert synced == ["tickets", "deals", "contacts", "owners"]
+    assert tap.streams["deals"].backlog == 5000  # noqa: PLR2004
+    assert tap.streams["owners"].backlog is None
@@ -0,0 +1,65 @@
+"""Tests for compiled search request templates."""
+
+from __future__ import annotations
+
+import json
+
+from tap_hubspot.client import SearchPageToken, SearchTemplate
+from tap_hubspot.streams import TicketStream
+from tap_hubspot.tap import TapHubspot
+
+
+def test_template_renders_page_bodies():
+    template = SearchTemplate(
+        None,
+        {"sorts": [{"propertyName": "hs_object_id", "direction": "ASCENDING"}]},
+        json.dumps(["subject", "content"]).encode(),
+    )
+
+    assert json.loads(template.render(None, 100)) == {
+        "sorts": [{"propertyName": "hs_object_id", "direction": "ASCENDING"}],
+        "limit": 100,
+        "properties": ["subject", "content"],
+    }
+    assert json.loads(template.render('12"3', 200))["after"] == '12"3'
+
+
+def test_search_is_compiled_once_per_partition(monkeypatch):
+    tap = TapHubspot(config={"access_token": "token"}, setup_mapper=False)
+    stream = TicketStream(tap)
+    calls = []
+    get_search_properties = stream._get_search_properties
+    monkeypatch.setattr(
+        stream,
+        "_get_search_properties",
+        lambda: calls.append(1) or get_search_properties(),
+    )
+
+    context = {"hs_object_id_gte": None, "hs_object_id_lt": 500}
+    first = stream.prepare_request(context, None)
+    second = stream.prepare_request(context, SearchPageToken(after="100"))
+    restarted = stream.prepare_request(context, SearchPageToken(since="250"))
+
+    assert len(calls) == 1
+    assert "after" not in json.loads(first.body)
+    assert json.loads(second.body)["after"] == "100"
+    assert (
+        json.loads(second.body)["filterGroups"]
+        == json.loads(first.body)["filterGroups"]
+    )
+    assert json.loads(restarted.body)["filterGroups"][0]["filters"][0] == {
+        "propertyName": "hs_object_id",
+        "operator": "GTE",
+        "value": "250",
+    }
+    assert first.headers["Content-Type"] == "application/json"
+
+
+def test_listed_partition_pages_by_cursor():
+    tap = TapHubspot(config={"access_token": "token"}, setup_mapper=False)
+    stream = TicketStream(tap)
+
+    assert stream.prepare_request(None, None).method == "GET"
+    second = stream.prepare_request(None, "100")
+    assert second.method == "GET"
+    assert "after=100" in second.url
@@ -0,0 +1,146 @@
+"""Tests for sharding streams across processes."""
+
+from __future__ import annotations
+
+import pytest
+from singer_sdk.exceptions import ConfigValidationError
+
+from tap_hubspot.shards import Shard, merge_states, object_id_range
+from tap_hubspot.streams import DealStream
+from tap_hubspot.tap import TapHubspot
+
+
+def test_object_id_ranges_cover_all_ids():
+    ranges = [object_id_range(Shard(index, 3), 12_345) for index in range(3)]
+    assert ranges == [(None, 4116), (4116, 8232), (8232, None)]
+    assert object_id_range(Shard(), 12_345) == (None, None)
+
+
+def test_shards_split_the_configured_ids_whatever_they_probe(fake_api):
+    # Each shard would find a different highest ID, were it to probe for one
+    probed = iter((9949, 10001))
+    fake_api(
+        lambda request: {
+            "results": [{"id": str(next(probed))}] if request.body else [],
+        },
+    )
+    config = {
+        "access_token": "token",
+        "shard_count": 2,
+        "shard_max_object_ids": {"deals": 10_000},
+    }
+
+    ranges = [
+        DealStream(
+            TapHubspot(config={**config, "shard_index": index}, setup_mapper=False),
+        )._get_object_id_range(None)
+        for index in range(2)
+    ]
+
+    assert ranges == [(None, 5001), (5001, None)]
+
+
+def test_sharded_stream_needs_its_highest_object_id(fake_api):
+    fake_api(lambda request: {"results": []})  # noqa: ARG005
+    tap = TapHubspot(
+        config={"access_token": "token", "shard_count": 2},
+        setup_mapper=False,
+    )
+
+    with pytest.raises(ConfigValidationError, match="shard_max_object_ids"):
+        _ = DealStream(tap).shard_max_object_id
+
+
+def test_merge_states_keeps_earliest_completed_bookmark():
+    shard_0 = {
+        "bookmarks": {
+            "contacts": {
+                "replication_key": "lastmodifieddate",
+                "replication_key_value": "2024-03-01T00:00:00+00:00",
+            },
+            "owners": {},
+        },
+    }
+    shard_1 = {
+        "bookmarks": {
+            "contacts": {
+                "replication_key": "lastmodifieddate",
+                "replication_key_value": "2024-02-01T00:00:00Z",
+            },
+        },
+    }
+    interrupted = {
+        "bookmarks": {
+            "contacts": {
+                "replication_key": "lastmodifieddate",
+                "starting_replication_value": "2024-01-01T00:00:00Z",
+                "progress_markers": {"replication_key_value": "2024-04-01"},
+            },
+        },
+    }
+
+    merged = merge_states([shard_0, shard_1])
+    assert merged["bookmarks"]["contacts"] == {
+        "replication_key": "lastmodifieddate",
+        "replication_key_value": "2024-02-01T00:00:00Z",
+    }
+    assert merged["bookmarks"]["owners"] == {}
+
+    merged = merge_states([shard_0, interrupted])
+    assert merged["bookmarks"]["contacts"]["replication_key_value"] == (
+        "2024-01-01T00:00:00Z"
+    )
+
+
+def test_merge_states_merges_partitions():
+    states = [
+        {
+            "bookmarks": {
+                "contacts": {
+                    "partitions": [
+                        {"context": {"portal_id": "1"}, "replication_key_value": v},
+                    ],
+                },
+            },
+        }
+        for v in ("2024-02-01T00:00:00Z", "2024-01-01T00:00:00Z")
+    ]
+    merged = merge_states(states)
+    assert merged["bookmarks"]["contacts"]["partitions"] == [
+        {
+            "context": {"portal_id": "1"},
+            "replication_key_value": "2024-01-01T00:00:00Z",
+        },
+    ]
+
+
+def test_merge_states_merges_planned_object_id_ranges():
+    planned = [
+        [{"hs_object_id_gte": None, "hs_object_id_lt": 50}],
+        [{"hs_object_id_gte": 50, "hs_object_id_lt": None}],
+    ]
+    states = [
+        {"bookmarks": {"deals": {"object_id_partitions": ranges}}} for ranges in planned
+    ]
+
+    merged = merge_states(states)
+
+    assert merged["bookmarks"]["deals"]["object_id_partitions"] == [
+        *planned[0],
+        *planned[1],
+    ]
+
+
+def test_merge_states_keeps_deferred_partitions_of_every_shard():
+    states = [
+        {"bookmarks": {"deals": {"deferred_partitions": [{"portal_id": "1"}]}}},
+        {"bookmarks": {"deals": {}}},
+        {"bookmarks": {"deals": {"deferred_partitions": [{"portal_id": "2"}]}}},
+    ]
+
+    merged = merge_states(states)
+
+    assert merged["bookmarks"]["deals"]["deferred_partitions"] == [
+        {"portal_id": "1"},
+        {"portal_id": "2"},
+    ]
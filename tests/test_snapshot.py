@@ -0,0 +1,31 @@
+"""Tests for syncing reference streams as snapshot diffs."""
+
+from __future__ import annotations
+
+OWNERS = [
+    {"id": "1", "email": "a@example.com", "archived": False},
+    {"id": "2", "email": "b@example.com", "archived": False},
+]
+
+
+def test_only_changed_records_are_emitted(fake_api, sync_stream):
+    owners = OWNERS
+    fake_api(lambda r: {"results": owners if "/owners" in r.path_url else []})
+    config = {"access_token": "token", "snapshot_diff": True}
+
+    tap, records = sync_stream("owners", config)
+    assert [r["id"] for r in records] == ["1", "2"]
+    snapshot = tap.state["bookmarks"]["owners"]["snapshot"]
+    assert set(snapshot["records"]) == {"1", "2"}
+
+    tap, records = sync_stream("owners", config, tap.state)
+    assert records == []
+    assert tap.state["bookmarks"]["owners"]["snapshot"] == snapshot
+
+    owners = [OWNERS[0], {**OWNERS[1], "email": "c@example.com"}]
+    tap, records = sync_stream("owners", config, tap.state)
+    assert [r["id"] for r in records] == ["2"]
+    hashes = tap.state["bookmarks"]["owners"]["snapshot"]["records"]
+    assert hashes["1"] == snapshot["records"]["1"]
+    assert hashes["2"] != snapshot["records"]["2"]
+    assert "digest" not in tap.state["bookmarks"]["owners"]["snapshot"]
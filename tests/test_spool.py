@@ -0,0 +1,86 @@
+"""Tests for the disk-backed record spool."""
+
+from __future__ import annotations
+
+import threading
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from tap_hubspot.spool import Spool
+from tap_hubspot.streams import TicketStream
+from tap_hubspot.tap import TapHubspot
+
+
+def _fill(spool: Spool, count: int, sizes: list[int]) -> None:
+    for i in range(count):
+        spool.put({"id": str(i), "padding": "x" * 100})
+        sizes.append(sum(p.stat().st_size for p in spool.directory.glob("*.seg")))
+    spool.close()
+
+
+def test_writer_is_bounded_by_slow_reader(tmp_path):
+    spool = Spool(tmp_path / "spool", max_bytes=1000, segment_bytes=300)
+    sizes: list[int] = []
+    writer = threading.Thread(target=_fill, args=(spool, 50, sizes))
+    writer.start()
+
+    records = list(spool.records())
+    writer.join()
+
+    assert [record["id"] for record in records] == [str(i) for i in range(50)]
+    # Up to a record over the limit, as the writer only waits once it is reached
+    assert max(sizes) < 1000 + 200  # noqa: PLR2004
+    assert not (tmp_path / "spool").exists()
+
+
+def test_unread_records_are_replayed(tmp_path):
+    spool = Spool(tmp_path, max_bytes=10_000, segment_bytes=300)
+    for i in range(5):
+        spool.put({"id": str(i)})
+    reader = spool.records()
+    assert next(reader) == {"id": "0"}
+    # The reader stops, e.g. as the process is killed mid-write
+    reader.close()
+    assert spool.put({"id": "5"}) is False
+    with next(tmp_path.glob("*.seg")).open("ab") as segment:
+        segment.write(b"\x00\x00\x00\x10torn")
+
+    replay = Spool(tmp_path, max_bytes=10_000)
+    replay.put({"id": "new"})
+    replay.close()
+
+    ids = [record["id"] for record in replay.records()]
+    assert ids == ["0", "1", "2", "3", "4", "new"]
+
+
+def test_writer_error_is_raised_after_records(tmp_path):
+    spool = Spool(tmp_path / "spool", max_bytes=10_000)
+    spool.put({"id": "1"})
+    spool.close(RuntimeError("fetch failed"))
+
+    reader = spool.records()
+    assert next(reader) == {"id": "1"}
+    with pytest.raises(RuntimeError, match="fetch failed"):
+        next(reader)
+
+
+def test_stream_records_pass_through_spool(tmp_path, fake_api):
+    def answer(request):
+        after = int(dict(parse_qsl(urlsplit(request.url).query)).get("after", 0))
+        body: dict = {"results": [{"id": str(after + i)} for i in range(2)]}
+        if after < 4:  # noqa: PLR2004
+            body["paging"] = {"next": {"after": str(after + 2)}}
+        return body
+
+    fake_api(answer)
+    tap = TapHubspot(
+        config={"access_token": "token", "spool_path": str(tmp_path)},
+        setup_mapper=False,
+    )
+    stream = TicketStream(tap)
+
+    records = list(stream.get_records(None))
+
+    assert [record["id"] for record in records] == ["0", "1", "2", "3", "4", "5"]
+    assert list((tmp_path / "tickets").iterdir()) == []